@@ -0,0 +1,98 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.models.database import get_async_db, get_session_factory
+from app.models.schemas import JobCreateRequest, JobResponse, JobResultsResponse
+from app.services.jobs import JobRepository, job_manager, job_summary
+
+router = APIRouter()
+
+
+async def get_job_or_404(db, job_id):
+    job = await db.run_sync(JobRepository.get_by_id, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Tâche introuvable")
+    return job
+
+
+def _create_job(session_factory, request):
+    """Crée la tâche dans une session synchrone (exécutée dans le pool de threads)"""
+    db = session_factory()
+    try:
+        job = JobRepository.create(db, texts=request.texts, source=request.source, use_openai=request.use_openai)
+        return job_summary(job)
+    finally:
+        db.close()
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(request: JobCreateRequest, session_factory=Depends(get_session_factory)):
+    """
+    Crée une tâche d'analyse asynchrone, traitée par fragments en arrière-plan.
+    
+    - **texts**: (Optionnel) Textes à analyser ; si absent, les textes déjà stockés sont analysés
+    - **source**: (Optionnel) Source enregistrée avec les textes fournis, ou filtre sur les textes stockés
+    - **use_openai**: (Optionnel) Utiliser l'API OpenAI pour l'analyse (défaut: False)
+    
+    Renvoie l'identifiant et l'état initial de la tâche. L'empreinte et l'enregistrement
+    des textes fournis (jusqu'à des centaines de milliers) sont exécutés hors de la
+    boucle d'événements, par transactions successives.
+    """
+    summary = await run_in_threadpool(_create_job, session_factory, request)
+    job_manager.notify()
+    return summary
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Renvoie l'état d'une tâche : progression, nombre de résultats par sentiment et par
+    modèle, débit (textes analysés par seconde de traitement).
+    """
+    return job_summary(await get_job_or_404(db, job_id))
+
+
+@router.get("/jobs/{job_id}/results", response_model=JobResultsResponse)
+async def get_job_results(
+    job_id: int,
+    after: Optional[int] = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Renvoie les résultats déjà calculés d'une tâche, y compris pendant son traitement.
+    
+    - **after**: (Optionnel) Curseur renvoyé par la page précédente (`next_after`)
+    - **limit**: Nombre maximum de résultats à renvoyer (1 à 1000)
+    """
+    await get_job_or_404(db, job_id)
+    limit = max(1, min(limit, 1000))
+    rows = await db.run_sync(JobRepository.get_results, job_id, after=after, limit=limit)
+    results = [
+        {
+            "position": row.position,
+            "text_id": row.text_id,
+            "text": row.text,
+            "polarity": row.polarity,
+            "subjectivity": row.subjectivity,
+            "sentiment": row.sentiment,
+            "model": row.model
+        }
+        for row in rows
+    ]
+    next_after = rows[-1].position if len(rows) == limit else None
+    return {"results": results, "next_after": next_after}
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Annule une tâche en attente ou en cours. Les résultats déjà calculés sont conservés.
+    """
+    await get_job_or_404(db, job_id)
+    if not await db.run_sync(JobRepository.cancel, job_id):
+        raise HTTPException(status_code=409, detail="La tâche est déjà terminée")
+    db.expire_all()
+    return job_summary(await get_job_or_404(db, job_id))
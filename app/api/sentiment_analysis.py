@@ -1,22 +1,110 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse, FileResponse
+from starlette.background import BackgroundTask
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Literal
+from datetime import datetime
+import json
+import os
+import re
+import tempfile
+import threading
+import uuid
 
-from app.models.database import get_db
+from app.config import Config
+from app.models.database import get_async_db, get_async_session_factory, get_session_factory
 from app.models.schemas import (
-    TextDataCreate, TextDataResponse,
+    TextDataResponse, TextDataPage,
     SentimentRequest, SentimentResponse,
-    BatchSentimentRequest, BatchSentimentResponse
+    BatchSentimentRequest, BatchSentimentResponse, ChartData,
+    SentimentStatsResponse
+)
+from app.services.repositories import AsyncTextDataRepository, AsyncSentimentAnalysisRepository, encode_cursor
+from app.services.persistence import (
+    write_behind, persist_results_async, analyze_with_stored_results_async, QueueFullError
 )
-from app.services.repositories import TextDataRepository, SentimentAnalysisRepository
 from app.services.sentiment_analyzer import SentimentAnalyzer
+from app.services.streaming import (
+    StreamingAnalysis, NDJSON_CONTENT_TYPES, iter_ndjson_texts, iter_list_texts, spool_body, iter_file_chunks
+)
+from app.services.ingestion import FileIngestor, CONTENT_TYPE_FORMATS
+from app.services.charts import chart_renderer
+from app.services.chart_data import compute_chart_data
+from app.services.metrics import registry, stats_collector
 
 router = APIRouter()
-sentiment_analyzer = SentimentAnalyzer()
+
+# Service d'analyse partagé, créé au démarrage de l'application ou à la première requête
+# (et non à l'import du module : chargement des lexiques et des stopwords)
+_sentiment_analyzer = None
+_sentiment_analyzer_lock = threading.Lock()
+
+
+def get_sentiment_analyzer():
+    """Renvoie le service d'analyse partagé, créé à la première utilisation"""
+    global _sentiment_analyzer
+    if _sentiment_analyzer is None:
+        with _sentiment_analyzer_lock:
+            if _sentiment_analyzer is None:
+                _sentiment_analyzer = SentimentAnalyzer()
+    return _sentiment_analyzer
+
+
+def close_sentiment_analyzer():
+    """Libère les ressources du service d'analyse s'il a été créé"""
+    global _sentiment_analyzer
+    with _sentiment_analyzer_lock:
+        if _sentiment_analyzer is not None:
+            _sentiment_analyzer.close()
+            _sentiment_analyzer = None
+
+
+def _cache_stats():
+    """Compteurs du cache pour /metrics, sans créer le service d'analyse"""
+    analyzer = _sentiment_analyzer
+    return analyzer.cache_stats() if analyzer is not None else None
+
+
+def _openai_stats():
+    """État du contrôle d'admission OpenAI pour /metrics, sans créer le service d'analyse"""
+    analyzer = _sentiment_analyzer
+    return analyzer.openai_stats() if analyzer is not None else None
+
+
+registry.register_collector(stats_collector("sentiment_openai", _openai_stats, {
+    "circuit_state": ("gauge", "État du disjoncteur OpenAI (0 : fermé, 1 : ouvert, 2 : semi-ouvert)"),
+    "circuit_opened": ("counter", "Ouvertures du disjoncteur OpenAI"),
+    "consecutive_failures": ("gauge", "Échecs consécutifs des appels OpenAI"),
+    "admitted": ("counter", "Tentatives d'appel OpenAI admises"),
+    "rejected_circuit": ("counter", "Appels OpenAI refusés, disjoncteur ouvert"),
+    "rejected_rate": ("counter", "Appels OpenAI refusés, limite de débit au-delà du délai"),
+    "retries": ("counter", "Nouvelles tentatives d'appel OpenAI"),
+    "retry_budget_exhausted": ("counter", "Nouvelles tentatives OpenAI refusées, budget épuisé"),
+    "failures": ("counter", "Tentatives OpenAI échouées (délai dépassé, 429, 5xx, connexion)")
+}))
+registry.register_collector(stats_collector("sentiment_cache", _cache_stats, {
+    "hits": ("counter", "Résultats trouvés dans le cache mémoire"),
+    "persistent_hits": ("counter", "Résultats trouvés dans le cache persistant"),
+    "misses": ("counter", "Résultats absents du cache"),
+    "evictions": ("counter", "Entrées évincées du cache mémoire"),
+    "persistent_evictions": ("counter", "Entrées expirées ou évincées du cache persistant"),
+    "size": ("gauge", "Entrées du cache mémoire"),
+    "max_size": ("gauge", "Capacité du cache mémoire")
+}))
+
+# Répertoire des fichiers de résultats produits par /analyze/file
+OUTPUT_DIR = os.path.join(Config.DATA_DIR, "outputs")
+OUTPUT_NAME = re.compile(r"^[0-9a-f]{32}\.(csv|jsonl)$")
 
 
 @router.post("/analyze", response_model=SentimentResponse)
-def analyze_sentiment(request: SentimentRequest, use_openai: bool = False, db: Session = Depends(get_db)):
+async def analyze_sentiment(
+    request: SentimentRequest,
+    use_openai: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Analyse le sentiment d'un texte fourni.
     
@@ -25,11 +113,30 @@ def analyze_sentiment(request: SentimentRequest, use_openai: bool = False, db: S
     
     Renvoie les résultats de l'analyse de sentiment incluant la polarité et la subjectivité.
     """
-    # Analyser le sentiment
-    sentiment_result = sentiment_analyzer.analyze_sentiment(request.text, use_openai=use_openai)
+    sentiment_analyzer = get_sentiment_analyzer()
     
-    # Enregistrer le texte dans la base de données
-    text_data = TextDataRepository.create(db, TextDataCreate(text=request.text))
+    # Analyse déjà enregistrée pour ce texte, sinon analyse hors de la boucle d'événements
+    sentiment_result = (await analyze_with_stored_results_async(
+        db, sentiment_analyzer, [request.text], use_openai=use_openai
+    ))[0]
+    
+    # Enregistrer le texte et son analyse, de manière différée si la file est active
+    if write_behind.running:
+        try:
+            # submit peut attendre une place dans la file pleine : exécuté dans un thread
+            await run_in_threadpool(
+                write_behind.submit, request.text, sentiment_result, model_version=sentiment_analyzer.model_version
+            )
+        except QueueFullError:
+            raise HTTPException(
+                status_code=503,
+                detail="File d'écriture saturée, réessayez plus tard",
+                headers={"Retry-After": "1"}
+            )
+    else:
+        await persist_results_async(
+            db, [request.text], [sentiment_result], model_version=sentiment_analyzer.model_version
+        )
     
     # Créer la réponse
     response = SentimentResponse(
@@ -44,24 +151,32 @@ def analyze_sentiment(request: SentimentRequest, use_openai: bool = False, db: S
 
 
 @router.post("/analyze/batch", response_model=BatchSentimentResponse)
-def analyze_sentiment_batch(request: BatchSentimentRequest, use_openai: bool = False, db: Session = Depends(get_db)):
+async def analyze_sentiment_batch(
+    request: BatchSentimentRequest,
+    use_openai: bool = False,
+    charts: Literal["png", "json", "none"] = "png",
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Analyse le sentiment d'un lot de textes.
     
     - **texts**: Liste de textes à analyser
     - **use_openai**: (Optionnel) Utiliser l'API OpenAI pour l'analyse (défaut: False)
+    - **charts**: (Optionnel) `png` : URLs des images (défaut) ; `json` : données des graphiques
+      à dessiner côté client (`chart_data`) ; `none` : aucune visualisation
     
     Renvoie les résultats de l'analyse pour chaque texte et des visualisations.
     """
-    # Analyser les sentiments
+    sentiment_analyzer = get_sentiment_analyzer()
+    
+    # Analyses déjà enregistrées, puis analyse des autres textes hors de la boucle d'événements
+    # (appels OpenAI en parallèle le cas échéant)
     sentiment_results = []
+    raw_results = await analyze_with_stored_results_async(
+        db, sentiment_analyzer, request.texts, use_openai=use_openai
+    )
     
-    for text in request.texts:
-        sentiment_result = sentiment_analyzer.analyze_sentiment(text, use_openai=use_openai)
-        
-        # Enregistrer le texte dans la base de données
-        text_data = TextDataRepository.create(db, TextDataCreate(text=text))
-        
+    for text, sentiment_result in zip(request.texts, raw_results):
         # Créer la réponse pour ce texte
         result = SentimentResponse(
             text=text,
@@ -73,27 +188,338 @@ def analyze_sentiment_batch(request: BatchSentimentRequest, use_openai: bool = F
         
         sentiment_results.append(result)
     
-    # Créer des visualisations
-    visualization_urls = sentiment_analyzer.create_sentiment_visualization([text for text in request.texts])
+    # Enregistrer les textes et leurs analyses en une seule transaction
+    await persist_results_async(db, request.texts, raw_results, model_version=sentiment_analyzer.model_version)
+    
+    # Créer des visualisations à partir des résultats déjà calculés
+    visualization_urls = None
+    chart_data = None
+    if charts == "png":
+        # Rendu des images en arrière-plan
+        visualization_urls = sentiment_analyzer.create_sentiment_visualization(
+            request.texts,
+            results=raw_results
+        )
+    elif charts == "json":
+        chart_data = await run_in_threadpool(
+            compute_chart_data, raw_results, bins=Config.CHART_DATA_BINS, max_points=Config.CHART_DATA_MAX_POINTS
+        )
     
     # Créer la réponse complète
     response = BatchSentimentResponse(
         results=sentiment_results,
-        visualization_urls=visualization_urls
+        visualization_urls=visualization_urls,
+        chart_data=chart_data
     )
     
     return response
 
 
+@router.post("/analyze/chart-data", response_model=ChartData)
+async def analyze_chart_data(
+    request: BatchSentimentRequest,
+    use_openai: bool = False,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Analyse un lot de textes et renvoie uniquement les données de ses graphiques.
+    
+    - **texts**: Liste de textes à analyser
+    - **use_openai**: (Optionnel) Utiliser l'API OpenAI pour l'analyse (défaut: False)
+    
+    Renvoie les histogrammes de polarité et de subjectivité, le nuage de points
+    (échantillonné au-delà de CHART_DATA_MAX_POINTS textes) et le nombre de textes par sentiment.
+    """
+    sentiment_analyzer = get_sentiment_analyzer()
+    
+    raw_results = await analyze_with_stored_results_async(
+        db, sentiment_analyzer, request.texts, use_openai=use_openai
+    )
+    await persist_results_async(db, request.texts, raw_results, model_version=sentiment_analyzer.model_version)
+    return await run_in_threadpool(
+        compute_chart_data, raw_results, bins=Config.CHART_DATA_BINS, max_points=Config.CHART_DATA_MAX_POINTS
+    )
+
+
+@router.post("/analyze/stream")
+async def analyze_sentiment_stream(
+    request: Request,
+    use_openai: bool = False,
+    chunk_size: Optional[int] = None,
+    session_factory=Depends(get_session_factory)
+):
+    """
+    Analyse un lot de textes en flux et renvoie une ligne NDJSON par résultat.
+    
+    - Corps JSON : `{"texts": [...]}` ou une liste de textes
+    - Corps NDJSON (`Content-Type: application/x-ndjson`) : un texte par ligne, sous forme
+      de chaîne JSON ou d'objet `{"text": ...}`, copié sur disque à sa réception puis lu
+      ligne par ligne
+    - **use_openai**: (Optionnel) Utiliser l'API OpenAI pour l'analyse (défaut: False)
+    - **chunk_size**: (Optionnel) Nombre de textes analysés et enregistrés par fragment
+    
+    Chaque ligne contient `index`, `text`, `polarity`, `subjectivity`, `sentiment` et `model`,
+    ou `index` et `error` pour une entrée invalide. Aucune visualisation n'est générée.
+    """
+    sentiment_analyzer = get_sentiment_analyzer()
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    background = None
+    if content_type in NDJSON_CONTENT_TYPES:
+        # Le corps est entièrement reçu avant le début de la réponse (voir spool_body)
+        spool_path = await spool_body(request.stream())
+        items = iter_ndjson_texts(iter_file_chunks(spool_path))
+        background = BackgroundTask(os.remove, spool_path)
+    else:
+        try:
+            body = await request.json()
+            if isinstance(body, list):
+                body = {"texts": body}
+            texts = BatchSentimentRequest.model_validate(body).texts
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Corps JSON invalide")
+        items = iter_list_texts(texts)
+    
+    stream = StreamingAnalysis(
+        sentiment_analyzer,
+        session_factory,
+        writer=write_behind,
+        chunk_size=chunk_size or Config.STREAM_CHUNK_SIZE,
+        use_openai=use_openai
+    )
+    return StreamingResponse(stream.run(items), media_type="application/x-ndjson", background=background)
+
+
+@router.post("/analyze/file")
+async def analyze_file(
+    request: Request,
+    format: Optional[str] = None,
+    text_field: str = "text",
+    use_openai: bool = False,
+    chunk_size: Optional[int] = None,
+    session_factory=Depends(get_session_factory)
+):
+    """
+    Analyse un fichier CSV ou JSONL envoyé tel quel dans le corps de la requête.
+    
+    - **format**: (Optionnel) `csv` ou `jsonl` ; par défaut déduit du `Content-Type`
+      (`text/csv`, `application/x-ndjson`)
+    - **text_field**: Colonne CSV ou clé JSON contenant le texte (défaut: text)
+    - **use_openai**: (Optionnel) Utiliser l'API OpenAI pour l'analyse (défaut: False)
+    - **chunk_size**: (Optionnel) Nombre de lignes analysées et enregistrées par fragment
+    
+    Le corps est copié sur disque au fil de sa réception, puis analysé ligne par ligne.
+    Renvoie les statistiques (lignes, débit) et l'URL du fichier de résultats.
+    """
+    sentiment_analyzer = get_sentiment_analyzer()
+    
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    file_format = format or CONTENT_TYPE_FORMATS.get(content_type)
+    if file_format not in ("csv", "jsonl"):
+        raise HTTPException(status_code=415, detail="Format attendu: csv ou jsonl")
+    
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    output_name = f"{uuid.uuid4().hex}.{file_format}"
+    output_path = os.path.join(OUTPUT_DIR, output_name)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_path = os.path.join(tmp_dir, f"input.{file_format}")
+        with open(input_path, "wb") as upload:
+            async for chunk in request.stream():
+                upload.write(chunk)
+        
+        ingestor = FileIngestor(
+            sentiment_analyzer,
+            session_factory,
+            chunk_size=chunk_size or Config.INGEST_CHUNK_SIZE,
+            use_openai=use_openai,
+            source=request.headers.get("x-source"),
+            text_field=text_field
+        )
+        try:
+            stats = await run_in_threadpool(ingestor.run_file, input_path, output_path, file_format)
+        except (ValueError, UnicodeDecodeError) as e:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    stats["output_url"] = f"{Config.API_PREFIX}/analyze/file/{output_name}"
+    return stats
+
+
+@router.get("/analyze/file/{name}")
+def get_analysis_file(name: str):
+    """
+    Télécharge un fichier de résultats produit par /analyze/file.
+    """
+    path = os.path.join(OUTPUT_DIR, name)
+    if not OUTPUT_NAME.match(name) or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Fichier introuvable")
+    media_type = "text/csv" if name.endswith(".csv") else "application/x-ndjson"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
+@router.get("/charts/stats")
+def get_chart_stats():
+    """
+    Renvoie les compteurs du rendu des graphiques (rendus en cours, produits, réutilisés, supprimés).
+    """
+    return chart_renderer.stats()
+
+
+@router.get("/charts/{filename}")
+def get_chart(filename: str):
+    """
+    Renvoie une image produite pour /analyze/batch, en attendant la fin de son rendu
+    si nécessaire.
+    """
+    path = chart_renderer.get_path(filename)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Graphique introuvable")
+    return FileResponse(path, media_type="image/png")
+
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """
+    Renvoie les compteurs du cache des résultats d'analyse (succès, échecs, évictions).
+    """
+    sentiment_analyzer = get_sentiment_analyzer()
+    
+    stats = sentiment_analyzer.cache_stats()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Le cache est désactivé")
+    return stats
+
+
+@router.get("/openai/stats")
+def get_openai_stats():
+    """
+    Renvoie l'état du disjoncteur OpenAI et les compteurs du contrôle d'admission
+    (appels admis, refusés, nouvelles tentatives).
+    """
+    sentiment_analyzer = get_sentiment_analyzer()
+    
+    stats = sentiment_analyzer.openai_stats()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Le client OpenAI n'a pas encore été utilisé")
+    return stats
+
+
+@router.post("/cache/invalidate")
+def invalidate_cache():
+    """
+    Invalide le cache après une modification des lexiques français ou du modèle OpenAI.
+    
+    Renvoie le nombre d'entrées persistantes supprimées.
+    """
+    sentiment_analyzer = get_sentiment_analyzer()
+    
+    deleted = sentiment_analyzer.invalidate_cache()
+    return {"deleted": deleted}
+
+
+@router.get("/persistence/stats")
+def get_persistence_stats():
+    """
+    Renvoie les métriques de la file d'écriture différée (profondeur, latence des vidages).
+    """
+    return write_behind.stats()
+
+
+async def _texts_page(db, response, skip, limit, cursor):
+    """Page de textes et curseur de la page suivante (aussi placé dans l'en-tête X-Next-Cursor)"""
+    if cursor is None and skip:
+        texts = await AsyncTextDataRepository.get_all(db, skip=skip, limit=limit)
+        next_cursor = encode_cursor(texts[-1].id) if len(texts) == limit else None
+    else:
+        try:
+            texts, next_cursor = await AsyncTextDataRepository.get_page(db, cursor=cursor, limit=limit)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return texts, next_cursor
+
+
 @router.get("/texts", response_model=List[TextDataResponse])
-def get_texts(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_texts(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Récupère tous les textes stockés dans la base de données.
     
-    - **skip**: Nombre d'entrées à sauter (pagination)
+    - **cursor**: (Optionnel) Curseur de la page suivante, renvoyé dans l'en-tête `X-Next-Cursor`
+    - **skip**: Nombre d'entrées à sauter (pagination par décalage, lente sur les grandes tables ;
+      ignoré si `cursor` est fourni)
     - **limit**: Nombre maximum d'entrées à renvoyer (pagination)
     
-    Renvoie une liste de textes avec leurs métadonnées.
+    Renvoie une liste de textes avec leurs métadonnées, par ordre d'ID. L'en-tête
+    `X-Next-Cursor` est absent sur la dernière page. Voir `/texts/page` pour recevoir
+    le curseur dans le corps de la réponse.
     """
-    texts = TextDataRepository.get_all(db, skip=skip, limit=limit)
+    texts, _ = await _texts_page(db, response, skip, limit, cursor)
     return texts
+
+
+@router.get("/texts/page", response_model=TextDataPage)
+async def get_texts_page(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Comme `/texts`, mais renvoie un objet : les textes (`texts`) et le curseur de la
+    page suivante (`next_cursor`, None sur la dernière page).
+    """
+    texts, next_cursor = await _texts_page(db, response, skip, limit, cursor)
+    return {"texts": texts, "next_cursor": next_cursor}
+
+
+@router.get("/texts/export")
+async def export_texts(session_factory=Depends(get_async_session_factory)):
+    """
+    Exporte tous les textes stockés, une ligne NDJSON par texte, par ordre d'ID.
+    
+    La table est parcourue par lots (pagination par clé) sans être chargée en mémoire.
+    """
+    async def rows():
+        async with session_factory() as db:
+            async for row in AsyncTextDataRepository.iter_all(db, batch_size=Config.EXPORT_BATCH_SIZE):
+                row = dict(row)
+                for field in ("created_at", "last_seen_at"):
+                    if row[field] is not None:
+                        row[field] = row[field].isoformat()
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+@router.get("/stats", response_model=SentimentStatsResponse)
+async def get_stats(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    source: Optional[str] = None,
+    buckets: int = 20,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Statistiques des analyses enregistrées, calculées par la base de données.
+    
+    - **start**, **end**: (Optionnel) Période d'analyse [start, end[ (ISO 8601, UTC)
+    - **source**: (Optionnel) Source des textes
+    - **buckets**: Nombre d'intervalles de l'histogramme de polarité (1 à 200)
+    
+    Renvoie le nombre d'analyses par sentiment, l'histogramme de polarité, les moyennes,
+    les extrêmes et les percentiles de polarité.
+    """
+    if not 1 <= buckets <= 200:
+        raise HTTPException(status_code=422, detail="buckets doit être compris entre 1 et 200")
+    return await AsyncSentimentAnalysisRepository.get_stats(db, start=start, end=end, source=source, buckets=buckets)
@@ -13,17 +13,111 @@ class Config:
     
     # Configuration de la base de données
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./sentiment_analysis.db")
+    # Base des routes asynchrones (vide : DATABASE_URL avec le pilote asynchrone correspondant,
+    # aiosqlite pour SQLite et asyncpg pour PostgreSQL)
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", "")
+    # Profil du moteur : auto (sqlite ou server selon l'URL), basic, sqlite ou server
+    DATABASE_PROFILE = os.getenv("DATABASE_PROFILE", "auto")
+    # Profil sqlite
+    SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))  # En secondes
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # En octets
+    # Profil server (PostgreSQL, etc.)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # En secondes
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # En secondes
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
     
     # Configuration de l'API OpenAI
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     USE_OPENAI = os.getenv("USE_OPENAI", "false").lower() == "true"
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")  # Vide : URL par défaut de l'API OpenAI
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "30"))  # Délai par appel, en secondes
+    OPENAI_MAX_CONCURRENCY = int(os.getenv("OPENAI_MAX_CONCURRENCY", "8"))
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+    # Mode groupé : plusieurs textes analysés par appel, dans la limite d'un budget de tokens
+    OPENAI_PACKED = os.getenv("OPENAI_PACKED", "false").lower() == "true"
+    OPENAI_PACK_TOKEN_BUDGET = int(os.getenv("OPENAI_PACK_TOKEN_BUDGET", "2000"))
+    OPENAI_PACK_MAX_TEXTS = int(os.getenv("OPENAI_PACK_MAX_TEXTS", "20"))
+    OPENAI_PACK_MAX_RETRIES = int(os.getenv("OPENAI_PACK_MAX_RETRIES", "2"))
+    # Contrôle d'admission : délai total par requête (attente de débit et tentatives comprises)
+    OPENAI_DEADLINE = float(os.getenv("OPENAI_DEADLINE", "30"))  # En secondes
+    OPENAI_RATE_LIMIT_RPS = float(os.getenv("OPENAI_RATE_LIMIT_RPS", "0"))  # Requêtes par seconde (0 : illimité)
+    OPENAI_RATE_LIMIT_TPM = float(os.getenv("OPENAI_RATE_LIMIT_TPM", "0"))  # Tokens par minute (0 : illimité)
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "2"))  # Après un délai dépassé, un 429 ou un 5xx
+    OPENAI_RETRY_BACKOFF = float(os.getenv("OPENAI_RETRY_BACKOFF", "0.5"))  # Attente de base, doublée à chaque tentative
+    OPENAI_RETRY_BUDGET_RATIO = float(os.getenv("OPENAI_RETRY_BUDGET_RATIO", "0.2"))  # Tentatives par requête, en moyenne
+    OPENAI_BREAKER_FAILURES = int(os.getenv("OPENAI_BREAKER_FAILURES", "5"))  # Échecs consécutifs avant ouverture
+    OPENAI_BREAKER_COOLDOWN = float(os.getenv("OPENAI_BREAKER_COOLDOWN", "30"))  # En secondes avant la requête de test
+    
+    # Moteur anglais de l'analyse locale : "textblob" (PatternAnalyzer) ou "lexicon" (lexique précompilé)
+    LOCAL_ENGINE = os.getenv("LOCAL_ENGINE", "textblob")
+    
+    # Configuration du moteur parallèle (analyse locale des grands lots)
+    PARALLEL_WORKERS = int(os.getenv("PARALLEL_WORKERS", str(os.cpu_count() or 1)))  # 0 ou 1 : désactivé
+    PARALLEL_BATCH_THRESHOLD = int(os.getenv("PARALLEL_BATCH_THRESHOLD", "2000"))  # Taille de lot minimale
+    PARALLEL_CHUNK_SIZE = int(os.getenv("PARALLEL_CHUNK_SIZE", "500"))
+    
+    # Configuration du cache des résultats d'analyse
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_SIZE = int(os.getenv("CACHE_MAX_SIZE", "10000"))
+    CACHE_TTL = float(os.getenv("CACHE_TTL", "3600"))  # En secondes
+    CACHE_PERSISTENT = os.getenv("CACHE_PERSISTENT", "true").lower() == "true"
+    CACHE_PERSISTENT_TTL = float(os.getenv("CACHE_PERSISTENT_TTL", "604800"))  # En secondes (0 : sans expiration)
+    CACHE_PERSISTENT_MAX_SIZE = int(os.getenv("CACHE_PERSISTENT_MAX_SIZE", "1000000"))  # 0 : sans limite
+    
+    # Configuration de l'écriture différée en base de données
+    WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"
+    WRITE_BEHIND_MAX_QUEUE = int(os.getenv("WRITE_BEHIND_MAX_QUEUE", "10000"))
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.5"))  # En secondes
+    WRITE_BEHIND_PUT_TIMEOUT = float(os.getenv("WRITE_BEHIND_PUT_TIMEOUT", "1.0"))  # En secondes
+    WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "3"))  # Après une erreur passagère
+    WRITE_BEHIND_RETRY_BACKOFF = float(os.getenv("WRITE_BEHIND_RETRY_BACKOFF", "0.2"))  # En secondes, doublée à chaque tentative
+    WRITE_BEHIND_SPILL_PATH = os.getenv("WRITE_BEHIND_SPILL_PATH", "")  # Fichier JSONL des lots en échec (vide : désactivé)
+    
+    # Configuration de l'analyse en flux (/analyze/stream)
+    STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "50"))  # Textes analysés et enregistrés par fragment
+    
+    # Configuration de l'analyse de fichiers CSV/JSONL (/analyze/file et ingest.py)
+    INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))  # Lignes analysées et enregistrées par fragment
+    
+    # Configuration des tâches d'analyse asynchrones (/jobs)
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # 0 : tâches non traitées par ce processus
+    JOB_CHUNK_SIZE = int(os.getenv("JOB_CHUNK_SIZE", "1000"))  # Textes analysés et validés par transaction
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2.0"))  # En secondes
+    
+    # Configuration du rendu des graphiques (hors de la requête, images nommées par empreinte)
+    CHARTS_DIR = os.getenv("CHARTS_DIR", "app/static/images")
+    CHART_WORKERS = int(os.getenv("CHART_WORKERS", "2"))
+    CHART_TTL = float(os.getenv("CHART_TTL", "86400"))  # En secondes depuis la dernière utilisation
+    CHART_MAX_FILES = int(os.getenv("CHART_MAX_FILES", "400"))  # Quatre images par lot
+    CHART_WAIT_TIMEOUT = float(os.getenv("CHART_WAIT_TIMEOUT", "30"))  # Attente maximale d'un rendu, en secondes
+    
+    # Configuration des données de graphiques JSON (?charts=json, /analyze/chart-data)
+    CHART_DATA_BINS = int(os.getenv("CHART_DATA_BINS", "20"))
+    CHART_DATA_MAX_POINTS = int(os.getenv("CHART_DATA_MAX_POINTS", "1000"))  # Au-delà : nuage échantillonné
+    
+    # Configuration de l'export des textes (/texts/export)
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))  # Lignes lues par requête
+    
+    # Métriques (/metrics, format Prometheus) et profilage échantillonné des requêtes
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # Durées des étapes
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # Part des requêtes profilées (0 : aucune)
+    PROFILE_LOG = os.getenv("PROFILE_LOG", "")  # Fichier JSONL des profils (vide : journal de l'application)
     
     # Configuration de l'API
     API_PREFIX = "/api"
     
     # Répertoire de données
     DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+    
+    # Ressources NLTK : répertoire des données fournies avec l'application, consulté en
+    # premier, et mode de vérification au démarrage (offline, strict ou download)
+    NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", os.path.join(DATA_DIR, "nltk_data"))
+    NLTK_MODE = os.getenv("NLTK_MODE", "offline")
 
 
 class DevelopmentConfig(Config):
@@ -35,6 +129,7 @@ class TestingConfig(Config):
     """Configuration pour l'environnement de test"""
     TESTING = True
     DATABASE_URL = "sqlite:///./test_sentiment_analysis.db"
+    DATABASE_PROFILE = "basic"
 
 
 class ProductionConfig(Config):
@@ -1,14 +1,19 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import uvicorn
 import os
+import time
 
-from app.api import sentiment_analysis
-from app.models.database import init_db
+from app.api import sentiment_analysis, jobs
+from app.models.database import init_db, dispose_async_engine
 from app.config import active_config
-from app.services.sentiment_analyzer import download_nltk_resources
+from app.services.sentiment_analyzer import ensure_nltk_resources
+from app.services.persistence import write_behind
+from app.services.jobs import job_manager
+from app.services.charts import chart_renderer
+from app.services.metrics import registry, start_profile, finish_profile, HTTP_REQUEST_SECONDS, CONTENT_TYPE
 
 # Initialiser l'application FastAPI
 app = FastAPI(
@@ -24,14 +29,79 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
 
 
+# Durée des requêtes et profilage échantillonné (PROFILE_SAMPLE_RATE)
+@app.middleware("http")
+async def measure_request(request: Request, call_next):
+    profile, token = start_profile()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        # Modèle de la route (et non le chemin) : nombre de séries borné
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "non_routee")
+        if active_config.METRICS_ENABLED:
+            HTTP_REQUEST_SECONDS.labels(request.method, route_path, status).observe(elapsed)
+        if profile is not None:
+            # Pour les réponses en flux, seules les étapes exécutées avant le premier octet sont comptées
+            finish_profile(
+                profile, token, method=request.method, route=route_path, status=status, seconds=elapsed
+            )
+    if profile is not None:
+        response.headers["Server-Timing"] = profile.server_timing()
+    return response
+
+
 # Event de démarrage
 @app.on_event("startup")
 async def startup_event():
     # Initialiser la base de données
     init_db()
     
-    # Télécharger les ressources NLTK nécessaires
-    download_nltk_resources()
+    # Vérifier une seule fois les ressources NLTK (sans réseau, sauf NLTK_MODE=download ;
+    # en mode strict, une ressource absente interrompt le démarrage)
+    ensure_nltk_resources()
+    
+    # Créer le service d'analyse avant la première requête
+    analyzer = sentiment_analysis.get_sentiment_analyzer()
+    
+    # Démarrer la file d'écriture différée si elle est activée
+    if active_config.WRITE_BEHIND_ENABLED:
+        write_behind.start()
+    
+    # Démarrer le traitement des tâches d'analyse (reprise des tâches interrompues comprise)
+    job_manager.start(analyzer)
+
+
+# Event d'arrêt
+@app.on_event("shutdown")
+def shutdown_event():
+    # Arrêter les tâches d'analyse après leur fragment en cours
+    job_manager.stop()
+    
+    # Vider la file d'écriture différée avant l'arrêt
+    write_behind.stop()
+    
+    # Terminer les rendus de graphiques en cours
+    chart_renderer.shutdown()
+    
+    # Fermer les connexions OpenAI
+    sentiment_analysis.close_sentiment_analyzer()
+
+
+# Fermer les connexions du moteur asynchrone (dans la boucle d'événements qui les a ouvertes)
+@app.on_event("shutdown")
+async def dispose_database():
+    await dispose_async_engine()
+
+
+# Métriques au format texte de Prometheus
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
 
 
 # Route racine (page d'accueil)
@@ -46,6 +116,11 @@ app.include_router(
     prefix=active_config.API_PREFIX,
     tags=["sentiment-analysis"]
 )
+app.include_router(
+    jobs.router,
+    prefix=active_config.API_PREFIX,
+    tags=["analysis-jobs"]
+)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,126 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Text, DateTime
+from sqlalchemy import (
+    create_engine, event, inspect, text, select, update, delete, func, bindparam,
+    Column, Integer, String, Float, Text, DateTime, Boolean, Index
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import datetime
+import hashlib
 
 from app.config import active_config
 
+# Profils de moteur disponibles (DATABASE_PROFILE)
+DATABASE_PROFILES = ("auto", "basic", "sqlite", "server")
+
+
+def resolve_profile(url, profile="auto"):
+    """Profil effectif : "auto" choisit "sqlite" pour une URL SQLite, "server" sinon"""
+    if profile not in DATABASE_PROFILES:
+        raise ValueError(f"Profil de base de données inconnu: {profile} (attendu: {', '.join(DATABASE_PROFILES)})")
+    if profile == "auto":
+        return "sqlite" if url.startswith("sqlite") else "server"
+    return profile
+
+
+def create_db_engine(url, profile="auto", config=active_config):
+    """
+    Crée le moteur SQLAlchemy selon le profil :
+    - "basic" : moteur par défaut (seul check_same_thread est désactivé pour SQLite) ;
+    - "sqlite" : journal WAL (lecteurs et rédacteur simultanés), synchronous, délai
+      d'attente des verrous et mmap_size, appliqués à chaque connexion ;
+    - "server" : pool de connexions dimensionné (taille, débordement, vérification
+      avant usage, recyclage) pour PostgreSQL ou un autre serveur de base de données.
+    """
+    profile = resolve_profile(url, profile)
+    is_sqlite = url.startswith("sqlite")
+    connect_args = {"check_same_thread": False} if is_sqlite else {}
+    
+    if profile == "server":
+        return create_engine(url, connect_args=connect_args, **_server_pool_options(url, config))
+    
+    if profile == "sqlite":
+        if not is_sqlite:
+            raise ValueError(f"Le profil sqlite requiert une URL SQLite: {url}")
+        connect_args["timeout"] = config.SQLITE_BUSY_TIMEOUT
+        db_engine = create_engine(url, connect_args=connect_args)
+        _set_sqlite_pragmas_on_connect(db_engine, config)
+        return db_engine
+    
+    return create_engine(url, connect_args=connect_args)
+
+
+def _server_pool_options(url, config):
+    options = {
+        "pool_pre_ping": config.DB_POOL_PRE_PING,
+        "pool_recycle": config.DB_POOL_RECYCLE,
+    }
+    if not (url.startswith("sqlite") and url.rstrip("/").endswith(("sqlite:", ":memory:"))):
+        # Le pool d'une base SQLite en mémoire n'est pas dimensionnable
+        options.update(
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_timeout=config.DB_POOL_TIMEOUT
+        )
+    return options
+
+
+def _set_sqlite_pragmas_on_connect(db_engine, config):
+    """Applique les pragmas du profil sqlite à chaque nouvelle connexion du moteur"""
+    @event.listens_for(db_engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={config.SQLITE_SYNCHRONOUS}")
+            cursor.execute(f"PRAGMA busy_timeout={int(config.SQLITE_BUSY_TIMEOUT * 1000)}")
+            cursor.execute(f"PRAGMA mmap_size={int(config.SQLITE_MMAP_SIZE)}")
+        finally:
+            cursor.close()
+
+
+# Pilotes asynchrones utilisés lorsque l'URL désigne un pilote synchrone
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url):
+    """
+    URL équivalente pour le moteur asynchrone : aiosqlite pour SQLite, asyncpg pour
+    PostgreSQL. Les pilotes déjà asynchrones (psycopg 3, aiosqlite...) sont conservés.
+    """
+    scheme, separator, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+def create_async_db_engine(url, profile="auto", config=active_config):
+    """
+    Crée un moteur SQLAlchemy asynchrone (AsyncEngine) avec les mêmes profils que
+    create_db_engine. Le pilote asynchrone (aiosqlite, asyncpg) doit être installé.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine
+    
+    url = to_async_url(url)
+    profile = resolve_profile(url, profile)
+    if profile == "server":
+        return create_async_engine(url, **_server_pool_options(url, config))
+    
+    if profile == "sqlite":
+        if not url.startswith("sqlite"):
+            raise ValueError(f"Le profil sqlite requiert une URL SQLite: {url}")
+        db_engine = create_async_engine(url, connect_args={"timeout": config.SQLITE_BUSY_TIMEOUT})
+        # Les événements de connexion sont portés par le moteur synchrone sous-jacent
+        _set_sqlite_pragmas_on_connect(db_engine.sync_engine, config)
+        return db_engine
+    
+    return create_async_engine(url)
+
+
 # Création de la base de données
-engine = create_engine(active_config.DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_db_engine(active_config.DATABASE_URL, active_config.DATABASE_PROFILE)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -17,8 +131,21 @@ class TextData(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     text = Column(Text, nullable=False)
-    source = Column(String(255), nullable=True)
+    source = Column(String(255), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # Empreinte du texte exact : un texte n'est stocké qu'une fois (index unique)
+    content_hash = Column(String(64), nullable=True)
+    occurrences = Column(Integer, nullable=True, default=1)  # Nombre de fois où le texte a été reçu
+    last_seen_at = Column(DateTime, nullable=True, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        Index("ux_text_data_content_hash", "content_hash", unique=True),
+    )
+
+
+def compute_content_hash(value):
+    """Empreinte SHA-256 (hexadécimale) du texte exact, sans normalisation"""
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
 
 
 class SentimentAnalysis(Base):
@@ -26,15 +153,168 @@ class SentimentAnalysis(Base):
     __tablename__ = "sentiment_analysis"
     
     id = Column(Integer, primary_key=True, index=True)
-    text_id = Column(Integer, nullable=False)
+    text_id = Column(Integer, nullable=False, index=True)
     polarity = Column(Float, nullable=False)  # Valeur entre -1 (négatif) et 1 (positif)
     subjectivity = Column(Float, nullable=False)  # Valeur entre 0 (objectif) et 1 (subjectif)
-    analyzed_at = Column(DateTime, default=datetime.datetime.utcnow)
+    sentiment = Column(String(20), nullable=True)  # positif, négatif ou neutre
+    model = Column(String(100), nullable=True)  # local ou nom du modèle OpenAI
+    model_version = Column(String(16), nullable=True)  # Version des lexiques et du modèle (réutilisation)
+    analyzed_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)
+
+
+class SentimentCacheEntry(Base):
+    """Modèle pour le cache persistant des résultats d'analyse"""
+    __tablename__ = "sentiment_cache"
+
+    key = Column(String(64), primary_key=True)  # Empreinte SHA-256 (texte normalisé, modèle, version)
+    model = Column(String(100), nullable=False)
+    version = Column(String(16), nullable=False, index=True)
+    result = Column(Text, nullable=False)  # Résultat sérialisé en JSON
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)  # Expiration et éviction
+
+
+class AnalysisJob(Base):
+    """Modèle pour les tâches d'analyse asynchrones (grands volumes)"""
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), nullable=False, default="pending", index=True)  # submitting, pending, running, completed, cancelled, failed
+    use_openai = Column(Boolean, nullable=False, default=False)
+    total = Column(Integer, nullable=False, default=0)  # Nombre de textes à analyser
+    processed = Column(Integer, nullable=False, default=0)  # Nombre de textes déjà analysés
+    positive = Column(Integer, nullable=False, default=0)
+    negative = Column(Integer, nullable=False, default=0)
+    neutral = Column(Integer, nullable=False, default=0)
+    openai = Column(Integer, nullable=False, default=0)  # Textes analysés par OpenAI (les autres : modèle local)
+    elapsed = Column(Float, nullable=False, default=0.0)  # Temps de traitement cumulé, en secondes
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class AnalysisJobItem(Base):
+    """Modèle pour les textes d'une tâche d'analyse et leur résultat"""
+    __tablename__ = "analysis_job_items"
+    __table_args__ = (Index("ix_analysis_job_items_job_position", "job_id", "position"),)
+    
+    id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)  # Ordre des résultats (curseur de pagination)
+    text_id = Column(Integer, nullable=False)
+    analysis_id = Column(Integer, nullable=True)  # SentimentAnalysis créée ; None tant que le texte n'est pas traité
 
 
 # Création des tables dans la base de données
 def init_db():
     Base.metadata.create_all(bind=engine)
+    upgrade_db()
+
+
+def upgrade_db(bind=None):
+    """
+    Ajoute aux tables existantes les colonnes nullables et les index apparus depuis
+    leur création (create_all ne modifie pas les tables déjà présentes). Les TextData
+    en double sont fusionnés avant la création de l'index unique sur leur empreinte.
+    """
+    bind = bind or engine
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    column_type = column.type.compile(dialect=bind.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            if table.name == TextData.__tablename__ and "ux_text_data_content_hash" not in existing_indexes:
+                # Les doublons doivent être fusionnés avant la création de l'index unique
+                deduplicate_text_data(conn)
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(conn)
+
+
+def deduplicate_text_data(conn, batch_size=1000):
+    """
+    Migration des TextData antérieurs à la déduplication : calcule l'empreinte des
+    lignes qui n'en ont pas, puis fusionne les textes identiques dans la ligne de plus
+    petit ID (occurrences additionnées, dernière date de réception conservée). Les
+    analyses et les éléments de tâches des doublons sont rattachés à la ligne conservée.
+    Renvoie le nombre de lignes supprimées.
+    """
+    table = TextData.__table__
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(table.c.id, table.c.text)
+            .where(table.c.content_hash.is_(None), table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(
+                content_hash=bindparam("row_hash"),
+                occurrences=func.coalesce(table.c.occurrences, 1),
+                last_seen_at=func.coalesce(table.c.last_seen_at, table.c.created_at)
+            ),
+            [{"row_id": row.id, "row_hash": compute_content_hash(row.text)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    groups = conn.execute(
+        select(
+            table.c.content_hash,
+            func.min(table.c.id).label("keep_id"),
+            func.sum(func.coalesce(table.c.occurrences, 1)).label("occurrences"),
+            func.max(func.coalesce(table.c.last_seen_at, table.c.created_at)).label("last_seen_at")
+        )
+        .group_by(table.c.content_hash)
+        .having(func.count() > 1)
+    ).all()
+    if not groups:
+        return 0
+
+    referencing_tables = [
+        referencing for referencing in (SentimentAnalysis.__table__, AnalysisJobItem.__table__)
+        if inspect(conn).has_table(referencing.name)
+    ]
+    removed = 0
+    for start in range(0, len(groups), batch_size):
+        params = [
+            {"group_hash": g.content_hash, "keep_id": g.keep_id, "total": g.occurrences, "seen": g.last_seen_at}
+            for g in groups[start:start + batch_size]
+        ]
+        duplicates = select(table.c.id).where(
+            table.c.content_hash == bindparam("group_hash"), table.c.id != bindparam("keep_id")
+        )
+        for referencing in referencing_tables:
+            conn.execute(
+                update(referencing)
+                .where(referencing.c.text_id.in_(duplicates))
+                .values(text_id=bindparam("keep_id")),
+                params
+            )
+        conn.execute(
+            update(table)
+            .where(table.c.id == bindparam("keep_id"))
+            .values(occurrences=bindparam("total"), last_seen_at=bindparam("seen")),
+            params
+        )
+        result = conn.execute(
+            delete(table).where(
+                table.c.content_hash == bindparam("group_hash"), table.c.id != bindparam("keep_id")
+            ),
+            params
+        )
+        removed += result.rowcount
+    return removed
 
 
 # Fonction pour obtenir une session de base de données
@@ -44,3 +324,45 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Fabrique de sessions pour les réponses en flux, qui ouvrent leurs propres sessions
+# pendant l'envoi de la réponse (après la fermeture des dépendances de la requête)
+def get_session_factory():
+    return SessionLocal
+
+
+# Moteur et sessions asynchrones, créés à la première utilisation : le pilote
+# asynchrone n'est requis que par les routes qui s'en servent
+_async_engine = None
+_async_session_factory = None
+
+
+def get_async_session_factory():
+    """Fabrique de sessions asynchrones (AsyncSession) sur ASYNC_DATABASE_URL"""
+    global _async_engine, _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        
+        _async_engine = create_async_db_engine(
+            active_config.ASYNC_DATABASE_URL or active_config.DATABASE_URL,
+            active_config.DATABASE_PROFILE
+        )
+        # expire_on_commit=False : les objets restent lisibles après la validation,
+        # sans rechargement implicite (impossible hors d'un await)
+        _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_session_factory
+
+
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    """Ferme les connexions du moteur asynchrone (arrêt de l'application)"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
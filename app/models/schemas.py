@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -18,6 +18,8 @@ class TextDataInDB(TextDataBase):
     """Schéma pour une donnée textuelle stockée dans la base de données"""
     id: int
     created_at: datetime
+    occurrences: Optional[int] = Field(None, description="Nombre de fois où ce texte a été reçu")
+    last_seen_at: Optional[datetime] = Field(None, description="Date de dernière réception du texte")
 
     class Config:
         from_attributes = True
@@ -28,6 +30,12 @@ class TextDataResponse(TextDataInDB):
     pass
 
 
+class TextDataPage(BaseModel):
+    """Schéma pour une page de textes stockés"""
+    texts: List[TextDataResponse]
+    next_cursor: Optional[str] = Field(None, description="Curseur de la page suivante (None : dernière page)")
+
+
 class SentimentAnalysisBase(BaseModel):
     """Schéma de base pour l'analyse de sentiments"""
     text_id: int = Field(..., description="ID du texte analysé")
@@ -37,7 +45,12 @@ class SentimentAnalysisBase(BaseModel):
 
 class SentimentAnalysisCreate(SentimentAnalysisBase):
     """Schéma pour la création d'une nouvelle analyse de sentiment"""
-    pass
+    # model_version n'est pas un attribut de Pydantic : espace de noms "model_" autorisé
+    model_config = ConfigDict(protected_namespaces=())
+
+    sentiment: Optional[str] = Field(None, description="Catégorie de sentiment (positif, négatif, neutre)")
+    model: Optional[str] = Field(None, description="Le modèle utilisé pour l'analyse")
+    model_version: Optional[str] = Field(None, description="Version des lexiques et du modèle utilisés")
 
 
 class SentimentAnalysisInDB(SentimentAnalysisBase):
@@ -73,10 +86,91 @@ class BatchSentimentRequest(BaseModel):
     texts: List[str] = Field(..., description="Liste des textes à analyser", min_items=1)
 
 
+class Histogram(BaseModel):
+    """Schéma pour un histogramme précalculé"""
+    edges: List[float] = Field(..., description="Bornes des intervalles (un élément de plus que counts)")
+    counts: List[int]
+
+
+class ScatterData(BaseModel):
+    """Schéma pour le nuage de points polarité vs subjectivité"""
+    sentiments: List[str] = Field(..., description="Sentiments, indexés par le troisième élément de chaque point")
+    points: List[List[float]] = Field(..., description="Points [polarité, subjectivité, indice du sentiment]")
+    sampled: bool = Field(..., description="Vrai si le nuage a été échantillonné")
+
+
+class ChartData(BaseModel):
+    """Schéma pour les données des graphiques d'un lot, à dessiner côté client"""
+    total: int
+    polarity: Histogram
+    subjectivity: Histogram
+    scatter: ScatterData
+    sentiment_counts: Dict[str, int]
+
+
 class BatchSentimentResponse(BaseModel):
     """Schéma pour la réponse d'une analyse de sentiment par lot"""
     results: List[SentimentResponse]
     visualization_urls: Optional[dict] = None
+    chart_data: Optional[ChartData] = None
+
+
+class JobCreateRequest(BaseModel):
+    """Schéma pour la création d'une tâche d'analyse asynchrone"""
+    texts: Optional[List[str]] = Field(
+        None, description="Textes à analyser ; si absent, les textes déjà stockés sont analysés", min_length=1
+    )
+    source: Optional[str] = Field(
+        None, description="Source enregistrée avec les textes fournis, ou filtre sur les textes stockés"
+    )
+    use_openai: bool = Field(False, description="Utiliser l'API OpenAI pour l'analyse")
+
+
+class JobResponse(BaseModel):
+    """Schéma pour l'état d'une tâche d'analyse asynchrone"""
+    id: int
+    status: str = Field(..., description="submitting, pending, running, completed, cancelled ou failed")
+    use_openai: bool
+    total: int
+    processed: int
+    progress: float = Field(..., description="Part des textes analysés (0 à 1)")
+    counts: dict = Field(..., description="Nombre de résultats par sentiment et par modèle")
+    throughput: float = Field(..., description="Textes analysés par seconde de traitement")
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class JobResult(SentimentResponse):
+    """Schéma pour un résultat d'une tâche d'analyse"""
+    position: int
+    text_id: int
+
+
+class JobResultsResponse(BaseModel):
+    """Schéma pour une page de résultats d'une tâche d'analyse"""
+    results: List[JobResult]
+    next_after: Optional[int] = Field(None, description="Curseur de la page suivante (None : dernière page)")
+
+
+class PolarityStats(BaseModel):
+    """Schéma pour les statistiques de polarité"""
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    percentiles: Optional[Dict[str, float]] = Field(
+        None, description="Percentiles p5, p25, p50, p75 et p95, estimés à 0.005 près"
+    )
+
+
+class SentimentStatsResponse(BaseModel):
+    """Schéma pour les statistiques agrégées des analyses enregistrées"""
+    total: int
+    sentiment_counts: Dict[str, int]
+    polarity: PolarityStats
+    subjectivity_mean: Optional[float] = None
+    histogram: Histogram = Field(..., description="Histogramme de polarité sur [-1, 1]")
 
 
 class ErrorResponse(BaseModel):
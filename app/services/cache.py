@@ -0,0 +1,325 @@
+from collections import OrderedDict
+import datetime
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models.database import SessionLocal, SentimentCacheEntry
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Nombre de clés par requête IN (limite de paramètres des anciennes versions de SQLite)
+KEY_CHUNK_SIZE = 500
+
+
+def normalize_text(text):
+    """
+    Normalise un texte pour le calcul de la clé de cache. Seuls les espaces de début
+    et de fin sont retirés : les espaces internes influencent la détection de
+    "ne fonctionne pas" et ne peuvent donc pas être fusionnés.
+    """
+    return text.strip() if text else ""
+
+
+def compute_cache_version(lexicons, openai_model, local_engine="textblob"):
+    """
+    Calcule une empreinte courte des lexiques du modèle local, de son moteur anglais
+    (textblob ou lexicon) et du modèle OpenAI configuré
+    """
+    digest = hashlib.sha256(openai_model.encode("utf-8"))
+    digest.update(b"\x1e")
+    digest.update(local_engine.encode("utf-8"))
+    digest.update(b"\x1e")
+    for lexicon in lexicons:
+        for entry in sorted(lexicon):
+            digest.update(entry.encode("utf-8"))
+            digest.update(b"\x1f")
+        digest.update(b"\x1e")
+    return digest.hexdigest()[:16]
+
+
+def make_cache_key(text, model, version):
+    """Construit la clé de cache à partir du texte normalisé, du modèle et de la version du cache"""
+    payload = "\x1f".join((version, model, normalize_text(text)))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Cache LRU en mémoire, borné en taille et avec expiration (TTL)"""
+
+    def __init__(self, max_size=10000, ttl=3600):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        """Renvoie la valeur associée à la clé, ou None si absente ou expirée"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if self.ttl and expires_at < time.monotonic():
+                del self._data[key]
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Ajoute une valeur en évinçant les entrées les moins récemment utilisées"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + (self.ttl or 0))
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class PersistentCache:
+    """
+    Cache persistant stocké dans la table sentiment_cache de la base de données.
+    Les lectures et écritures se font par lot (une requête IN et une transaction par
+    lot). Les entrées expirent après `ttl` secondes et la table est bornée à
+    `max_size` entrées, les plus anciennes étant supprimées en premier (0 : sans
+    limite). L'élagage a lieu au plus toutes les `prune_interval` secondes, lors
+    d'une écriture.
+    """
+
+    def __init__(self, session_factory=SessionLocal, ttl=7 * 24 * 3600, max_size=1000000, prune_interval=60.0):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_size = max_size
+        self.prune_interval = prune_interval
+        self._table_ready = False
+        self._last_prune = None
+        self._prune_lock = threading.Lock()
+        self.evictions = 0
+
+    def _ensure_table(self, db):
+        if not self._table_ready:
+            SentimentCacheEntry.__table__.create(bind=db.get_bind(), checkfirst=True)
+            self._table_ready = True
+
+    def _cutoff(self):
+        """Date d'écriture en deçà de laquelle une entrée est expirée (None : pas d'expiration)"""
+        if not self.ttl:
+            return None
+        return datetime.datetime.utcnow() - datetime.timedelta(seconds=self.ttl)
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """Renvoie {clé: résultat} des entrées présentes et non expirées parmi `keys`"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        db = self.session_factory()
+        try:
+            self._ensure_table(db)
+            cutoff = self._cutoff()
+            found = {}
+            for start in range(0, len(keys), KEY_CHUNK_SIZE):
+                query = select(SentimentCacheEntry.key, SentimentCacheEntry.result).where(
+                    SentimentCacheEntry.key.in_(keys[start:start + KEY_CHUNK_SIZE])
+                )
+                if cutoff is not None:
+                    query = query.where(SentimentCacheEntry.created_at >= cutoff)
+                found.update((key, json.loads(result)) for key, result in db.execute(query))
+            return found
+        except SQLAlchemyError as e:
+            logger.error(f"Erreur lors de la lecture du cache persistant: {e}")
+            return {}
+        finally:
+            db.close()
+
+    def set(self, key, value, model, version):
+        self.set_many([(key, value, model)], version)
+
+    def set_many(self, entries, version):
+        """Enregistre des entrées (clé, résultat, modèle) en une seule transaction"""
+        now = datetime.datetime.utcnow()
+        rows = {
+            key: {"key": key, "model": model, "version": version, "result": json.dumps(value), "created_at": now}
+            for key, value, model in entries
+        }
+        if not rows:
+            return
+        keys = list(rows)
+        db = self.session_factory()
+        try:
+            self._ensure_table(db)
+            # Remplacement des entrées existantes : suppression puis insertion groupée
+            for start in range(0, len(keys), KEY_CHUNK_SIZE):
+                db.execute(delete(SentimentCacheEntry).where(
+                    SentimentCacheEntry.key.in_(keys[start:start + KEY_CHUNK_SIZE])
+                ))
+            db.execute(insert(SentimentCacheEntry), list(rows.values()))
+            self._prune(db)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Erreur lors de l'écriture dans le cache persistant: {e}")
+        finally:
+            db.close()
+
+    def _prune(self, db):
+        """Supprime les entrées expirées puis les plus anciennes au-delà de max_size"""
+        with self._prune_lock:
+            now = time.monotonic()
+            if self._last_prune is not None and now - self._last_prune < self.prune_interval:
+                return
+            self._last_prune = now
+        removed = 0
+        cutoff = self._cutoff()
+        if cutoff is not None:
+            removed += db.execute(
+                delete(SentimentCacheEntry).where(SentimentCacheEntry.created_at < cutoff)
+            ).rowcount
+        if self.max_size:
+            excess = db.scalar(select(func.count()).select_from(SentimentCacheEntry)) - self.max_size
+            if excess > 0:
+                oldest = db.scalars(
+                    select(SentimentCacheEntry.key).order_by(SentimentCacheEntry.created_at).limit(excess)
+                ).all()
+                for start in range(0, len(oldest), KEY_CHUNK_SIZE):
+                    removed += db.execute(delete(SentimentCacheEntry).where(
+                        SentimentCacheEntry.key.in_(oldest[start:start + KEY_CHUNK_SIZE])
+                    )).rowcount
+        self.evictions += removed
+
+    def invalidate(self, keep_version=None):
+        """Supprime les entrées persistantes (sauf celles de la version indiquée) et renvoie leur nombre"""
+        db = self.session_factory()
+        try:
+            self._ensure_table(db)
+            query = db.query(SentimentCacheEntry)
+            if keep_version is not None:
+                query = query.filter(SentimentCacheEntry.version != keep_version)
+            deleted = query.delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except SQLAlchemyError as e:
+            db.rollback()
+            logger.error(f"Erreur lors de l'invalidation du cache persistant: {e}")
+            return 0
+        finally:
+            db.close()
+
+
+class SentimentCache:
+    """Cache à deux niveaux (LRU en mémoire puis base de données) des résultats d'analyse"""
+
+    def __init__(self, version, max_size=10000, ttl=3600, persistent=None):
+        self.version = version
+        self.memory = LRUCache(max_size=max_size, ttl=ttl)
+        self.persistent = persistent
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    def key(self, text, model):
+        return make_cache_key(text, model, self.version)
+
+    def get(self, text, model):
+        """Renvoie le résultat en cache pour ce texte et ce modèle, ou None"""
+        key = self.key(text, model)
+        result = self.memory.get(key)
+        if result is not None:
+            self.hits += 1
+            return dict(result)
+        if self.persistent is not None:
+            result = self.persistent.get(key)
+            if result is not None:
+                self.hits += 1
+                self.persistent_hits += 1
+                self.memory.set(key, result)
+                return dict(result)
+        self.misses += 1
+        return None
+
+    def get_many(self, texts, model):
+        """
+        Renvoie les résultats en cache pour ces textes (None pour les absents), dans
+        l'ordre des textes. Les textes absents du cache mémoire sont cherchés dans le
+        cache persistant en une seule requête.
+        """
+        keys = [self.key(text, model) for text in texts]
+        results = [self.memory.get(key) for key in keys]
+        missing = [key for key, result in zip(keys, results) if result is None]
+        found = self.persistent.get_many(missing) if self.persistent is not None and missing else {}
+        for i, key in enumerate(keys):
+            if results[i] is not None:
+                self.hits += 1
+                results[i] = dict(results[i])
+            elif key in found:
+                self.hits += 1
+                self.persistent_hits += 1
+                self.memory.set(key, found[key])
+                results[i] = dict(found[key])
+            else:
+                self.misses += 1
+        return results
+
+    def set(self, text, model, result):
+        self.set_many([(text, result)], model)
+
+    def set_many(self, items, model, persist=True):
+        """
+        Met en cache des couples (texte, résultat), en une transaction pour le cache
+        persistant. Avec persist=False, seul le cache mémoire est alimenté (résultats
+        déjà enregistrés en base).
+        """
+        entries = []
+        for text, result in items:
+            key = self.key(text, model)
+            self.memory.set(key, dict(result))
+            entries.append((key, result, model))
+        if self.persistent is not None and persist:
+            self.persistent.set_many(entries, self.version)
+
+    def invalidate(self, version=None):
+        """
+        Vide le cache. Si une nouvelle version est fournie, seules les entrées
+        persistantes des autres versions sont supprimées.
+        """
+        if version is not None:
+            self.version = version
+        self.memory.clear()
+        if self.persistent is not None:
+            return self.persistent.invalidate(keep_version=version)
+        return 0
+
+    def stats(self):
+        """Renvoie les compteurs du cache"""
+        return {
+            "hits": self.hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "evictions": self.memory.evictions,
+            "size": len(self.memory),
+            "max_size": self.memory.max_size,
+            "ttl": self.memory.ttl,
+            "persistent": self.persistent is not None,
+            "persistent_evictions": self.persistent.evictions if self.persistent is not None else 0,
+            "version": self.version
+        }
@@ -0,0 +1,56 @@
+import numpy as np
+
+# Ordre des sentiments dans les compteurs et les points du nuage
+SENTIMENTS = ("positif", "neutre", "négatif")
+
+
+def _histogram(values, bins, value_range):
+    """Histogramme sur un intervalle fixe (les valeurs hors intervalle sont ramenées aux bornes)"""
+    counts, edges = np.histogram(np.clip(values, *value_range), bins=bins, range=value_range)
+    return {"edges": np.round(edges, 4).tolist(), "counts": counts.tolist()}
+
+
+def compute_chart_data(results, bins=20, max_points=1000):
+    """
+    Calcule les données des graphiques d'un lot, à dessiner côté client : histogrammes
+    de polarité (-1 à 1) et de subjectivité (0 à 1), nuage de points polarité vs
+    subjectivité et nombre de textes par sentiment.
+
+    Au-delà de `max_points` textes, le nuage est échantillonné à pas régulier ; chaque
+    point est [polarité, subjectivité, indice du sentiment dans `sentiments`].
+    """
+    total = len(results)
+    polarity = np.fromiter((r['polarity'] for r in results), dtype=np.float64, count=total)
+    subjectivity = np.fromiter((r['subjectivity'] for r in results), dtype=np.float64, count=total)
+
+    # Sentiments inattendus (ex: renvoyés par OpenAI) ajoutés après les trois habituels
+    sentiments = list(SENTIMENTS)
+    index = {sentiment: i for i, sentiment in enumerate(sentiments)}
+    codes = np.empty(total, dtype=np.int64)
+    for i, r in enumerate(results):
+        code = index.get(r['sentiment'])
+        if code is None:
+            code = index[r['sentiment']] = len(sentiments)
+            sentiments.append(r['sentiment'])
+        codes[i] = code
+    counts = np.bincount(codes, minlength=len(sentiments))
+
+    if total > max_points:
+        sample = np.linspace(0, total - 1, max_points).astype(np.int64)
+    else:
+        sample = np.arange(total)
+    points = np.column_stack((
+        np.round(polarity[sample], 4), np.round(subjectivity[sample], 4), codes[sample]
+    ))
+
+    return {
+        "total": total,
+        "polarity": _histogram(polarity, bins, (-1.0, 1.0)),
+        "subjectivity": _histogram(subjectivity, bins, (0.0, 1.0)),
+        "scatter": {
+            "sentiments": sentiments,
+            "points": [[p, s, int(k)] for p, s, k in points.tolist()],
+            "sampled": total > max_points
+        },
+        "sentiment_counts": {sentiment: int(count) for sentiment, count in zip(sentiments, counts)}
+    }
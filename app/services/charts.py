@@ -0,0 +1,250 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import Config
+from app.services.metrics import registry, stats_collector, timed
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Graphiques produits pour chaque lot
+CHART_NAMES = ("polarity_distribution", "subjectivity_distribution", "polarity_vs_subjectivity", "sentiment_pie")
+SENTIMENT_COLORS = {'positif': 'green', 'neutre': 'blue', 'négatif': 'red'}
+
+# Version du rendu, incluse dans l'empreinte : à changer si l'apparence des graphiques change
+RENDER_VERSION = b"1"
+
+CHART_FILENAME = re.compile(r"^([0-9a-f]{32})_(" + "|".join(CHART_NAMES) + r")\.png$")
+
+
+def chart_key(results):
+    """Empreinte des scores d'un lot : des scores identiques donnent les mêmes images"""
+    digest = hashlib.sha256(RENDER_VERSION)
+    digest.update(array("d", (r['polarity'] for r in results)).tobytes())
+    digest.update(array("d", (r['subjectivity'] for r in results)).tobytes())
+    digest.update("\x1f".join(r['sentiment'] for r in results).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def render_charts(polarity, subjectivity, sentiments, paths):
+    """
+    Dessine les quatre graphiques avec l'API objet de matplotlib (backend Agg, sans
+    pyplot ni état global), ce qui permet le rendu simultané dans plusieurs threads.
+    Chaque image est écrite dans un fichier temporaire puis renommée.
+    """
+    # Import différé : matplotlib n'est chargé qu'au premier rendu
+    from matplotlib.figure import Figure
+
+    def save(fig, name):
+        tmp_path = f"{paths[name]}.{threading.get_ident()}.tmp"
+        fig.savefig(tmp_path, format="png")
+        os.replace(tmp_path, paths[name])
+
+    # 1. Distribution des polarités
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.hist(polarity, bins=20, color='skyblue', edgecolor='black')
+    ax.set_title('Distribution des polarités')
+    ax.set_xlabel('Polarité')
+    ax.set_ylabel('Fréquence')
+    ax.grid(True, alpha=0.3)
+    save(fig, 'polarity_distribution')
+
+    # 2. Distribution des subjectivités
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    ax.hist(subjectivity, bins=20, color='lightgreen', edgecolor='black')
+    ax.set_title('Distribution des subjectivités')
+    ax.set_xlabel('Subjectivité')
+    ax.set_ylabel('Fréquence')
+    ax.grid(True, alpha=0.3)
+    save(fig, 'subjectivity_distribution')
+
+    # 3. Graphique de dispersion polarité vs subjectivité
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    counts = {}
+    for sentiment in sentiments:
+        counts[sentiment] = counts.get(sentiment, 0) + 1
+    for sentiment in counts:
+        points = [(p, s) for p, s, label in zip(polarity, subjectivity, sentiments) if label == sentiment]
+        ax.scatter(
+            [p for p, _ in points],
+            [s for _, s in points],
+            c=SENTIMENT_COLORS.get(sentiment, 'gray'),
+            label=sentiment,
+            alpha=0.6
+        )
+    ax.set_title('Polarité vs Subjectivité')
+    ax.set_xlabel('Polarité')
+    ax.set_ylabel('Subjectivité')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    save(fig, 'polarity_vs_subjectivity')
+
+    # 4. Camembert des sentiments
+    labels = sorted(counts, key=counts.get, reverse=True)
+    fig = Figure(figsize=(8, 8))
+    ax = fig.subplots()
+    ax.pie(
+        [counts[label] for label in labels],
+        labels=labels,
+        autopct='%1.1f%%',
+        colors=[SENTIMENT_COLORS.get(label, 'gray') for label in labels],
+        startangle=90
+    )
+    ax.set_title('Répartition des sentiments')
+    save(fig, 'sentiment_pie')
+
+
+class ChartRenderer:
+    """
+    Rendu des graphiques hors de la requête. Les images sont nommées d'après
+    l'empreinte des scores : un lot déjà dessiné réutilise les fichiers existants.
+    Les URLs sont renvoyées immédiatement et le rendu a lieu dans un pool de threads ;
+    `get_path` attend la fin d'un rendu en cours. Les images sont supprimées après
+    `ttl` secondes sans utilisation, ou dès que le répertoire dépasse `max_files`.
+    """
+
+    def __init__(self, output_dir, url_prefix, workers=2, ttl=86400.0, max_files=400, wait_timeout=30.0):
+        self.output_dir = output_dir
+        self.url_prefix = url_prefix
+        self.workers = max(1, workers)
+        self.ttl = ttl
+        self.max_files = max_files
+        self.wait_timeout = wait_timeout
+        self._executor = None
+        self._pending = {}  # Empreinte -> rendu en cours
+        self._lock = threading.Lock()
+
+        # Métriques
+        self.rendered = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def paths(self, key):
+        return {name: os.path.join(self.output_dir, f"{key}_{name}.png") for name in CHART_NAMES}
+
+    def urls(self, key):
+        return {name: f"{self.url_prefix}/{key}_{name}.png" for name in CHART_NAMES}
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="chart-render")
+        return self._executor
+
+    def submit(self, results):
+        """Planifie le rendu des graphiques d'un lot et renvoie aussitôt leurs URLs"""
+        key = chart_key(results)
+        paths = self.paths(key)
+        with self._lock:
+            if key in self._pending:
+                self.reused += 1
+                return self.urls(key)
+            if all(os.path.exists(path) for path in paths.values()):
+                # Réutilisation : la date de modification sert de date de dernier usage
+                for path in paths.values():
+                    os.utime(path)
+                self.reused += 1
+                return self.urls(key)
+            os.makedirs(self.output_dir, exist_ok=True)
+            self._pending[key] = self._get_executor().submit(
+                self._render,
+                key,
+                [r['polarity'] for r in results],
+                [r['subjectivity'] for r in results],
+                [r['sentiment'] for r in results],
+                paths
+            )
+        return self.urls(key)
+
+    def _render(self, key, polarity, subjectivity, sentiments, paths):
+        try:
+            with timed("chart.render"):
+                render_charts(polarity, subjectivity, sentiments, paths)
+            self.rendered += 1
+        except Exception as e:
+            logger.error(f"Erreur lors du rendu des graphiques {key}: {e!r}")
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+        self.evict()
+
+    def get_path(self, filename):
+        """
+        Renvoie le chemin d'une image, en attendant la fin de son rendu s'il est en
+        cours (au plus `wait_timeout` secondes). Renvoie None si l'image n'existe pas.
+        """
+        match = CHART_FILENAME.match(filename)
+        if match is None:
+            return None
+        with self._lock:
+            future = self._pending.get(match.group(1))
+        if future is not None:
+            try:
+                future.result(timeout=self.wait_timeout)
+            except Exception:
+                return None
+        path = os.path.join(self.output_dir, filename)
+        return path if os.path.exists(path) else None
+
+    def evict(self):
+        """Supprime les images expirées, puis les plus anciennes au-delà de max_files"""
+        try:
+            entries = [entry for entry in os.scandir(self.output_dir) if CHART_FILENAME.match(entry.name)]
+        except FileNotFoundError:
+            return 0
+        entries = sorted(((entry.stat().st_mtime, entry.path) for entry in entries), reverse=True)
+        now = time.time()
+        with self._lock:
+            pending = set(self._pending)
+        removed = 0
+        for rank, (mtime, path) in enumerate(entries):
+            if rank < self.max_files and now - mtime <= self.ttl:
+                continue
+            if os.path.basename(path)[:32] in pending:
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        self.evicted += removed
+        return removed
+
+    def stats(self):
+        """Renvoie les compteurs du rendu des graphiques"""
+        with self._lock:
+            pending = len(self._pending)
+        return {"pending": pending, "rendered": self.rendered, "reused": self.reused, "evicted": self.evicted}
+
+    def shutdown(self):
+        """Attend la fin des rendus en cours et arrête le pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+# Rendu des graphiques partagé par l'application
+chart_renderer = ChartRenderer(
+    Config.CHARTS_DIR,
+    f"{Config.API_PREFIX}/charts",
+    workers=Config.CHART_WORKERS,
+    ttl=Config.CHART_TTL,
+    max_files=Config.CHART_MAX_FILES,
+    wait_timeout=Config.CHART_WAIT_TIMEOUT
+)
+
+registry.register_collector(stats_collector("sentiment_charts", chart_renderer.stats, {
+    "pending": ("gauge", "Rendus de graphiques en cours"),
+    "rendered": ("counter", "Lots de graphiques dessinés"),
+    "reused": ("counter", "Lots de graphiques réutilisés sans nouveau rendu"),
+    "evicted": ("counter", "Images de graphiques supprimées")
+}))
@@ -0,0 +1,111 @@
+from textblob import _text
+from textblob.en import sentiment as pattern_sentiment
+
+# Écart maximal toléré avec TextBlob (PatternAnalyzer) sur la polarité et la subjectivité.
+# Sur des tokens nettoyés par TextNormalizer, l'algorithme est reproduit à l'identique :
+# seuls des écarts d'arrondi flottant sont envisageables.
+TOLERANCE = 1e-9
+
+
+class EnglishLexiconScorer:
+    """
+    Polarité et subjectivité anglaises calculées directement à partir des tokens nettoyés.
+
+    Le lexique de TextBlob (en-sentiment.xml, adverbes en -ly compris) est chargé une
+    seule fois dans une table compacte mot -> (polarité, subjectivité, intensité,
+    modificateur). L'algorithme de PatternAnalyzer est ensuite appliqué sans
+    reconstruire de TextBlob ni re-tokeniser le texte : modificateurs ("very good"),
+    négations ("not good" = -0.5 x good) et émoticônes sans ponctuation.
+
+    Les tokens doivent provenir de TextNormalizer (minuscules, sans ponctuation ni
+    chiffres) : c'est ce qui rend la tokenisation de Pattern superflue.
+    """
+
+    def __init__(self, sentiment=pattern_sentiment):
+        if not dict.__len__(sentiment):
+            sentiment.load()
+        modifiers = tuple(sentiment.modifiers)
+        self.table = {}
+        for word, scores in dict.items(sentiment):
+            if None in scores:
+                polarity, subjectivity, intensity = scores[None]
+                is_modifier = any(pos in scores for pos in modifiers)
+                self.table[word] = (polarity, subjectivity, intensity, is_modifier)
+        self.negations = frozenset(sentiment.negations)
+        self.modifier = sentiment.modifier
+        self.punctuation = _text.PUNCTUATION
+        # Émoticônes (en minuscules) -> polarité, dans l'ordre de priorité de Pattern
+        self.emoticons = {}
+        for (_, polarity), emoticons in _text.EMOTICONS.items():
+            for emoticon in emoticons:
+                self.emoticons.setdefault(emoticon.lower(), polarity)
+
+    def _split_underscores(self, tokens):
+        """Sépare les "_" de début et de fin de token, comme le tokeniseur de Pattern"""
+        for token in tokens:
+            if token[0] != "_" and token[-1] != "_":
+                yield token
+                continue
+            stripped = token.lstrip("_")
+            for _ in range(len(token) - len(stripped)):
+                yield "_"
+            core = stripped.rstrip("_")
+            if core:
+                yield core
+            for _ in range(len(stripped) - len(core)):
+                yield "_"
+
+    def score(self, tokens):
+        """Renvoie (polarité, subjectivité) pour une liste de tokens nettoyés"""
+        table = self.table
+        negations = self.negations
+        assessments = []  # [polarité, subjectivité, intensité, négation]
+        m = None  # Modificateur précédent (adverbe)
+        n = None  # Négation précédente
+        for w in self._split_underscores(tokens):
+            entry = table.get(w)
+            if entry is not None:
+                p, s, i, is_modifier = entry
+                if m is None:
+                    # Mot connu sans modificateur ("good")
+                    assessments.append([p, s, i, 1])
+                else:
+                    # Mot connu précédé d'un modificateur ("really good")
+                    last = assessments[-1]
+                    last[0] = max(-1.0, min(p * last[2], +1.0))
+                    last[1] = max(-1.0, min(s * last[2], +1.0))
+                    last[2] = i
+                if n is not None:
+                    # Mot connu précédé d'une négation ("not really good")
+                    last = assessments[-1]
+                    last[2] = 1.0 / last[2]
+                    last[3] = -1
+                m = w if is_modifier else None
+                n = w if w in negations else None
+            else:
+                if w in negations:
+                    n = w
+                elif n and len(w.strip("'")) > 1:
+                    # Négation conservée seulement à travers les mots courts ("not a good")
+                    n = None
+                if n is not None and m is not None and self.modifier(m):
+                    # Négation précédée d'un modificateur ("really not good")
+                    assessments[-1][3] = -1
+                    n = None
+                elif m and len(w) > 2:
+                    m = None
+                if w.isalpha() is False and len(w) <= 5 and w not in self.punctuation:
+                    polarity = self.emoticons.get(w)
+                    if polarity is not None:
+                        assessments.append([polarity, 1.0, 1.0, 1])
+
+        if not assessments:
+            return 0.0, 0.0
+        # "not good" = légèrement négatif, "not bad" = légèrement positif
+        polarity = 0
+        subjectivity = 0
+        for p, s, _, negated in assessments:
+            polarity += p * -0.5 if negated < 0 else p
+            subjectivity += s
+        count = float(len(assessments))
+        return polarity / count, subjectivity / count
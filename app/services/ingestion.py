@@ -0,0 +1,166 @@
+import csv
+import json
+import logging
+import os
+import time
+
+from app.services.persistence import persist_results, analyze_with_stored_results
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Formats de fichier reconnus, par extension
+FILE_FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+# Formats de fichier reconnus, par type de contenu (téléversement)
+CONTENT_TYPE_FORMATS = {
+    "text/csv": "csv", "application/csv": "csv",
+    "application/x-ndjson": "jsonl", "application/ndjson": "jsonl",
+    "application/jsonl": "jsonl", "application/json-lines": "jsonl"
+}
+
+# Colonnes des résultats écrits dans le fichier de sortie
+OUTPUT_FIELDS = ["text", "polarity", "subjectivity", "sentiment", "model"]
+
+
+def detect_format(filename):
+    """Renvoie "csv" ou "jsonl" d'après l'extension du fichier ; lève ValueError sinon"""
+    file_format = FILE_FORMATS.get(os.path.splitext(filename)[1].lower())
+    if file_format is None:
+        raise ValueError(f"Format de fichier non pris en charge: {filename} (attendu: .csv, .jsonl)")
+    return file_format
+
+
+def iter_csv_texts(lines, text_field="text"):
+    """Lit un fichier CSV ligne par ligne et renvoie le texte de chaque ligne (None si vide)"""
+    reader = csv.DictReader(lines)
+    if reader.fieldnames is None:
+        return
+    if text_field not in reader.fieldnames:
+        raise ValueError(f"Colonne '{text_field}' absente du fichier CSV")
+    for row in reader:
+        yield row[text_field] or None
+
+
+def iter_jsonl_texts(lines, text_field="text"):
+    """Lit un fichier JSONL ligne par ligne et renvoie le texte de chaque ligne (None si invalide)"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            yield None
+            continue
+        if isinstance(item, dict):
+            item = item.get(text_field)
+        yield item if isinstance(item, str) and item else None
+
+
+class ResultWriter:
+    """Écrit les résultats dans le fichier de sortie, au même format que le fichier d'entrée"""
+
+    def __init__(self, output, file_format):
+        self.output = output
+        self.file_format = file_format
+        if file_format == "csv":
+            self._writer = csv.DictWriter(output, fieldnames=OUTPUT_FIELDS, extrasaction="ignore")
+            self._writer.writeheader()
+
+    def write(self, texts, results):
+        rows = [
+            {
+                "text": text,
+                "polarity": result["polarity"],
+                "subjectivity": result["subjectivity"],
+                "sentiment": result["sentiment"],
+                "model": result.get("model", "local")
+            }
+            for text, result in zip(texts, results)
+        ]
+        if self.file_format == "csv":
+            self._writer.writerows(rows)
+        else:
+            self.output.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        self.output.flush()
+
+
+class FileIngestor:
+    """
+    Analyse un fichier CSV ou JSONL ligne par ligne : les textes sont regroupés en
+    fragments de `chunk_size`, analysés, enregistrés par insertion groupée puis écrits
+    dans le fichier de sortie. La mémoire utilisée est bornée par la taille d'un
+    fragment, quelle que soit la taille du fichier.
+    """
+
+    def __init__(self, analyzer, session_factory, chunk_size=1000, use_openai=False, source=None,
+                 text_field="text"):
+        self.analyzer = analyzer
+        self.session_factory = session_factory
+        self.chunk_size = max(1, chunk_size)
+        self.use_openai = use_openai
+        self.source = source
+        self.text_field = text_field
+
+    def _flush(self, texts, writer):
+        db = self.session_factory()
+        try:
+            results = analyze_with_stored_results(db, self.analyzer, texts, use_openai=self.use_openai)
+            persist_results(
+                db, texts, results, source=self.source, model_version=getattr(self.analyzer, "model_version", None)
+            )
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        writer.write(texts, results)
+
+    def run(self, lines, output, file_format):
+        """
+        Analyse les lignes `lines` (fichier texte ouvert) et écrit les résultats dans
+        `output`. Renvoie les statistiques : lignes lues, analysées, ignorées (texte
+        vide ou ligne invalide), durée et débit en lignes par seconde.
+        """
+        if file_format == "csv":
+            items = iter_csv_texts(lines, self.text_field)
+        else:
+            items = iter_jsonl_texts(lines, self.text_field)
+        writer = ResultWriter(output, file_format)
+
+        start = time.perf_counter()
+        rows = 0
+        skipped = 0
+        texts = []
+        for text in items:
+            rows += 1
+            if text is None:
+                skipped += 1
+                continue
+            texts.append(text)
+            if len(texts) >= self.chunk_size:
+                self._flush(texts, writer)
+                texts = []
+        if texts:
+            self._flush(texts, writer)
+
+        seconds = time.perf_counter() - start
+        stats = {
+            "rows": rows,
+            "analyzed": rows - skipped,
+            "skipped": skipped,
+            "seconds": seconds,
+            "rows_per_second": rows / seconds if seconds else 0.0
+        }
+        logger.info(f"Fichier analysé: {rows} lignes en {seconds:.1f} s ({stats['rows_per_second']:.0f} lignes/s)")
+        return stats
+
+    def run_file(self, input_path, output_path, file_format=None):
+        """Analyse le fichier `input_path` et écrit les résultats dans `output_path`"""
+        file_format = file_format or detect_format(input_path)
+        # utf-8-sig : ignore l'éventuel BOM des exports CSV
+        with open(input_path, encoding="utf-8-sig", newline="") as lines, \
+                open(output_path, "w", encoding="utf-8", newline="") as output:
+            return self.run(lines, output, file_format)
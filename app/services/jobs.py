@@ -0,0 +1,325 @@
+import datetime
+import logging
+import threading
+import time
+
+from sqlalchemy import insert, select, update, func, literal
+
+from app.config import Config
+from app.models.database import SessionLocal, TextData, SentimentAnalysis, AnalysisJob, AnalysisJobItem
+from app.models.schemas import TextDataCreate, SentimentAnalysisCreate
+from app.services.repositories import TextDataRepository, SentimentAnalysisRepository
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# États d'une tâche
+SUBMITTING = "submitting"  # Textes fournis en cours d'enregistrement : la tâche n'est pas encore traitée
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+ACTIVE_STATUSES = (PENDING, RUNNING)
+
+# Nombre de textes fournis insérés et validés par transaction lors de la création d'une tâche
+SUBMIT_SLICE = 5000
+
+SENTIMENT_COUNTERS = {"positif": "positive", "négatif": "negative"}
+
+
+class JobRepository:
+    """Repository pour gérer les tâches d'analyse et leurs textes"""
+
+    @staticmethod
+    def create(db, texts=None, source=None, use_openai=False):
+        """
+        Crée une tâche. Les textes fournis sont enregistrés (TextData) par lots de
+        SUBMIT_SLICE, chacun validé dans sa propre transaction ; la tâche reste à
+        l'état "submitting", ignorée par les threads de travail, jusqu'au dernier lot.
+        Sans textes, la tâche porte sur les textes stockés (filtrés par source),
+        sélectionnés côté SQL sans les charger en mémoire.
+        """
+        if texts is None:
+            job = AnalysisJob(status=PENDING, use_openai=use_openai)
+            db.add(job)
+            db.flush()
+            stored = select(literal(job.id), TextData.id, TextData.id)
+            if source is not None:
+                stored = stored.where(TextData.source == source)
+            result = db.execute(
+                insert(AnalysisJobItem).from_select(["job_id", "position", "text_id"], stored)
+            )
+            job.total = result.rowcount
+            db.commit()
+            db.refresh(job)
+            return job
+
+        job = AnalysisJob(status=SUBMITTING, use_openai=use_openai, total=len(texts))
+        db.add(job)
+        db.commit()
+        job_id = job.id
+        try:
+            for start in range(0, len(texts), SUBMIT_SLICE):
+                chunk = texts[start:start + SUBMIT_SLICE]
+                text_ids = TextDataRepository.create_many(
+                    db, [TextDataCreate(text=text, source=source) for text in chunk], commit=False
+                )
+                db.execute(insert(AnalysisJobItem), [
+                    {"job_id": job_id, "position": start + i, "text_id": text_id}
+                    for i, text_id in enumerate(text_ids)
+                ])
+                db.commit()
+            db.execute(update(AnalysisJob).where(AnalysisJob.id == job_id).values(status=PENDING))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id)
+                .values(status=FAILED, error=repr(e), finished_at=datetime.datetime.utcnow())
+            )
+            db.commit()
+            raise
+        db.refresh(job)
+        return job
+
+    @staticmethod
+    def get_by_id(db, job_id):
+        """Récupère une tâche par son ID"""
+        return db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+
+    @staticmethod
+    def cancel(db, job_id):
+        """Annule une tâche en attente ou en cours ; renvoie False si elle est déjà terminée"""
+        result = db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, AnalysisJob.status.in_(ACTIVE_STATUSES))
+            .values(status=CANCELLED, finished_at=datetime.datetime.utcnow())
+        )
+        db.commit()
+        return result.rowcount > 0
+
+    @staticmethod
+    def get_results(db, job_id, after=None, limit=100):
+        """
+        Renvoie les résultats déjà calculés d'une tâche, par ordre de position, à partir
+        du curseur `after` (position du dernier résultat de la page précédente).
+        """
+        query = (
+            db.query(
+                AnalysisJobItem.position, AnalysisJobItem.text_id, TextData.text,
+                SentimentAnalysis.polarity, SentimentAnalysis.subjectivity,
+                SentimentAnalysis.sentiment, SentimentAnalysis.model
+            )
+            .join(SentimentAnalysis, SentimentAnalysis.id == AnalysisJobItem.analysis_id)
+            .join(TextData, TextData.id == AnalysisJobItem.text_id)
+            .filter(AnalysisJobItem.job_id == job_id)
+        )
+        if after is not None:
+            query = query.filter(AnalysisJobItem.position > after)
+        return query.order_by(AnalysisJobItem.position).limit(limit).all()
+
+    @staticmethod
+    def pending_items(db, job_id, limit):
+        """Renvoie (id, texte) des prochains textes non analysés d'une tâche"""
+        return (
+            db.query(AnalysisJobItem.id, AnalysisJobItem.text_id, TextData.text)
+            .join(TextData, TextData.id == AnalysisJobItem.text_id)
+            .filter(AnalysisJobItem.job_id == job_id, AnalysisJobItem.analysis_id.is_(None))
+            .order_by(AnalysisJobItem.position)
+            .limit(limit)
+            .all()
+        )
+
+
+def job_summary(job):
+    """Convertit une tâche en dictionnaire conforme à JobResponse"""
+    return {
+        "id": job.id,
+        "status": job.status,
+        "use_openai": job.use_openai,
+        "total": job.total,
+        "processed": job.processed,
+        "progress": job.processed / job.total if job.total else 1.0,
+        "counts": {
+            "positif": job.positive,
+            "négatif": job.negative,
+            "neutre": job.neutral,
+            "openai": job.openai,
+            "local": job.processed - job.openai
+        },
+        "throughput": job.processed / job.elapsed if job.elapsed else 0.0,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
+
+
+class JobManager:
+    """
+    Traite les tâches d'analyse en arrière-plan. Chaque thread de travail prend une
+    tâche active, puis analyse ses textes par fragments de `chunk_size` ; chaque
+    fragment (résultats, textes traités, compteurs) est validé dans une transaction,
+    si bien qu'après un redémarrage les tâches reprennent au premier texte non traité.
+    L'annulation est prise en compte entre deux fragments.
+
+    Les tâches ne sont réparties qu'entre les threads de ce processus : avec plusieurs
+    processus serveur, un seul doit avoir JOB_WORKERS > 0.
+    """
+
+    def __init__(self, session_factory=SessionLocal, workers=2, chunk_size=1000, poll_interval=2.0, analyzer=None):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.analyzer = analyzer
+        self._threads = []
+        self._active = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self, analyzer):
+        """Démarre les threads de travail avec le service d'analyse fourni"""
+        self.analyzer = analyzer
+        if self.running or self.workers <= 0:
+            return
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"analysis-job-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Traitement des tâches d'analyse démarré ({self.workers} threads)")
+
+    def stop(self, timeout=30.0):
+        """Arrête les threads après le fragment en cours ; les tâches reprendront au redémarrage"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """Signale qu'une nouvelle tâche est disponible"""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            job_id = self._claim()
+            if job_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            try:
+                self.process(job_id)
+            finally:
+                with self._lock:
+                    self._active.discard(job_id)
+
+    def _claim(self):
+        """Réserve la plus ancienne tâche active qui n'est pas déjà traitée par un autre thread"""
+        with self._lock:
+            db = self.session_factory()
+            try:
+                query = db.query(AnalysisJob.id).filter(AnalysisJob.status.in_(ACTIVE_STATUSES))
+                if self._active:
+                    query = query.filter(AnalysisJob.id.notin_(self._active))
+                row = query.order_by(AnalysisJob.id).first()
+            finally:
+                db.close()
+            if row is None:
+                return None
+            self._active.add(row.id)
+            return row.id
+
+    def process(self, job_id):
+        """Traite une tâche jusqu'à sa fin, son annulation ou l'arrêt du gestionnaire"""
+        db = self.session_factory()
+        try:
+            db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job_id, AnalysisJob.status.in_(ACTIVE_STATUSES))
+                .values(status=RUNNING, started_at=func.coalesce(AnalysisJob.started_at, datetime.datetime.utcnow()))
+            )
+            db.commit()
+            while not self._stop.is_set():
+                job = JobRepository.get_by_id(db, job_id)
+                if job is None or job.status != RUNNING:
+                    return
+                if not self._process_chunk(db, job):
+                    db.execute(
+                        update(AnalysisJob)
+                        .where(AnalysisJob.id == job_id, AnalysisJob.status == RUNNING)
+                        .values(status=COMPLETED, finished_at=datetime.datetime.utcnow())
+                    )
+                    db.commit()
+                    logger.info(f"Tâche d'analyse {job_id} terminée")
+                    return
+                # Relire l'état (annulation éventuelle) au prochain tour
+                db.expire_all()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erreur lors du traitement de la tâche d'analyse {job_id}: {e!r}")
+            try:
+                db.execute(
+                    update(AnalysisJob)
+                    .where(AnalysisJob.id == job_id)
+                    .values(status=FAILED, error=repr(e), finished_at=datetime.datetime.utcnow())
+                )
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Impossible d'enregistrer l'échec de la tâche d'analyse {job_id}: {e!r}")
+        finally:
+            db.close()
+
+    def _process_chunk(self, db, job):
+        """Analyse et enregistre le prochain fragment ; renvoie False s'il ne reste rien à traiter"""
+        start = time.perf_counter()
+        items = JobRepository.pending_items(db, job.id, self.chunk_size)
+        if not items:
+            return False
+        results = self.analyzer.analyze_sentiment_batch([item.text for item in items], use_openai=job.use_openai)
+        analysis_ids = SentimentAnalysisRepository.create_many(db, [
+            SentimentAnalysisCreate(
+                text_id=item.text_id,
+                polarity=result["polarity"],
+                subjectivity=result["subjectivity"],
+                sentiment=result["sentiment"],
+                model=result.get("model", "local"),
+                model_version=getattr(self.analyzer, "model_version", None)
+            )
+            for item, result in zip(items, results)
+        ], commit=False)
+        db.execute(update(AnalysisJobItem), [
+            {"id": item.id, "analysis_id": analysis_id} for item, analysis_id in zip(items, analysis_ids)
+        ])
+
+        counters = {"positive": 0, "negative": 0, "neutral": 0, "openai": 0}
+        for result in results:
+            counters[SENTIMENT_COUNTERS.get(result["sentiment"], "neutral")] += 1
+            if result.get("model", "local") != "local":
+                counters["openai"] += 1
+        values = {name: getattr(AnalysisJob, name) + count for name, count in counters.items()}
+        values["processed"] = AnalysisJob.processed + len(items)
+        values["elapsed"] = AnalysisJob.elapsed + (time.perf_counter() - start)
+        db.execute(update(AnalysisJob).where(AnalysisJob.id == job.id).values(**values))
+        db.commit()
+        return True
+
+
+# Gestionnaire de tâches partagé, démarré au lancement de l'application
+job_manager = JobManager(
+    workers=Config.JOB_WORKERS,
+    chunk_size=Config.JOB_CHUNK_SIZE,
+    poll_interval=Config.JOB_POLL_INTERVAL
+)
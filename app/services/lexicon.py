@@ -0,0 +1,190 @@
+from collections import namedtuple
+
+import numpy as np
+
+# Résultat du comptage des mots du lexique dans un texte
+LexiconCounts = namedtuple("LexiconCounts", ["positives", "negatives", "has_negation"])
+
+
+class LexiconMatcher:
+    """
+    Lexiques français compilés en un trie de tokens.
+
+    Les entrées de plusieurs mots (ex: "ne fonctionne pas") sont reconnues en un seul
+    parcours des tokens, sans construire de phrases intermédiaires. Les comptes sont
+    identiques à ceux de l'ancienne implémentation de `analyze_sentiment_fr` :
+    - les entrées positives ne sont reconnues que si elles tiennent en un mot ;
+    - les entrées négatives de 1 à `max_phrase_len` mots sont reconnues à chaque
+      position, y compris lorsqu'elles se chevauchent.
+    """
+
+    def __init__(self, positives, negatives, negations, max_phrase_len=4):
+        self.max_phrase_len = max_phrase_len
+        # Premier token -> [positif, négatif, négation, sous-trie des phrases]
+        first = {}
+        for word in positives:
+            if " " not in word:
+                first.setdefault(word, [0, 0, False, None])[0] = 1
+        for entry in negatives:
+            tokens = entry.split()
+            if len(tokens) == 1:
+                first.setdefault(tokens[0], [0, 0, False, None])[1] = 1
+            elif 1 < len(tokens) <= max_phrase_len:
+                info = first.setdefault(tokens[0], [0, 0, False, None])
+                if info[3] is None:
+                    info[3] = {}
+                # Nœud du trie : token -> [fin de phrase négative, sous-trie]
+                children = info[3]
+                for depth, token in enumerate(tokens[1:], start=2):
+                    node = children.setdefault(token, [False, {}])
+                    if depth == len(tokens):
+                        node[0] = True
+                    children = node[1]
+        for word in negations:
+            first.setdefault(word, [0, 0, False, None])[2] = True
+        self._first = {word: tuple(info) for word, info in first.items()}
+
+    def count(self, words):
+        """Compte les mots positifs, négatifs (phrases comprises) et détecte les négations"""
+        first = self._first
+        max_len = self.max_phrase_len
+        n = len(words)
+        positives = negatives = 0
+        has_negation = False
+        for i, word in enumerate(words):
+            info = first.get(word)
+            if info is None:
+                continue
+            pos, neg, negation, children = info
+            positives += pos
+            negatives += neg
+            if negation:
+                has_negation = True
+            if children:
+                end = min(i + max_len, n)
+                j = i + 1
+                while j < end:
+                    node = children.get(words[j])
+                    if node is None:
+                        break
+                    if node[0]:
+                        negatives += 1
+                    children = node[1]
+                    j += 1
+        return LexiconCounts(positives, negatives, has_negation)
+
+    def score(self, words):
+        """Score français entre -1 et 1, les mots positifs étant inversés en présence d'une négation"""
+        return self.score_counts(self.count(words))
+
+    @staticmethod
+    def score_counts(counts):
+        """Score français calculé à partir des comptes renvoyés par `count`"""
+        positives, negatives, has_negation = counts
+        if has_negation and positives > 0:
+            # Convertir les mots positifs en négatifs s'ils sont niés
+            negatives += positives
+            positives = 0
+        if positives > 0 or negatives > 0:
+            return (positives - negatives) / (positives + negatives)
+        return 0
+
+
+class VectorizedLexiconScorer:
+    """
+    Score français d'un lot de textes calculé avec NumPy.
+
+    Les tokens sont convertis en identifiants entiers à l'aide d'un vocabulaire fixe
+    construit à partir des lexiques (0 : token inconnu). Les comptes par document
+    sont alors des sommes pondérées (np.bincount) et les phrases négatives sont
+    reconnues par comparaison de tableaux décalés. Les résultats sont identiques
+    à ceux de `LexiconMatcher`.
+    """
+
+    def __init__(self, positives, negatives, negations, max_phrase_len=4):
+        vocabulary = {}
+
+        def token_id(token):
+            return vocabulary.setdefault(token, len(vocabulary) + 1)
+
+        single_positives = [token_id(w) for w in positives if " " not in w]
+        single_negatives = []
+        phrases = []
+        for entry in negatives:
+            ids = [token_id(token) for token in entry.split()]
+            if len(ids) == 1:
+                single_negatives.append(ids[0])
+            elif len(ids) <= max_phrase_len:
+                phrases.append(np.array(ids, dtype=np.int32))
+        negation_ids = [token_id(w) for w in negations]
+
+        size = len(vocabulary) + 1
+        self.vocabulary = vocabulary
+        self.phrases = phrases
+        self.is_positive = np.zeros(size, dtype=np.int64)
+        self.is_positive[single_positives] = 1
+        self.is_negative = np.zeros(size, dtype=np.int64)
+        self.is_negative[single_negatives] = 1
+        self.is_negation = np.zeros(size, dtype=np.int64)
+        self.is_negation[negation_ids] = 1
+
+    def encode(self, token_lists):
+        """Renvoie les identifiants de tous les tokens du lot et l'indice de leur document"""
+        get = self.vocabulary.get
+        ids = np.fromiter(
+            (get(token, 0) for tokens in token_lists for token in tokens),
+            dtype=np.int32
+        )
+        lengths = np.fromiter((len(tokens) for tokens in token_lists), dtype=np.int64, count=len(token_lists))
+        doc_index = np.repeat(np.arange(len(token_lists), dtype=np.int64), lengths)
+        return ids, doc_index
+
+    def count_batch(self, token_lists):
+        """Renvoie les tableaux (positifs, négatifs, présence de négation) par document"""
+        n_docs = len(token_lists)
+        ids, doc_index = self.encode(token_lists)
+        positives = np.bincount(doc_index, weights=self.is_positive[ids], minlength=n_docs).astype(np.int64)
+        negatives = np.bincount(doc_index, weights=self.is_negative[ids], minlength=n_docs).astype(np.int64)
+        negations = np.bincount(doc_index, weights=self.is_negation[ids], minlength=n_docs)
+
+        n_tokens = len(ids)
+        for phrase in self.phrases:
+            length = len(phrase)
+            if n_tokens < length:
+                continue
+            starts = n_tokens - length + 1
+            match = ids[:starts] == phrase[0]
+            for k in range(1, length):
+                match &= ids[k:starts + k] == phrase[k]
+            # La phrase ne doit pas chevaucher deux documents
+            match &= doc_index[:starts] == doc_index[length - 1:]
+            negatives += np.bincount(doc_index[:starts][match], minlength=n_docs)
+
+        return positives, negatives, negations > 0
+
+    def score_batch(self, token_lists):
+        """Renvoie les scores français (entre -1 et 1) et la présence de négation par document"""
+        positives, negatives, has_negation = self.count_batch(token_lists)
+        # Convertir les mots positifs en négatifs s'ils sont niés
+        negated = has_negation & (positives > 0)
+        negatives = np.where(negated, negatives + positives, negatives)
+        positives = np.where(negated, 0, positives)
+        total = positives + negatives
+        scores = np.divide(
+            (positives - negatives).astype(np.float64), total,
+            out=np.zeros(len(token_lists), dtype=np.float64), where=total > 0
+        )
+        return scores, has_negation
+
+
+def combine_local_scores(polarity_en, polarity_fr, has_negation, explicit_negative):
+    """
+    Applique à un lot les règles de combinaison de l'analyse locale : négation forcée
+    à -0.5, sinon (anglais + 3 x français) / 4. Renvoie les polarités et les sentiments.
+    """
+    polarity_en = np.asarray(polarity_en, dtype=np.float64)
+    polarity_fr = np.asarray(polarity_fr, dtype=np.float64)
+    forced = np.asarray(explicit_negative, dtype=bool) | (np.asarray(has_negation, dtype=bool) & (polarity_fr <= 0))
+    polarity = np.where(forced, -0.5, (polarity_en + 3 * polarity_fr) / 4)
+    sentiments = np.select([polarity > 0.05, polarity < -0.03], ["positif", "négatif"], "neutre")
+    return polarity, sentiments
@@ -0,0 +1,351 @@
+import bisect
+import contextvars
+import functools
+import json
+import logging
+import math
+import random
+import threading
+import time
+
+from app.config import Config
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Type de contenu du format texte de Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Bornes des histogrammes : durées en secondes, tailles de lot en nombre de textes
+DURATION_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _CounterValue:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name, labels):
+        return [f"{name}{_format_labels(labels)} {_format_value(self.value)}"]
+
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Dernier intervalle : au-delà de la plus grande borne
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        # bisect_left : une valeur égale à une borne est comptée dans cet intervalle (le="borne")
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts = list(self.counts)
+            total = self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels + [('le', _format_value(float(bound)))])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Renvoie la série correspondant aux valeurs d'étiquettes, créée à la première utilisation"""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} attend les étiquettes {self.labelnames}")
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self):
+        with self._lock:
+            self._children.clear()
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            children = sorted(self._children.items())
+        for key, child in children:
+            lines.extend(child.samples(self.name, list(zip(self.labelnames, key))))
+        return lines
+
+
+class Counter(_Metric):
+    """Compteur monotone, éventuellement étiqueté (`labels`)"""
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Histogram(_Metric):
+    """Histogramme à bornes fixes (intervalles cumulés, somme et nombre d'observations)"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(float(bound) for bound in buckets)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+
+class MetricsRegistry:
+    """
+    Ensemble des métriques exposées par /metrics. Les compteurs et histogrammes sont
+    mis à jour au fil des requêtes ; les collecteurs lisent à chaque collecte les
+    compteurs déjà tenus par les services (cache, écriture différée, graphiques).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """
+        Ajoute un collecteur : fonction sans argument renvoyant des échantillons
+        (nom, type, description, valeur), type "counter" ou "gauge".
+        """
+        self._collectors.append(collector)
+        return collector
+
+    def reset(self):
+        """Remet à zéro les compteurs et histogrammes (les collecteurs sont conservés)"""
+        for metric in self._metrics:
+            metric.clear()
+
+    def render(self):
+        """Renvoie toutes les métriques au format texte de Prometheus"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.error(f"Erreur lors de la collecte des métriques: {e!r}")
+                continue
+            for name, kind, documentation, value in samples:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def stats_collector(prefix, get_stats, fields):
+    """
+    Collecteur exposant les compteurs d'une méthode `stats()` existante. `fields`
+    associe une clé du dictionnaire renvoyé à (type, description) ; les compteurs
+    reçoivent le suffixe _total. `get_stats` peut renvoyer None (service inactif).
+    """
+    def collect():
+        stats = get_stats()
+        if stats is None:
+            return []
+        return [
+            (f"{prefix}_{key}_total" if kind == "counter" else f"{prefix}_{key}", kind, documentation, stats[key])
+            for key, (kind, documentation) in fields.items()
+        ]
+    return collect
+
+
+# Registre partagé par l'application
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "sentiment_stage_duration_seconds", "Durée de chaque étape du traitement, en secondes", ("stage",)
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "sentiment_http_request_duration_seconds", "Durée des requêtes HTTP, en secondes", ("method", "route", "status")
+)
+BATCH_SIZE = registry.histogram(
+    "sentiment_batch_size", "Nombre de textes par lot analysé ou enregistré", ("operation",), buckets=SIZE_BUCKETS
+)
+OPENAI_REQUESTS = registry.counter(
+    "sentiment_openai_requests_total", "Appels à l'API OpenAI, par résultat (success, invalid, error, rejected)", ("outcome",)
+)
+OPENAI_FALLBACKS = registry.counter(
+    "sentiment_openai_fallbacks_total", "Textes analysés avec le modèle local après l'échec d'OpenAI"
+)
+
+
+# Profil de la requête en cours (requêtes échantillonnées uniquement)
+_current_profile = contextvars.ContextVar("sentiment_profile", default=None)
+_profile_log_lock = threading.Lock()
+
+
+class StageProfile:
+    """Répartition par étape de la durée d'une requête échantillonnée"""
+
+    def __init__(self):
+        self.stages = {}
+        # Les étapes peuvent être enregistrées depuis plusieurs threads (pool de Starlette)
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            total, calls = self.stages.get(stage, (0.0, 0))
+            self.stages[stage] = (total + seconds, calls + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {stage: {"seconds": total, "calls": calls} for stage, (total, calls) in self.stages.items()}
+
+    def server_timing(self):
+        """Valeur de l'en-tête Server-Timing (durées cumulées en millisecondes)"""
+        with self._lock:
+            return ", ".join(f"{stage};dur={total * 1000:.3f}" for stage, (total, _) in self.stages.items())
+
+
+def record_stage(stage, seconds):
+    """Enregistre la durée d'une étape dans l'histogramme et dans le profil de la requête"""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add(stage, seconds)
+
+
+class StageTimer:
+    """Gestionnaire de contexte mesurant la durée d'une étape"""
+    __slots__ = ("stage", "_start")
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record_stage(self.stage, time.perf_counter() - self._start)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def timed(stage):
+    """
+    Mesure la durée du bloc `with timed("étape"):`. Sans effet si METRICS_ENABLED
+    est désactivé.
+    """
+    return StageTimer(stage) if Config.METRICS_ENABLED else _NOOP_TIMER
+
+
+def instrumented(stage):
+    """Décorateur : mesure la durée de chaque appel de la fonction comme étape `stage`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_profile(sample_rate=None):
+    """
+    Démarre le profilage de la requête courante si elle est tirée au sort
+    (PROFILE_SAMPLE_RATE : 0 désactive le profilage, 1 profile toutes les requêtes).
+    Renvoie (profil, jeton), ou (None, None) si la requête n'est pas profilée.
+    """
+    if sample_rate is None:
+        sample_rate = Config.PROFILE_SAMPLE_RATE
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        return None, None
+    profile = StageProfile()
+    return profile, _current_profile.set(profile)
+
+
+def finish_profile(profile, token, **context):
+    """
+    Termine le profilage et écrit la répartition par étape dans le journal, ainsi
+    que dans PROFILE_LOG (une ligne JSON par requête) s'il est configuré.
+    """
+    _current_profile.reset(token)
+    record = dict(context, stages=profile.as_dict())
+    line = json.dumps(record, ensure_ascii=False)
+    logger.info(f"Profil de requête: {line}")
+    if Config.PROFILE_LOG:
+        with _profile_log_lock, open(Config.PROFILE_LOG, "a", encoding="utf-8") as log:
+            log.write(line + "\n")
+    return record
@@ -0,0 +1,311 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from app.config import Config
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# États du disjoncteur (valeur exposée par /metrics)
+CIRCUIT_STATES = {"closed": 0, "open": 1, "half_open": 2}
+
+# Codes HTTP après lesquels une nouvelle tentative a un sens
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+class OpenAIUnavailableError(Exception):
+    """Levée sans appeler OpenAI : disjoncteur ouvert ou limite de débit au-delà du délai"""
+    pass
+
+
+class CircuitOpenError(OpenAIUnavailableError):
+    """Levée lorsque le disjoncteur est ouvert"""
+    pass
+
+
+class RateLimitedError(OpenAIUnavailableError):
+    """Levée lorsque l'attente imposée par la limite de débit dépasserait le délai de la requête"""
+    pass
+
+
+def is_retryable(error):
+    """Délai dépassé, erreur de connexion, 408/409/429 ou erreur 5xx : l'appel peut être retenté"""
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    # Erreurs de connexion et délais du client openai (APIConnectionError, APITimeoutError)
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after(error):
+    """Délai demandé par l'en-tête Retry-After d'une réponse d'erreur (None s'il est absent)"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Seau à jetons : `rate` jetons par seconde, au plus `capacity` en réserve. Un
+    débit nul désactive la limite.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.clock = clock
+        self.tokens = self.capacity
+        self._updated = clock()
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """Attente, en secondes, avant que `amount` jetons soient disponibles"""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        # Une demande plus grande que la réserve n'attend que la réserve pleine
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount):
+        """Retire `amount` jetons ; la réserve peut devenir négative (jetons réservés)"""
+        if self.enabled:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+
+
+class RetryBudget:
+    """
+    Budget de nouvelles tentatives : chaque requête dépose `ratio` jeton, chaque
+    nouvelle tentative en consomme un. Les tentatives restent ainsi bornées à une
+    part des requêtes, même quand toutes échouent. `reserve` jetons sont disponibles
+    d'emblée (et au plus).
+    """
+
+    def __init__(self, ratio, reserve=10):
+        self.ratio = ratio
+        self.capacity = max(reserve, 1)
+        self.balance = float(self.capacity)
+
+    def deposit(self):
+        self.balance = min(self.capacity, self.balance + self.ratio)
+
+    def withdraw(self):
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur : ouvert après `failure_threshold` échecs consécutifs, il refuse les
+    appels pendant `cooldown` secondes, puis laisse passer une seule requête de test
+    (état semi-ouvert). Le succès de ce test referme le disjoncteur, son échec le
+    rouvre pour un nouveau délai.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30.0, clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def allow(self):
+        """Indique si un appel peut partir ; en fin de délai, autorise la requête de test"""
+        if self.state == "closed":
+            return True
+        if self.state == "open" and self.clock() - self._opened_at >= self.cooldown:
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        """La requête de test autorisée n'est pas partie : une autre pourra la remplacer"""
+        if self.state == "half_open":
+            self._probing = False
+
+    def record_success(self):
+        if self.state != "closed":
+            logger.info("Disjoncteur OpenAI refermé")
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            self._open()
+
+    def _open(self):
+        if self.state != "open":
+            self.opened += 1
+            logger.warning(
+                f"Disjoncteur OpenAI ouvert après {self.failures} échecs, "
+                f"appels redirigés vers le modèle local pendant {self.cooldown:.0f} s"
+            )
+        self.state = "open"
+        self._opened_at = self.clock()
+        self._probing = False
+
+
+class AdmissionController:
+    """
+    Contrôle d'admission des appels OpenAI, partagé par tous les appels d'un client :
+    limite de débit (requêtes par seconde et tokens par minute), nouvelles tentatives
+    bornées par un budget et par le délai de la requête, et disjoncteur.
+
+    Un appel refusé (disjoncteur ouvert, attente de débit au-delà du délai) lève
+    OpenAIUnavailableError sans attendre : l'analyse bascule aussitôt vers le modèle
+    local au lieu de subir tout le délai d'OpenAI.
+    """
+
+    def __init__(self, rps=None, tpm=None, max_retries=None, backoff=None, retry_budget_ratio=None,
+                 failure_threshold=None, cooldown=None, clock=time.monotonic):
+        rps = rps if rps is not None else Config.OPENAI_RATE_LIMIT_RPS
+        tpm = tpm if tpm is not None else Config.OPENAI_RATE_LIMIT_TPM
+        self.requests = TokenBucket(rps, rps, clock)
+        self.tokens = TokenBucket(tpm / 60.0, tpm, clock)
+        self.max_retries = max_retries if max_retries is not None else Config.OPENAI_MAX_RETRIES
+        self.backoff = backoff if backoff is not None else Config.OPENAI_RETRY_BACKOFF
+        self.retry_budget = RetryBudget(
+            retry_budget_ratio if retry_budget_ratio is not None else Config.OPENAI_RETRY_BUDGET_RATIO
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold if failure_threshold is not None else Config.OPENAI_BREAKER_FAILURES,
+            cooldown if cooldown is not None else Config.OPENAI_BREAKER_COOLDOWN,
+            clock
+        )
+        self.clock = clock
+        # stats() est appelée depuis d'autres threads que celui de la boucle du client (/metrics)
+        self._lock = threading.Lock()
+
+        # Métriques
+        self.admitted = 0
+        self.rejected_circuit = 0
+        self.rejected_rate = 0
+        self.retries = 0
+        self.budget_exhausted = 0
+        self.failures = 0
+
+    async def _admit(self, cost, deadline):
+        """
+        Réserve une requête et `cost` tokens, en attendant au besoin dans la limite du délai.
+        Renvoie True si l'appel est la requête de test du disjoncteur semi-ouvert.
+        """
+        with self._lock:
+            if not self.breaker.allow():
+                self.rejected_circuit += 1
+                raise CircuitOpenError("Disjoncteur OpenAI ouvert")
+            probe = self.breaker.state == "half_open"
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(cost))
+            if self.clock() + wait >= deadline:
+                self.rejected_rate += 1
+                self.breaker.release_probe()
+                raise RateLimitedError(f"Limite de débit OpenAI : attente de {wait:.2f} s au-delà du délai")
+            self.requests.take(1)
+            self.tokens.take(cost)
+            self.admitted += 1
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except BaseException:
+                self._release_probe(probe)
+                raise
+        return probe
+
+    def _release_probe(self, probe):
+        """Libère la requête de test d'un appel abandonné sans résultat (annulation)"""
+        if probe:
+            with self._lock:
+                self.breaker.release_probe()
+
+    async def call(self, attempt, cost, deadline, timeout):
+        """
+        Exécute `attempt(timeout)` (une coroutine par tentative) avec contrôle
+        d'admission. `cost` est le nombre de tokens estimé de l'appel et `deadline`
+        l'instant (horloge `clock`) au-delà duquel la requête est abandonnée.
+        """
+        with self._lock:
+            self.retry_budget.deposit()
+        tries = 0
+        while True:
+            probe = await self._admit(cost, deadline)
+            remaining = deadline - self.clock()
+            try:
+                result = await attempt(min(timeout, remaining))
+            except Exception as e:
+                retryable = is_retryable(e)
+                with self._lock:
+                    if not retryable:
+                        # Réponse d'erreur définitive (requête invalide, clé refusée) : le service répond
+                        self.breaker.record_success()
+                        raise
+                    self.failures += 1
+                    self.breaker.record_failure()
+                    if tries >= self.max_retries or self.breaker.state == "open":
+                        raise
+                    if not self.retry_budget.withdraw():
+                        self.budget_exhausted += 1
+                        raise
+                # Attente exponentielle avec gigue complète, ou Retry-After si le serveur l'indique
+                delay = random.uniform(0, self.backoff * 2 ** tries)
+                requested = retry_after(e)
+                if requested is not None:
+                    delay = max(delay, requested)
+                if self.clock() + delay >= deadline:
+                    raise
+                tries += 1
+                with self._lock:
+                    self.retries += 1
+                logger.info(f"Nouvelle tentative OpenAI ({tries}/{self.max_retries}) dans {delay:.2f} s: {e!r}")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Annulation (CancelledError) ou interruption : sans issue connue, la requête de
+                # test est libérée, sinon le disjoncteur semi-ouvert refuserait tous les appels suivants
+                self._release_probe(probe)
+                raise
+            with self._lock:
+                self.breaker.record_success()
+            return result
+
+    def stats(self):
+        """Renvoie l'état du disjoncteur et les compteurs du contrôle d'admission"""
+        with self._lock:
+            return {
+                "circuit_state": CIRCUIT_STATES[self.breaker.state],
+                "circuit_opened": self.breaker.opened,
+                "consecutive_failures": self.breaker.failures,
+                "admitted": self.admitted,
+                "rejected_circuit": self.rejected_circuit,
+                "rejected_rate": self.rejected_rate,
+                "retries": self.retries,
+                "retry_budget_exhausted": self.budget_exhausted,
+                "failures": self.failures
+            }
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import threading
+
+from app.config import Config
+from app.services.openai_admission import AdmissionController
+from app.services.openai_packing import estimate_tokens
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class OpenAIClient:
+    """
+    Client OpenAI asynchrone de longue durée, avec un pool de connexions HTTP partagé.
+
+    Le client vit dans une boucle d'événements dédiée (thread d'arrière-plan) afin
+    d'être utilisable aussi bien depuis le code synchrone (threads de FastAPI) que
+    pour des appels concurrents. Le nombre d'appels simultanés est borné par
+    `max_concurrency` et chaque appel est soumis à un délai `timeout`.
+
+    Tous les appels passent par le même contrôle d'admission (`admission`) : limite
+    de débit, nouvelles tentatives dans la limite de `deadline` secondes par requête
+    et disjoncteur.
+    """
+
+    def __init__(self, api_key=None, base_url=None, timeout=None, max_concurrency=None, max_connections=None,
+                 deadline=None, admission=None):
+        self.api_key = api_key if api_key is not None else Config.OPENAI_API_KEY
+        self.base_url = base_url if base_url is not None else Config.OPENAI_BASE_URL
+        self.timeout = timeout if timeout is not None else Config.OPENAI_TIMEOUT
+        self.max_concurrency = max_concurrency or Config.OPENAI_MAX_CONCURRENCY
+        self.max_connections = max_connections or Config.OPENAI_MAX_CONNECTIONS
+        self.deadline = deadline if deadline is not None else Config.OPENAI_DEADLINE
+        self.admission = admission if admission is not None else AdmissionController()
+        self._loop = None
+        self._thread = None
+        self._client = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._loop is not None:
+            return
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name="openai-client", daemon=True)
+            thread.start()
+            self._thread = thread
+            self._loop = loop
+            asyncio.run_coroutine_threadsafe(self._create_client(), loop).result()
+
+    async def _create_client(self):
+        # Imports différés : openai et httpx ne sont chargés qu'au premier appel à OpenAI
+        import httpx
+        from openai import AsyncOpenAI
+        
+        # Le client HTTP et le sémaphore sont créés dans la boucle qui les utilisera
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            )
+        )
+        self._client = AsyncOpenAI(
+            api_key=self.api_key,
+            base_url=self.base_url or None,
+            timeout=self.timeout,
+            max_retries=0,
+            http_client=http_client
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def run(self, coro_factory):
+        """
+        Exécute dans la boucle du client la coroutine produite par `coro_factory()`
+        et attend son résultat (appel bloquant, à utiliser depuis du code synchrone).
+        """
+        self._ensure_started()
+        return asyncio.run_coroutine_threadsafe(coro_factory(), self._loop).result()
+
+    async def complete(self, messages, max_tokens=100):
+        """
+        Appelle l'API de complétion et renvoie le contenu du premier choix. Lève
+        OpenAIUnavailableError sans appeler l'API si le contrôle d'admission refuse
+        l'appel (disjoncteur ouvert, limite de débit).
+        """
+        cost = sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
+        deadline = self.admission.clock() + self.deadline
+        
+        async def attempt(timeout):
+            async with self._semaphore:
+                response = await asyncio.wait_for(
+                    self._client.chat.completions.create(
+                        model=Config.OPENAI_MODEL,
+                        messages=messages,
+                        temperature=0,
+                        max_tokens=max_tokens
+                    ),
+                    timeout=timeout
+                )
+            return response.choices[0].message.content
+        
+        return await self.admission.call(attempt, cost, deadline, self.timeout)
+
+    async def gather(self, coros):
+        """Exécute des coroutines en parallèle ; les erreurs sont renvoyées à leur position"""
+        return await asyncio.gather(*coros, return_exceptions=True)
+
+    def close(self):
+        """Ferme le client et arrête la boucle d'événements"""
+        if self._loop is None:
+            return
+        with self._lock:
+            loop, self._loop = self._loop, None
+            try:
+                asyncio.run_coroutine_threadsafe(self._client.close(), loop).result(timeout=5)
+            except Exception as e:
+                logger.error(f"Erreur lors de la fermeture du client OpenAI: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout=5)
+            loop.close()
+            self._client = None
+            self._thread = None
@@ -0,0 +1,110 @@
+import json
+import logging
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Prompt système pour l'analyse de plusieurs textes en un seul appel
+PACKED_SYSTEM_PROMPT = (
+    "Vous êtes un expert en analyse de sentiment. Vous recevez un tableau JSON d'objets "
+    "{'id': numéro, 'text': texte}. Répondez uniquement avec un tableau JSON contenant, pour "
+    "chaque texte, un objet avec 'id' (le numéro du texte), 'sentiment' (positif, négatif ou "
+    "neutre) et 'polarity' (valeur entre -1 et 1)."
+)
+
+# Coût approximatif, en tokens, du prompt système et de l'enveloppe JSON d'un lot
+PACK_OVERHEAD_TOKENS = 100
+# Coût approximatif, en tokens, d'un texte dans le tableau JSON ({"id": n, "text": "..."})
+PER_TEXT_OVERHEAD_TOKENS = 10
+# Tokens de réponse prévus par texte ({"id": n, "sentiment": "...", "polarity": ...})
+RESPONSE_TOKENS_PER_TEXT = 25
+
+
+def estimate_tokens(text):
+    """Estimation grossière du nombre de tokens d'un texte (environ 4 caractères par token)"""
+    return len(text) // 4 + 1
+
+
+def pack_texts(texts, token_budget, max_texts):
+    """
+    Regroupe les textes en lots successifs dont le coût estimé ne dépasse pas
+    `token_budget` tokens et qui contiennent au plus `max_texts` textes.
+    Renvoie la liste des lots sous forme de listes d'indices.
+    """
+    packs = []
+    current = []
+    current_tokens = PACK_OVERHEAD_TOKENS
+    for i, text in enumerate(texts):
+        cost = estimate_tokens(text) + PER_TEXT_OVERHEAD_TOKENS
+        if current and (current_tokens + cost > token_budget or len(current) >= max_texts):
+            packs.append(current)
+            current = []
+            current_tokens = PACK_OVERHEAD_TOKENS
+        # Un texte plus long que le budget forme un lot à lui seul
+        current.append(i)
+        current_tokens += cost
+    if current:
+        packs.append(current)
+    return packs
+
+
+def build_packed_messages(texts):
+    """
+    Construit le prompt d'analyse d'un lot de textes. Chaque texte est numéroté : la
+    réponse est associée aux textes par ce numéro et non par sa position.
+    """
+    return [
+        {"role": "system", "content": PACKED_SYSTEM_PROMPT},
+        {"role": "user", "content": json.dumps(
+            [{"id": i, "text": text} for i, text in enumerate(texts)], ensure_ascii=False
+        )}
+    ]
+
+
+def packed_max_tokens(count):
+    """Nombre maximal de tokens de réponse pour un lot de `count` textes"""
+    return 10 + RESPONSE_TOKENS_PER_TEXT * count
+
+
+def parse_packed_content(content, expected):
+    """
+    Décode la réponse d'un lot. Renvoie une liste de `expected` éléments contenant
+    l'objet JSON de chaque texte, associé par son numéro 'id', ou None pour les
+    textes sans réponse valide. Renvoie None si la réponse n'est pas un tableau JSON.
+    
+    Un objet sans numéro valide est ignoré, et un numéro présent plusieurs fois est
+    ambigu : les textes concernés sont considérés comme sans réponse (et renvoyés).
+    """
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        logger.error(f"Erreur lors du décodage de la réponse JSON du lot: {content}")
+        return None
+
+    # Certains modèles enveloppent le tableau dans un objet
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), None)
+    if not isinstance(data, list):
+        logger.error(f"Réponse du lot inattendue (tableau attendu): {content}")
+        return None
+
+    items = [None] * expected
+    duplicates = set()
+    for item in data:
+        if not isinstance(item, dict) or "polarity" not in item:
+            continue
+        index = item.get("id")
+        # bool est un sous-type d'int : true/false ne sont pas des numéros
+        if not isinstance(index, int) or isinstance(index, bool) or not 0 <= index < expected:
+            continue
+        if items[index] is not None:
+            duplicates.add(index)
+        items[index] = item
+    for index in duplicates:
+        items[index] = None
+
+    missing = sum(item is None for item in items)
+    if missing:
+        logger.warning(f"Réponse du lot incomplète: {missing} textes sans réponse valide sur {expected}")
+    return items
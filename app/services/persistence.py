@@ -0,0 +1,392 @@
+import datetime
+import json
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from starlette.concurrency import run_in_threadpool
+
+from app.config import Config
+from app.models.database import SessionLocal, compute_content_hash
+from app.models.schemas import TextDataCreate
+from app.services.metrics import registry, stats_collector, timed, BATCH_SIZE
+from app.services.repositories import (
+    TextDataRepository, SentimentAnalysisRepository, AsyncSentimentAnalysisRepository
+)
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Levée lorsque la file d'écriture différée est pleine"""
+    pass
+
+
+def stored_results_model(use_openai=None):
+    """Modèle dont une analyse enregistrée peut servir de résultat pour cette requête"""
+    if use_openai is None:
+        use_openai = Config.USE_OPENAI
+    return Config.OPENAI_MODEL if use_openai and Config.OPENAI_API_KEY else "local"
+
+
+def _cached_results(analyzer, texts, model):
+    """Résultats du cache de l'analyseur (mémoire, puis cache persistant) ; None pour les absents"""
+    cache = getattr(analyzer, "cache", None)
+    if cache is None or not texts:
+        return [None] * len(texts)
+    with timed("analyze.cache"):
+        return cache.get_many(texts, model)
+
+
+def _merge_stored_results(analyzer, texts, results, pending, hashes, stored, model):
+    """
+    Complète `results` avec les analyses enregistrées des textes `pending` et les met en
+    cache mémoire pour les requêtes suivantes. Renvoie les indices des textes à analyser.
+    """
+    found = []
+    for i, content_hash in zip(pending, hashes):
+        if content_hash in stored:
+            results[i] = dict(stored[content_hash])
+            found.append((texts[i], stored[content_hash]))
+    cache = getattr(analyzer, "cache", None)
+    if cache is not None and found:
+        cache.set_many(found, model, persist=False)
+    return [i for i in pending if results[i] is None]
+
+
+def analyze_with_stored_results(db, analyzer, texts, use_openai=None):
+    """
+    Analyse un lot de textes en réutilisant les résultats connus : cache de l'analyseur
+    d'abord, puis, pour les seuls absents du cache, analyses déjà enregistrées en base
+    (recherchées par empreinte, même modèle et même version de lexiques et de modèle).
+    Seuls les textes restants sont analysés.
+    """
+    model = stored_results_model(use_openai)
+    results = _cached_results(analyzer, texts, model)
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        hashes = [compute_content_hash(texts[i]) for i in pending]
+        stored = SentimentAnalysisRepository.find_stored_results(
+            db, hashes, model, getattr(analyzer, "model_version", None)
+        )
+        pending = _merge_stored_results(analyzer, texts, results, pending, hashes, stored, model)
+    if pending:
+        analyzed = analyzer.analyze_sentiment_batch(
+            [texts[i] for i in pending], use_openai=use_openai, checked_model=model
+        )
+        for i, result in zip(pending, analyzed):
+            results[i] = result
+    return results
+
+
+async def analyze_with_stored_results_async(db, analyzer, texts, use_openai=None):
+    """
+    Version asynchrone de analyze_with_stored_results pour une AsyncSession : la
+    consultation du cache, le calcul des empreintes et l'analyse sont exécutés hors de
+    la boucle d'événements. La base n'est interrogée que pour les absents du cache.
+    """
+    model = stored_results_model(use_openai)
+    results = await run_in_threadpool(_cached_results, analyzer, texts, model)
+    pending = [i for i, result in enumerate(results) if result is None]
+    if pending:
+        hashes = await run_in_threadpool(lambda: [compute_content_hash(texts[i]) for i in pending])
+        stored = await AsyncSentimentAnalysisRepository.find_stored_results(
+            db, hashes, model, getattr(analyzer, "model_version", None)
+        )
+        pending = _merge_stored_results(analyzer, texts, results, pending, hashes, stored, model)
+    if pending:
+        analyzed = await run_in_threadpool(
+            analyzer.analyze_sentiment_batch, [texts[i] for i in pending], use_openai=use_openai, checked_model=model
+        )
+        for i, result in zip(pending, analyzed):
+            results[i] = result
+    return results
+
+
+def prepare_results(texts, results, source=None, model_version=None):
+    """
+    Partie calcul de persist_results, sans accès à la base : empreintes et lignes des
+    textes, lignes des analyses (sans leur text_id). Exécutée hors de la boucle
+    d'événements par persist_results_async.
+    """
+    hashes, text_rows = TextDataRepository.build_rows([TextDataCreate(text=text, source=source) for text in texts])
+    now = datetime.datetime.utcnow()
+    analysis_rows = [
+        {
+            "polarity": result["polarity"],
+            "subjectivity": result["subjectivity"],
+            "sentiment": result["sentiment"],
+            "model": result.get("model", "local"),
+            "model_version": model_version,
+            "analyzed_at": now
+        }
+        for result in results
+    ]
+    return hashes, text_rows, analysis_rows
+
+
+def write_prepared_results(db, prepared, model_version=None):
+    """
+    Instructions de persist_results pour un lot préparé par prepare_results, sans
+    validation : upsert des textes, recherche des analyses réutilisables, insertion
+    des autres. Renvoie les IDs des TextData, sans valider la transaction.
+    """
+    hashes, text_rows, analysis_rows = prepared
+    text_ids = TextDataRepository.upsert_rows(db, hashes, text_rows, commit=False)
+    existing = set()
+    if model_version is not None:
+        existing = set(SentimentAnalysisRepository.find_reusable(db, text_ids, model_version))
+    rows = []
+    for text_id, row in zip(text_ids, analysis_rows):
+        if model_version is not None:
+            if (text_id, row["model"]) in existing:
+                continue
+            existing.add((text_id, row["model"]))
+        rows.append(dict(row, text_id=text_id))
+    SentimentAnalysisRepository.insert_rows(db, rows, commit=False)
+    return text_ids
+
+
+def persist_results(db, texts, results, source=None, commit=True, model_version=None):
+    """
+    Enregistre des textes et leurs résultats d'analyse (TextData et SentimentAnalysis)
+    dans une seule transaction. Renvoie les IDs des TextData (existants ou créés).
+    
+    Un texte déjà stocké n'est pas dupliqué (voir TextDataRepository.upsert_many).
+    Avec `model_version` (version des lexiques et du modèle de l'analyseur), une
+    analyse déjà enregistrée pour le même texte, le même modèle et la même version
+    est réutilisée au lieu d'en insérer une nouvelle.
+    """
+    BATCH_SIZE.labels("persist").observe(len(texts))
+    with timed("persist"):
+        text_ids = write_prepared_results(db, prepare_results(texts, results, source, model_version), model_version)
+        if commit:
+            db.commit()
+        return text_ids
+
+
+async def persist_results_async(db, texts, results, source=None, commit=True, model_version=None):
+    """
+    Version asynchrone de persist_results pour une AsyncSession. Les empreintes et les
+    lignes sont préparées dans le pool de threads ; seules les instructions SQL passent
+    par la session (AsyncSession.run_sync) : la boucle d'événements n'exécute ni le
+    hachage ni la construction des lignes.
+    """
+    BATCH_SIZE.labels("persist").observe(len(texts))
+    with timed("persist"):
+        prepared = await run_in_threadpool(prepare_results, texts, results, source, model_version)
+        text_ids = await db.run_sync(write_prepared_results, prepared, model_version)
+        if commit:
+            await db.commit()
+        return text_ids
+
+
+class WriteBehindWriter:
+    """
+    File d'écriture différée : les résultats sont placés dans une file bornée en mémoire
+    et un thread d'arrière-plan les enregistre par lots, dès que la taille du lot ou
+    l'intervalle de vidage est atteint.
+    
+    Un lot dont l'écriture échoue sur une erreur passagère (base verrouillée,
+    connexion perdue) est retenté jusqu'à `max_retries` fois, avec une attente
+    doublée à chaque tentative ; la file se remplit pendant ce temps, ce qui
+    applique la contre-pression habituelle. Un lot définitivement en échec est
+    écrit dans `spill_path` (une ligne JSON par résultat) s'il est configuré.
+    """
+
+    def __init__(self, session_factory=SessionLocal, max_queue=10000, batch_size=500,
+                 flush_interval=0.5, put_timeout=1.0, max_retries=3, retry_backoff=0.2, spill_path=""):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spill_path = spill_path
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+
+        # Métriques
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.spilled = 0
+        self.flushes = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Démarre le thread d'écriture"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        logger.info("File d'écriture différée démarrée")
+
+    def stop(self, timeout=30.0):
+        """Arrête le thread d'écriture après avoir vidé la file"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error(f"La file d'écriture différée n'a pas pu être vidée ({self._queue.qsize()} éléments restants)")
+        else:
+            logger.info("File d'écriture différée vidée et arrêtée")
+        self._thread = None
+
+    def submit(self, text, result, source=None, model_version=None):
+        """
+        Place un texte et son résultat dans la file. Bloque au plus `put_timeout`
+        secondes si la file est pleine, puis lève QueueFullError.
+        """
+        try:
+            self._queue.put((text, result, source, model_version), timeout=self.put_timeout)
+        except queue.Full:
+            self.rejected += 1
+            raise QueueFullError("La file d'écriture différée est pleine")
+        self.enqueued += 1
+
+    def _next_batch(self):
+        """Collecte un lot jusqu'à batch_size éléments ou l'expiration de l'intervalle"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    self._write(batch)
+                    self.written += len(batch)
+                    return
+                except OperationalError as e:
+                    if attempt == self.max_retries:
+                        error = e
+                        break
+                    self.retries += 1
+                    delay = self.retry_backoff * 2 ** attempt
+                    logger.warning(
+                        f"Écriture différée de {len(batch)} éléments retentée dans {delay:.2f} s "
+                        f"({attempt + 1}/{self.max_retries}): {e}"
+                    )
+                    time.sleep(delay)
+                except Exception as e:
+                    # Erreur permanente (données invalides...) : une nouvelle tentative échouerait aussi
+                    error = e
+                    break
+            self.failed += len(batch)
+            logger.error(f"Erreur lors de l'écriture différée de {len(batch)} éléments: {error}")
+            self._spill(batch)
+        finally:
+            latency = time.perf_counter() - start
+            self.flushes += 1
+            self.last_flush_latency = latency
+            self.max_flush_latency = max(self.max_flush_latency, latency)
+            self.total_flush_latency += latency
+
+    def _write(self, batch):
+        db = self.session_factory()
+        try:
+            # Les lots sont regroupés par source et version, persist_results n'en acceptant qu'une
+            groups = {}
+            for text, result, source, model_version in batch:
+                texts, results = groups.setdefault((source, model_version), ([], []))
+                texts.append(text)
+                results.append(result)
+            for (source, model_version), (texts, results) in groups.items():
+                persist_results(db, texts, results, source=source, commit=False, model_version=model_version)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _spill(self, batch):
+        """Écrit un lot en échec dans spill_path pour un rechargement ultérieur"""
+        if not self.spill_path:
+            logger.error(f"{len(batch)} résultats perdus (WRITE_BEHIND_SPILL_PATH non configuré)")
+            return
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as spill:
+                for text, result, source, model_version in batch:
+                    spill.write(json.dumps(
+                        {"text": text, "result": result, "source": source, "model_version": model_version},
+                        ensure_ascii=False
+                    ) + "\n")
+            self.spilled += len(batch)
+            logger.warning(f"{len(batch)} résultats écrits dans {self.spill_path}")
+        except OSError as e:
+            logger.error(f"Impossible d'écrire les résultats en échec dans {self.spill_path}: {e}")
+
+    def stats(self):
+        """Renvoie les métriques de la file d'écriture différée"""
+        return {
+            "running": self.running,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "spilled": self.spilled,
+            "flushes": self.flushes,
+            "last_flush_latency": self.last_flush_latency,
+            "max_flush_latency": self.max_flush_latency,
+            "avg_flush_latency": self.total_flush_latency / self.flushes if self.flushes else 0.0
+        }
+
+
+# File d'écriture différée partagée, démarrée au lancement de l'application si activée
+write_behind = WriteBehindWriter(
+    max_queue=Config.WRITE_BEHIND_MAX_QUEUE,
+    batch_size=Config.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=Config.WRITE_BEHIND_FLUSH_INTERVAL,
+    put_timeout=Config.WRITE_BEHIND_PUT_TIMEOUT,
+    max_retries=Config.WRITE_BEHIND_MAX_RETRIES,
+    retry_backoff=Config.WRITE_BEHIND_RETRY_BACKOFF,
+    spill_path=Config.WRITE_BEHIND_SPILL_PATH
+)
+
+registry.register_collector(stats_collector("sentiment_write_behind", write_behind.stats, {
+    "queue_depth": ("gauge", "Résultats en attente dans la file d'écriture différée"),
+    "queue_capacity": ("gauge", "Capacité de la file d'écriture différée"),
+    "enqueued": ("counter", "Résultats placés dans la file d'écriture différée"),
+    "rejected": ("counter", "Résultats refusés, file d'écriture différée pleine"),
+    "written": ("counter", "Résultats enregistrés par l'écriture différée"),
+    "failed": ("counter", "Résultats non enregistrés après épuisement des nouvelles tentatives"),
+    "retries": ("counter", "Nouvelles tentatives d'écriture d'un lot après une erreur passagère"),
+    "spilled": ("counter", "Résultats non enregistrés écrits dans WRITE_BEHIND_SPILL_PATH"),
+    "flushes": ("counter", "Vidages de la file d'écriture différée"),
+    "last_flush_latency": ("gauge", "Durée du dernier vidage, en secondes")
+}))
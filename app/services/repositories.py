@@ -1,25 +1,257 @@
+from sqlalchemy import insert, select, update, bindparam, func, case, cast, Integer
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.models.database import TextData, SentimentAnalysis
+from app.models.database import TextData, SentimentAnalysis, compute_content_hash
 from app.models.schemas import TextDataCreate, SentimentAnalysisCreate
-from typing import List, Optional
+from app.services.metrics import instrumented
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+import base64
+import binascii
+import datetime
 import logging
 
+# Résolution de l'histogramme interne servant à estimer les percentiles de polarité
+# (intervalles de 0.01 : erreur d'estimation au plus 0.005 par interpolation)
+PERCENTILE_BUCKETS = 200
+PERCENTILES = (5, 25, 50, 75, 95)
+
 # Configurer le logger
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def encode_cursor(last_id: int) -> str:
+    """Curseur de pagination opaque désignant la dernière ligne renvoyée"""
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode("ascii")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Renvoie l'ID désigné par un curseur ; lève ValueError si le curseur est invalide.
+    Seul un curseur produit par encode_cursor est accepté : le décodage base64 est
+    strict et l'ID décodé doit redonner exactement le même curseur.
+    """
+    try:
+        decoded = base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode("ascii")
+    except (binascii.Error, ValueError):
+        raise ValueError("Curseur invalide")
+    prefix, _, last_id = decoded.partition(":")
+    if prefix != "id" or not last_id.isascii() or not last_id.isdigit() or encode_cursor(int(last_id)) != cursor:
+        raise ValueError("Curseur invalide")
+    return int(last_id)
+
+
+def _get_all(db: Session, model, skip: int, limit: int, after_id: Optional[int]):
+    """
+    Page de lignes par ordre d'ID. Avec after_id, la page commence juste après cet ID
+    (pagination par clé, appuyée sur la clé primaire) : le coût ne dépend plus de la
+    position dans la table, contrairement à OFFSET qui parcourt les lignes sautées.
+    """
+    query = db.query(model).order_by(model.id)
+    if after_id is not None:
+        return query.filter(model.id > after_id).limit(limit).all()
+    return query.offset(skip).limit(limit).all()
+
+
+@instrumented("db.page")
+def _get_page(db: Session, model, cursor: Optional[str], limit: int):
+    after_id = decode_cursor(cursor) if cursor else None
+    rows = _get_all(db, model, 0, limit, after_id)
+    next_cursor = encode_cursor(rows[-1].id) if len(rows) == limit else None
+    return rows, next_cursor
+
+
+@instrumented("db.fetch_batch")
+def _fetch_batch(db: Session, model, last_id: Optional[int], batch_size: int):
+    """
+    Lot suivant de lignes après last_id, par ordre d'ID. Les lignes sont lues en
+    colonnes (Core), sans objets ORM : la session n'en garde aucune en mémoire.
+    """
+    query = select(*model.__table__.columns).order_by(model.id).limit(batch_size)
+    if last_id is not None:
+        query = query.where(model.id > last_id)
+    return db.execute(query).mappings().all()
+
+
+def _iter_all(db: Session, model, batch_size: int):
+    """Parcourt toute la table par lots de batch_size, par ordre d'ID"""
+    last_id = None
+    while True:
+        rows = _fetch_batch(db, model, last_id, batch_size)
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+async def _aiter_all(db, model, batch_size: int):
+    """Version asynchrone de _iter_all (AsyncSession), un aller-retour par lot"""
+    last_id = None
+    while True:
+        rows = await db.run_sync(_fetch_batch, model, last_id, batch_size)
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        last_id = rows[-1]["id"]
+
+
+def _dialect_insert(db: Session):
+    """
+    Fonction insert propre au dialecte (INSERT ... ON CONFLICT de SQLite et PostgreSQL),
+    ou None pour les autres dialectes (voir _upsert_portable)
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def _upsert_portable(db: Session, rows: Dict[str, dict]) -> Dict[str, int]:
+    """
+    Déduplication portable (dialectes sans INSERT ... ON CONFLICT) : SELECT des
+    empreintes déjà stockées, mise à jour de leurs compteurs, puis INSERT des autres.
+    Un texte inséré entre-temps par une autre transaction est détecté par l'index
+    unique (point de sauvegarde) et compté comme une occurrence de plus.
+    Renvoie {empreinte: ID}.
+    """
+    table = TextData.__table__
+
+    def existing_ids(hashes):
+        return dict(db.execute(
+            select(table.c.content_hash, table.c.id).where(table.c.content_hash.in_(hashes))
+        ).all())
+
+    def add_occurrences(found):
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(
+                occurrences=func.coalesce(table.c.occurrences, 1) + bindparam("added"),
+                last_seen_at=bindparam("seen")
+            ),
+            [
+                {"row_id": text_id, "added": rows[content_hash]["occurrences"],
+                 "seen": rows[content_hash]["last_seen_at"]}
+                for content_hash, text_id in found.items()
+            ]
+        )
+
+    ids = existing_ids(list(rows))
+    if ids:
+        add_occurrences(ids)
+    new_rows = [row for content_hash, row in rows.items() if content_hash not in ids]
+    if new_rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(table), new_rows)
+        except IntegrityError:
+            # Insertion concurrente : ligne par ligne, les textes déjà présents sont comptés
+            for row in new_rows:
+                try:
+                    with db.begin_nested():
+                        db.execute(insert(table), row)
+                except IntegrityError:
+                    add_occurrences(existing_ids([row["content_hash"]]))
+        ids.update(existing_ids([row["content_hash"] for row in new_rows]))
+    return ids
+
+
 class TextDataRepository:
     """Repository pour gérer les opérations sur TextData"""
 
     @staticmethod
     def create(db: Session, text_data: TextDataCreate) -> TextData:
-        """Crée une nouvelle entrée TextData"""
-        db_text = TextData(text=text_data.text, source=text_data.source)
-        db.add(db_text)
-        db.commit()
-        db.refresh(db_text)
-        return db_text
+        """Crée une entrée TextData, ou renvoie l'entrée existante du même texte"""
+        text_id = TextDataRepository.upsert_many(db, [text_data], commit=True)[0]
+        return db.get(TextData, text_id)
+
+    @staticmethod
+    def build_rows(texts: List[TextDataCreate]) -> Tuple[List[str], Dict[str, dict]]:
+        """
+        Prépare un lot pour upsert_rows, sans accès à la base : l'empreinte de chaque
+        entrée et une ligne par texte distinct, {empreinte: ligne}, occurrences cumulées.
+        """
+        now = datetime.datetime.utcnow()
+        hashes = [compute_content_hash(t.text) for t in texts]
+        rows = {}
+        for t, content_hash in zip(texts, hashes):
+            row = rows.get(content_hash)
+            if row is None:
+                rows[content_hash] = {
+                    "text": t.text, "source": t.source, "content_hash": content_hash,
+                    "occurrences": 1, "created_at": now, "last_seen_at": now
+                }
+            else:
+                row["occurrences"] += 1
+        return hashes, rows
+
+    @staticmethod
+    def upsert_many(db: Session, texts: List[TextDataCreate], commit: bool = True) -> List[int]:
+        """
+        Enregistre un lot de textes en une seule instruction INSERT ... ON CONFLICT sur
+        l'empreinte du texte (SELECT puis INSERT pour les autres dialectes) : un texte
+        déjà stocké n'est pas inséré à nouveau, son compteur d'occurrences et sa date
+        de dernière réception sont mis à jour.
+        Renvoie l'ID (existant ou créé) de chaque entrée, dans l'ordre des entrées.
+        
+        La source d'un texte est celle de sa première réception.
+        Avec commit=False, l'appelant reste maître de la transaction.
+        """
+        if not texts:
+            return []
+        hashes, rows = TextDataRepository.build_rows(texts)
+        return TextDataRepository.upsert_rows(db, hashes, rows, commit=commit)
+
+    @staticmethod
+    @instrumented("db.text_upsert")
+    def upsert_rows(db: Session, hashes: List[str], rows: Dict[str, dict], commit: bool = True) -> List[int]:
+        """
+        Instructions de upsert_many pour un lot déjà préparé par build_rows. Renvoie
+        l'ID de chaque empreinte de `hashes`, dans l'ordre.
+        """
+        if not hashes:
+            return []
+        dialect_insert = _dialect_insert(db)
+        if dialect_insert is None:
+            ids = _upsert_portable(db, rows)
+            if commit:
+                db.commit()
+            return [ids[content_hash] for content_hash in hashes]
+        stmt = dialect_insert(TextData)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TextData.content_hash],
+            set_={
+                "occurrences": func.coalesce(TextData.occurrences, 1) + stmt.excluded.occurrences,
+                "last_seen_at": stmt.excluded.last_seen_at
+            }
+        ).returning(TextData.id, TextData.content_hash)
+        ids = {content_hash: text_id for text_id, content_hash in db.execute(stmt, list(rows.values()))}
+        if commit:
+            db.commit()
+        return [ids[content_hash] for content_hash in hashes]
+
+    @staticmethod
+    def create_many(db: Session, texts: List[TextDataCreate], commit: bool = True) -> List[int]:
+        """
+        Enregistre un lot de TextData et renvoie un ID par entrée, dans l'ordre des entrées.
+        
+        L'empreinte du texte est unique : ce n'est pas une insertion brute d'une ligne
+        par entrée. Les entrées d'un même texte (dans le lot ou déjà stocké) partagent
+        la même ligne et le même ID, et incrémentent son compteur d'occurrences (voir
+        upsert_many). Un appelant qui doit conserver chaque entrée (position, doublons)
+        garde sa propre liste d'IDs, comme les éléments d'une tâche d'analyse.
+        """
+        return TextDataRepository.upsert_many(db, texts, commit=commit)
+
+    @staticmethod
+    def get_by_hash(db: Session, content_hash: str) -> Optional[TextData]:
+        """Récupère un TextData par l'empreinte de son texte"""
+        return db.query(TextData).filter(TextData.content_hash == content_hash).first()
 
     @staticmethod
     def get_by_id(db: Session, text_id: int) -> Optional[TextData]:
@@ -27,9 +259,19 @@ class TextDataRepository:
         return db.query(TextData).filter(TextData.id == text_id).first()
 
     @staticmethod
-    def get_all(db: Session, skip: int = 0, limit: int = 100) -> List[TextData]:
-        """Récupère tous les TextData avec pagination"""
-        return db.query(TextData).offset(skip).limit(limit).all()
+    def get_all(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[TextData]:
+        """Récupère tous les TextData avec pagination (par clé si after_id est fourni)"""
+        return _get_all(db, TextData, skip, limit, after_id)
+
+    @staticmethod
+    def get_page(db: Session, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[TextData], Optional[str]]:
+        """Renvoie une page de TextData et le curseur de la page suivante (None : dernière page)"""
+        return _get_page(db, TextData, cursor, limit)
+
+    @staticmethod
+    def iter_all(db: Session, batch_size: int = 1000) -> Iterator[dict]:
+        """Parcourt tous les TextData (dictionnaires de colonnes) pour un export"""
+        return _iter_all(db, TextData, batch_size)
 
     @staticmethod
     def delete(db: Session, text_id: int) -> bool:
@@ -42,6 +284,42 @@ class TextDataRepository:
         return False
 
 
+def _to_naive_utc(value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    """Convertit une date avec fuseau horaire en date naïve UTC, comme analyzed_at"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _polarity_bucket(buckets):
+    """Expression SQL de l'intervalle (0 à buckets - 1) d'une polarité entre -1 et 1"""
+    scaled = (SentimentAnalysis.polarity + 1.0) * (buckets / 2.0)
+    # Arrondi à l'entier inférieur portable (CAST tronque sous SQLite mais arrondit sous PostgreSQL)
+    floored = cast(scaled, Integer) - case((cast(scaled, Integer) > scaled, 1), else_=0)
+    return case(
+        (SentimentAnalysis.polarity >= 1.0, buckets - 1),
+        (SentimentAnalysis.polarity <= -1.0, 0),
+        else_=floored
+    )
+
+
+def _percentiles(bucket_counts, buckets, total):
+    """Estime les percentiles de polarité par interpolation linéaire dans l'histogramme"""
+    width = 2.0 / buckets
+    estimates = {}
+    cumulative = 0
+    bucket = 0
+    for q in PERCENTILES:
+        target = q / 100 * total
+        while bucket < buckets - 1 and cumulative + bucket_counts.get(bucket, 0) < target:
+            cumulative += bucket_counts.get(bucket, 0)
+            bucket += 1
+        count = bucket_counts.get(bucket, 0)
+        fraction = (target - cumulative) / count if count else 0.0
+        estimates[f"p{q}"] = round(-1.0 + (bucket + min(max(fraction, 0.0), 1.0)) * width, 4)
+    return estimates
+
+
 class SentimentAnalysisRepository:
     """Repository pour gérer les opérations sur SentimentAnalysis"""
 
@@ -51,27 +329,189 @@ class SentimentAnalysisRepository:
         db_analysis = SentimentAnalysis(
             text_id=analysis.text_id,
             polarity=analysis.polarity,
-            subjectivity=analysis.subjectivity
+            subjectivity=analysis.subjectivity,
+            sentiment=analysis.sentiment,
+            model=analysis.model,
+            model_version=analysis.model_version
         )
         db.add(db_analysis)
         db.commit()
         db.refresh(db_analysis)
         return db_analysis
 
+    @staticmethod
+    def create_many(db: Session, analyses: List[SentimentAnalysisCreate], commit: bool = True) -> List[int]:
+        """
+        Insère un lot de SentimentAnalysis en une seule instruction (executemany)
+        et renvoie les IDs générés dans l'ordre des entrées.
+        
+        Avec commit=False, l'appelant reste maître de la transaction.
+        """
+        if not analyses:
+            return []
+        now = datetime.datetime.utcnow()
+        rows = [
+            {
+                "text_id": a.text_id,
+                "polarity": a.polarity,
+                "subjectivity": a.subjectivity,
+                "sentiment": a.sentiment,
+                "model": a.model,
+                "model_version": a.model_version,
+                "analyzed_at": now
+            }
+            for a in analyses
+        ]
+        return SentimentAnalysisRepository.insert_rows(db, rows, commit=commit)
+
+    @staticmethod
+    @instrumented("db.analysis_insert")
+    def insert_rows(db: Session, rows: List[dict], commit: bool = True) -> List[int]:
+        """Instruction de create_many pour des lignes déjà construites (dictionnaires de colonnes)"""
+        if not rows:
+            return []
+        result = db.execute(
+            insert(SentimentAnalysis).returning(SentimentAnalysis.id, sort_by_parameter_order=True),
+            rows
+        )
+        ids = list(result.scalars())
+        if commit:
+            db.commit()
+        return ids
+
     @staticmethod
     def get_by_id(db: Session, analysis_id: int) -> Optional[SentimentAnalysis]:
         """Récupère un SentimentAnalysis par son ID"""
         return db.query(SentimentAnalysis).filter(SentimentAnalysis.id == analysis_id).first()
 
+    @staticmethod
+    @instrumented("db.analysis_reuse")
+    def find_reusable(db: Session, text_ids: List[int], model_version: str) -> Dict[Tuple[int, str], int]:
+        """
+        Renvoie les analyses déjà enregistrées pour ces textes avec la même version de
+        lexiques et de modèle, sous la forme {(text_id, modèle): ID de l'analyse}.
+        """
+        if not text_ids or model_version is None:
+            return {}
+        rows = db.execute(
+            select(SentimentAnalysis.text_id, SentimentAnalysis.model, func.max(SentimentAnalysis.id))
+            .where(SentimentAnalysis.text_id.in_(sorted(set(text_ids))), SentimentAnalysis.model_version == model_version)
+            .group_by(SentimentAnalysis.text_id, SentimentAnalysis.model)
+        )
+        return {(text_id, model): analysis_id for text_id, model, analysis_id in rows}
+
+    @staticmethod
+    @instrumented("db.analysis_lookup")
+    def find_stored_results(db: Session, hashes: List[str], model: str, model_version: str) -> Dict[str, dict]:
+        """
+        Renvoie la dernière analyse enregistrée pour chaque empreinte de texte avec ce
+        modèle et cette version de lexiques et de modèle, sous la forme
+        {empreinte: résultat} (polarity, subjectivity, sentiment, model). Consultée
+        avant l'analyse : un texte déjà analysé n'est pas analysé à nouveau.
+        """
+        if not hashes or model_version is None:
+            return {}
+        latest = (
+            select(func.max(SentimentAnalysis.id))
+            .join(TextData, TextData.id == SentimentAnalysis.text_id)
+            .where(
+                TextData.content_hash.in_(sorted(set(hashes))),
+                SentimentAnalysis.model == model,
+                SentimentAnalysis.model_version == model_version
+            )
+            .group_by(SentimentAnalysis.text_id)
+        )
+        rows = db.execute(
+            select(TextData.content_hash, SentimentAnalysis.polarity, SentimentAnalysis.subjectivity,
+                   SentimentAnalysis.sentiment, SentimentAnalysis.model)
+            .join(TextData, TextData.id == SentimentAnalysis.text_id)
+            .where(SentimentAnalysis.id.in_(latest))
+        )
+        return {
+            content_hash: {"polarity": polarity, "subjectivity": subjectivity, "sentiment": sentiment, "model": model}
+            for content_hash, polarity, subjectivity, sentiment, model in rows
+        }
+
     @staticmethod
     def get_by_text_id(db: Session, text_id: int) -> List[SentimentAnalysis]:
         """Récupère tous les SentimentAnalysis liés à un TextData"""
         return db.query(SentimentAnalysis).filter(SentimentAnalysis.text_id == text_id).all()
 
     @staticmethod
-    def get_all(db: Session, skip: int = 0, limit: int = 100) -> List[SentimentAnalysis]:
-        """Récupère tous les SentimentAnalysis avec pagination"""
-        return db.query(SentimentAnalysis).offset(skip).limit(limit).all()
+    def get_all(db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[SentimentAnalysis]:
+        """Récupère tous les SentimentAnalysis avec pagination (par clé si after_id est fourni)"""
+        return _get_all(db, SentimentAnalysis, skip, limit, after_id)
+
+    @staticmethod
+    def get_page(db: Session, cursor: Optional[str] = None,
+                 limit: int = 100) -> Tuple[List[SentimentAnalysis], Optional[str]]:
+        """Renvoie une page de SentimentAnalysis et le curseur de la page suivante (None : dernière page)"""
+        return _get_page(db, SentimentAnalysis, cursor, limit)
+
+    @staticmethod
+    def iter_all(db: Session, batch_size: int = 1000) -> Iterator[dict]:
+        """Parcourt tous les SentimentAnalysis (dictionnaires de colonnes) pour un export"""
+        return _iter_all(db, SentimentAnalysis, batch_size)
+
+    @staticmethod
+    @instrumented("db.analysis_stats")
+    def get_stats(db: Session, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                  source: Optional[str] = None, buckets: int = 20) -> dict:
+        """
+        Calcule en SQL les statistiques des analyses enregistrées, éventuellement
+        filtrées par date d'analyse [start, end[ et par source du texte : nombre par
+        sentiment, histogramme de polarité, moyennes, extrêmes et percentiles.
+        
+        Seuls des agrégats sont renvoyés par la base : le volume transféré dépend du
+        nombre d'intervalles, pas du nombre de lignes.
+        """
+        # analyzed_at est stocké en UTC sans fuseau : les bornes sont ramenées à UTC
+        start, end = _to_naive_utc(start), _to_naive_utc(end)
+
+        def filtered(*columns):
+            query = db.query(*columns)
+            if source is not None:
+                query = query.join(TextData, TextData.id == SentimentAnalysis.text_id).filter(TextData.source == source)
+            if start is not None:
+                query = query.filter(SentimentAnalysis.analyzed_at >= start)
+            if end is not None:
+                query = query.filter(SentimentAnalysis.analyzed_at < end)
+            return query
+
+        total, polarity_mean, polarity_min, polarity_max, subjectivity_mean = filtered(
+            func.count(SentimentAnalysis.id),
+            func.avg(SentimentAnalysis.polarity),
+            func.min(SentimentAnalysis.polarity),
+            func.max(SentimentAnalysis.polarity),
+            func.avg(SentimentAnalysis.subjectivity)
+        ).one()
+
+        sentiment_counts = {
+            sentiment or "inconnu": count
+            for sentiment, count in filtered(SentimentAnalysis.sentiment, func.count(SentimentAnalysis.id))
+            .group_by(SentimentAnalysis.sentiment)
+        }
+
+        def histogram(n):
+            bucket = _polarity_bucket(n).label("bucket")
+            return dict(filtered(bucket, func.count(SentimentAnalysis.id)).group_by(bucket).all())
+
+        counts = histogram(buckets)
+        return {
+            "total": total,
+            "sentiment_counts": sentiment_counts,
+            "polarity": {
+                "mean": polarity_mean,
+                "min": polarity_min,
+                "max": polarity_max,
+                "percentiles": _percentiles(histogram(PERCENTILE_BUCKETS), PERCENTILE_BUCKETS, total) if total else None
+            },
+            "subjectivity_mean": subjectivity_mean,
+            "histogram": {
+                "edges": [round(-1.0 + i * 2.0 / buckets, 4) for i in range(buckets + 1)],
+                "counts": [counts.get(i, 0) for i in range(buckets)]
+            }
+        }
 
     @staticmethod
     def delete(db: Session, analysis_id: int) -> bool:
@@ -82,3 +522,90 @@ class SentimentAnalysisRepository:
             db.commit()
             return True
         return False
+
+
+class AsyncTextDataRepository:
+    """
+    Équivalent asynchrone de TextDataRepository pour une AsyncSession. Les requêtes
+    sont celles du repository synchrone, exécutées par AsyncSession.run_sync : la
+    boucle d'événements n'est pas bloquée pendant les échanges avec la base.
+    """
+
+    @staticmethod
+    async def upsert_many(db, texts: List[TextDataCreate], commit: bool = True) -> List[int]:
+        ids = await db.run_sync(TextDataRepository.upsert_many, texts, commit=False)
+        if commit:
+            await db.commit()
+        return ids
+
+    @staticmethod
+    async def get_by_id(db, text_id: int) -> Optional[TextData]:
+        return await db.run_sync(TextDataRepository.get_by_id, text_id)
+
+    @staticmethod
+    async def get_all(db, skip: int = 0, limit: int = 100, after_id: Optional[int] = None) -> List[TextData]:
+        return await db.run_sync(TextDataRepository.get_all, skip, limit, after_id)
+
+    @staticmethod
+    async def get_page(db, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[TextData], Optional[str]]:
+        return await db.run_sync(TextDataRepository.get_page, cursor, limit)
+
+    @staticmethod
+    def iter_all(db, batch_size: int = 1000) -> AsyncIterator[dict]:
+        return _aiter_all(db, TextData, batch_size)
+
+    @staticmethod
+    async def delete(db, text_id: int) -> bool:
+        return await db.run_sync(TextDataRepository.delete, text_id)
+
+
+class AsyncSentimentAnalysisRepository:
+    """Équivalent asynchrone de SentimentAnalysisRepository pour une AsyncSession"""
+
+    @staticmethod
+    async def create_many(db, analyses: List[SentimentAnalysisCreate], commit: bool = True) -> List[int]:
+        ids = await db.run_sync(SentimentAnalysisRepository.create_many, analyses, commit=False)
+        if commit:
+            await db.commit()
+        return ids
+
+    @staticmethod
+    async def find_reusable(db, text_ids: List[int], model_version: str) -> Dict[Tuple[int, str], int]:
+        return await db.run_sync(SentimentAnalysisRepository.find_reusable, text_ids, model_version)
+
+    @staticmethod
+    async def get_by_id(db, analysis_id: int) -> Optional[SentimentAnalysis]:
+        return await db.run_sync(SentimentAnalysisRepository.get_by_id, analysis_id)
+
+    @staticmethod
+    async def find_stored_results(db, hashes: List[str], model: str, model_version: str) -> Dict[str, dict]:
+        return await db.run_sync(SentimentAnalysisRepository.find_stored_results, hashes, model, model_version)
+
+    @staticmethod
+    async def get_by_text_id(db, text_id: int) -> List[SentimentAnalysis]:
+        return await db.run_sync(SentimentAnalysisRepository.get_by_text_id, text_id)
+
+    @staticmethod
+    async def get_all(db, skip: int = 0, limit: int = 100,
+                      after_id: Optional[int] = None) -> List[SentimentAnalysis]:
+        return await db.run_sync(SentimentAnalysisRepository.get_all, skip, limit, after_id)
+
+    @staticmethod
+    async def get_page(db, cursor: Optional[str] = None,
+                       limit: int = 100) -> Tuple[List[SentimentAnalysis], Optional[str]]:
+        return await db.run_sync(SentimentAnalysisRepository.get_page, cursor, limit)
+
+    @staticmethod
+    def iter_all(db, batch_size: int = 1000) -> AsyncIterator[dict]:
+        return _aiter_all(db, SentimentAnalysis, batch_size)
+
+    @staticmethod
+    async def delete(db, analysis_id: int) -> bool:
+        return await db.run_sync(SentimentAnalysisRepository.delete, analysis_id)
+
+    @staticmethod
+    async def get_stats(db, start: Optional[datetime.datetime] = None, end: Optional[datetime.datetime] = None,
+                        source: Optional[str] = None, buckets: int = 20) -> dict:
+        return await db.run_sync(
+            SentimentAnalysisRepository.get_stats, start=start, end=end, source=source, buckets=buckets
+        )
@@ -1,14 +1,19 @@
-from textblob import TextBlob
-import nltk
-from nltk.corpus import stopwords
-import re
 import logging
-import matplotlib.pyplot as plt
-import os
-import pandas as pd
 import json
-from openai import OpenAI
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from app.config import Config
+from app.services.charts import chart_renderer
+from app.services.metrics import timed, BATCH_SIZE, OPENAI_REQUESTS, OPENAI_FALLBACKS
+from app.services.cache import SentimentCache, PersistentCache, compute_cache_version
+from app.services.lexicon import LexiconMatcher, VectorizedLexiconScorer, combine_local_scores
+from app.services.text_processing import TextNormalizer
+from app.services.openai_client import OpenAIClient
+from app.services.openai_admission import OpenAIUnavailableError
+from app.services.openai_packing import (
+    pack_texts, build_packed_messages, packed_max_tokens, parse_packed_content
+)
 
 # Configurer le logger
 logging.basicConfig(level=logging.INFO)
@@ -38,58 +43,186 @@ NEGATIFS_FR = {
 # Mots servant à la négation en français
 NEGATIONS_FR = {'ne', 'pas', 'plus', 'jamais', 'aucun', 'aucune', 'ni', 'sans'}
 
-# S'assurer que les ressources NLTK nécessaires sont téléchargées
-def download_nltk_resources():
-    """Télécharge les ressources NLTK nécessaires"""
-    try:
-        resources = ['punkt', 'stopwords']
-        for resource in resources:
+# Prompt système pour l'analyse de sentiment avec OpenAI
+OPENAI_SYSTEM_PROMPT = (
+    "Vous êtes un expert en analyse de sentiment. Analysez le sentiment du texte et répondez "
+    "uniquement avec un objet JSON contenant 'sentiment' (positif, négatif ou neutre) et "
+    "'polarity' (valeur entre -1 et 1)."
+)
+
+# Moteurs disponibles pour la partie anglaise de l'analyse locale
+LOCAL_ENGINES = ("textblob", "lexicon")
+
+# Ressources NLTK utilisées, avec leur chemin dans nltk.data (les stopwords sont un corpus)
+NLTK_RESOURCES = {'stopwords': 'corpora/stopwords'}
+
+# Modes de vérification des ressources NLTK (NLTK_MODE)
+NLTK_MODES = ("offline", "strict", "download")
+
+# Résultat de la vérification, effectuée une seule fois par processus
+_nltk_status = None
+_nltk_lock = threading.Lock()
+
+
+class NLTKResourceError(RuntimeError):
+    """Levée en mode strict lorsqu'une ressource NLTK est absente"""
+    pass
+
+
+def ensure_nltk_resources(mode=None):
+    """
+    Vérifie une seule fois par processus la présence des ressources NLTK, d'abord dans
+    NLTK_DATA_DIR (données fournies avec l'application) puis dans les chemins de NLTK.
+    Selon le mode :
+    - "offline" (défaut) : aucun accès au réseau ; une ressource absente est signalée
+      et l'analyse se poursuit sans elle (stopwords vides) ;
+    - "strict" : une ressource absente lève NLTKResourceError (échec au démarrage) ;
+    - "download" : une ressource absente est téléchargée.
+    Renvoie {ressource: disponible}.
+    """
+    global _nltk_status
+    with _nltk_lock:
+        if _nltk_status is not None:
+            return _nltk_status
+        mode = mode or Config.NLTK_MODE
+        if mode not in NLTK_MODES:
+            raise ValueError(f"Mode NLTK inconnu: {mode} (attendu: {', '.join(NLTK_MODES)})")
+        
+        import nltk
+        if Config.NLTK_DATA_DIR and Config.NLTK_DATA_DIR not in nltk.data.path:
+            nltk.data.path.insert(0, Config.NLTK_DATA_DIR)
+        
+        status = {}
+        for resource, path in NLTK_RESOURCES.items():
             try:
-                nltk.data.find(f'tokenizers/{resource}')
-                logger.info(f"Ressource NLTK '{resource}' déjà téléchargée.")
+                nltk.data.find(path)
+                status[resource] = True
             except LookupError:
-                logger.info(f"Téléchargement de la ressource NLTK '{resource}'...")
-                nltk.download(resource)
-    except Exception as e:
-        logger.error(f"Erreur lors du téléchargement des ressources NLTK: {e}")
+                status[resource] = False
+                if mode == "download":
+                    logger.info(f"Téléchargement de la ressource NLTK '{resource}'...")
+                    status[resource] = bool(nltk.download(resource, quiet=True))
+        
+        missing = [resource for resource, available in status.items() if not available]
+        if missing:
+            hint = f"python -m nltk.downloader -d {Config.NLTK_DATA_DIR} {' '.join(missing)}"
+            if mode == "strict":
+                raise NLTKResourceError(f"Ressources NLTK absentes: {', '.join(missing)} (installation : {hint})")
+            logger.warning(f"Ressources NLTK absentes, analyse sans elles: {', '.join(missing)} (installation : {hint})")
+        _nltk_status = status
+        return status
+
+
+def load_stopwords():
+    """Stopwords français et anglais de NLTK (ensemble vide si le corpus est absent)"""
+    if not ensure_nltk_resources()['stopwords']:
+        return set()
+    from nltk.corpus import stopwords
+    try:
+        return set(stopwords.words('french') + stopwords.words('english'))
+    except (LookupError, OSError):
+        logger.warning("Impossibilité de charger les stopwords, utilisation d'un ensemble vide")
+        return set()
 
 
 class SentimentAnalyzer:
     """Service pour analyser les sentiments dans les textes"""
     
-    def __init__(self):
-        # S'assurer que les ressources NLTK sont disponibles
-        download_nltk_resources()
-        try:
-            self.stopwords = set(stopwords.words('french') + stopwords.words('english'))
-        except:
-            logger.warning("Impossibilité de charger les stopwords, utilisation d'un ensemble vide")
-            self.stopwords = set()
+    def __init__(self, use_cache=None, engine=None):
+        # Stopwords de NLTK (ressources vérifiées une seule fois par processus)
+        self.stopwords = load_stopwords()
+        
+        # Tokeniseur unique partagé par toutes les étapes de l'analyse
+        self.normalizer = TextNormalizer(self.stopwords)
+        
+        # Moteur anglais : TextBlob ou lexique anglais précompilé (mêmes scores)
+        self.engine = engine or Config.LOCAL_ENGINE
+        if self.engine not in LOCAL_ENGINES:
+            raise ValueError(f"Moteur local inconnu: {self.engine} (attendu: {', '.join(LOCAL_ENGINES)})")
+        
+        # Lexiques français compilés (phrases négatives comprises)
+        self._compile_lexicons()
+        
+        # Import différé : seul le moteur choisi est chargé
+        self.english_lexicon = None
+        self._textblob = None
+        if self.engine == "lexicon":
+            from app.services.english_lexicon import EnglishLexiconScorer
+            self.english_lexicon = EnglishLexiconScorer()
+        else:
+            from textblob import TextBlob
+            self._textblob = TextBlob
+        
+        # Cache des résultats (mémoire + base de données)
+        if use_cache is None:
+            use_cache = Config.CACHE_ENABLED
+        self.cache = None
+        if use_cache:
+            self.cache = SentimentCache(
+                self._cache_version(),
+                max_size=Config.CACHE_MAX_SIZE,
+                ttl=Config.CACHE_TTL,
+                persistent=PersistentCache(
+                    ttl=Config.CACHE_PERSISTENT_TTL,
+                    max_size=Config.CACHE_PERSISTENT_MAX_SIZE
+                ) if Config.CACHE_PERSISTENT else None
+            )
+            self._cache_openai_model = Config.OPENAI_MODEL
+        
+        # Client OpenAI partagé (pool de connexions), créé à la première utilisation
+        self._openai_client = None
+        
+        # Moteur parallèle pour les grands lots analysés localement
+        self.parallel_engine = ParallelBatchEngine(engine=self.engine)
+    
+    def _compile_lexicons(self):
+        """Compile les lexiques français pour l'analyse texte par texte et par lot"""
+        self.lexicon = LexiconMatcher(POSITIFS_FR, NEGATIFS_FR, NEGATIONS_FR)
+        self.lexicon_scorer = VectorizedLexiconScorer(POSITIFS_FR, NEGATIFS_FR, NEGATIONS_FR)
+        # Version enregistrée avec chaque analyse pour réutiliser les analyses stockées
+        self.model_version = self._cache_version()
+    
+    def _cache_version(self):
+        """Version du cache : dépend des lexiques français, du moteur local et du modèle OpenAI configuré"""
+        return compute_cache_version((POSITIFS_FR, NEGATIFS_FR, NEGATIONS_FR), Config.OPENAI_MODEL, self.engine)
+    
+    def invalidate_cache(self):
+        """
+        Invalide le cache après une modification de POSITIFS_FR, NEGATIFS_FR,
+        NEGATIONS_FR ou OPENAI_MODEL. Les lexiques sont recompilés. Renvoie le nombre
+        d'entrées persistantes supprimées.
+        """
+        self._compile_lexicons()
+        if self.cache is None:
+            return 0
+        self._cache_openai_model = Config.OPENAI_MODEL
+        return self.cache.invalidate(version=self._cache_version())
+    
+    def cache_stats(self):
+        """Renvoie les compteurs du cache (None si le cache est désactivé)"""
+        return self.cache.stats() if self.cache is not None else None
+    
+    def openai_stats(self):
+        """Renvoie l'état du contrôle d'admission OpenAI (None si le client n'a pas été créé)"""
+        client = self._openai_client
+        return client.admission.stats() if client is not None else None
+    
+    def _english_sentiment(self, clean_tokens):
+        """Renvoie (polarité, subjectivité) anglaises des tokens nettoyés avec le moteur choisi"""
+        if self.english_lexicon is not None:
+            return self.english_lexicon.score(clean_tokens)
+        blob_sentiment = self._textblob(" ".join(clean_tokens)).sentiment
+        return blob_sentiment.polarity, blob_sentiment.subjectivity
     
     def preprocess_text(self, text):
-        """Prétraite le texte avant l'analyse"""
+        """
+        Prétraite le texte avant l'analyse : minuscules, suppression des URLs, des
+        mentions et hashtags, de la ponctuation, des chiffres et des espaces multiples
+        """
         if not text:
             return ""
         
-        # Convertir en minuscules
-        text = text.lower()
-        
-        # Supprimer les URLs
-        text = re.sub(r'https?://\S+|www\.\S+', '', text)
-        
-        # Supprimer les mentions et hashtags
-        text = re.sub(r'@\w+|#\w+', '', text)
-        
-        # Supprimer les caractères non alphanumériques
-        text = re.sub(r'[^\w\s]', '', text)
-        
-        # Supprimer les chiffres
-        text = re.sub(r'\d+', '', text)
-        
-        # Supprimer les espaces multiples
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return " ".join(self.normalizer.clean_tokens(text.lower().split(), remove_stopwords=False))
     
     def remove_stopwords(self, text):
         """Supprime les mots vides du texte"""
@@ -104,124 +237,342 @@ class SentimentAnalyzer:
         """Analyse le sentiment en français en tenant compte des négations"""
         if not text:
             return 0
-            
-        # Tokenisation basique
-        words = text.lower().split()
-        
-        # Détection de séquences de mots incluant les négations
-        phrases = []
-        for i in range(len(words)):
-            # Ajouter des phrases de 2 à 4 mots à partir de la position actuelle
-            for j in range(2, min(5, len(words) - i + 1)):
-                phrases.append(" ".join(words[i:i+j]))
-        
-        # Compter les mots positifs et négatifs
-        positifs = sum(1 for word in words if word in POSITIFS_FR)
-        negatifs = sum(1 for word in words if word in NEGATIFS_FR)
-        
-        # Vérifier les phrases négatives spécifiques
-        for phrase in phrases:
-            if phrase in NEGATIFS_FR:
-                negatifs += 1
-        
-        # Détecter les expressions négatives (ex: "ne fonctionne pas")
-        has_negation = any(neg in words for neg in NEGATIONS_FR)
-        if has_negation:
-            # Chercher des mots positifs qui pourraient être inversés par la négation
-            negated_positives = sum(1 for word in words if word in POSITIFS_FR)
-            if negated_positives > 0:
-                # Convertir les mots positifs en négatifs s'ils sont niés
-                positifs -= negated_positives
-                negatifs += negated_positives
-                
-        # Calculer un score basé sur les mots français
-        if positifs > 0 or negatifs > 0:
-            return (positifs - negatifs) / (positifs + negatifs)
-        return 0
         
-    def analyze_sentiment_openai(self, text):
-        """Analyse le sentiment du texte en utilisant l'API OpenAI"""
-        if not Config.OPENAI_API_KEY:
-            logger.warning("Clé API OpenAI manquante")
-            return None
+        # Mêmes tokens que l'analyse locale, puis un seul parcours des tokens dans le trie des lexiques
+        return self.lexicon.score(self.normalizer.normalize(text).tokens)
+    
+    @property
+    def openai_client(self):
+        """Client OpenAI asynchrone partagé, créé à la première utilisation"""
+        if self._openai_client is None:
+            self._openai_client = OpenAIClient()
+        return self._openai_client
+    
+    def close(self):
+        """Libère les ressources du service (connexions OpenAI, processus de travail)"""
+        if self._openai_client is not None:
+            self._openai_client.close()
+            self._openai_client = None
+        self.parallel_engine.shutdown()
+    
+    def _openai_result(self, data):
+        """Convertit un objet JSON renvoyé par OpenAI en résultat d'analyse standardisé"""
+        # Standardiser les valeurs
+        sentiment = str(data.get('sentiment', 'neutre')).lower()
+        polarity = float(data.get('polarity', 0))
         
+        # Estimer la subjectivité en fonction de la polarité
+        subjectivity = abs(polarity) * 0.8
+        
+        return {
+            "polarity": polarity,
+            "subjectivity": subjectivity,
+            "sentiment": sentiment,
+            "model": Config.OPENAI_MODEL
+        }
+    
+    def _parse_openai_content(self, content):
+        """Convertit la réponse JSON d'OpenAI en résultat d'analyse standardisé"""
+        try:
+            return self._openai_result(json.loads(content))
+        except json.JSONDecodeError:
+            logger.error(f"Erreur lors du décodage de la réponse JSON: {content}")
+            return None
+    
+    async def analyze_sentiment_openai_async(self, text):
+        """Analyse le sentiment du texte avec OpenAI (coroutine exécutée dans la boucle du client)"""
         try:
-            # Créer un client OpenAI
-            client = OpenAI(api_key=Config.OPENAI_API_KEY)
-            
             # Construire le prompt pour l'analyse de sentiment
             prompt = [
-                {"role": "system", "content": "Vous êtes un expert en analyse de sentiment. Analysez le sentiment du texte et répondez uniquement avec un objet JSON contenant 'sentiment' (positif, négatif ou neutre) et 'polarity' (valeur entre -1 et 1)."},
+                {"role": "system", "content": OPENAI_SYSTEM_PROMPT},
                 {"role": "user", "content": f"Texte à analyser: {text}"}
             ]
             
             # Appeler l'API OpenAI
-            response = client.chat.completions.create(
-                model=Config.OPENAI_MODEL,
-                messages=prompt,
-                temperature=0,
-                max_tokens=100
-            )
-            
-            # Extraire la réponse
-            content = response.choices[0].message.content
-            
-            # Convertir la réponse JSON en dictionnaire Python
-            try:
-                result = json.loads(content)
-                # Standardiser les valeurs
-                sentiment = result.get('sentiment', 'neutre').lower()
-                polarity = float(result.get('polarity', 0))
-                
-                # Estimer la subjectivité en fonction de la polarité
-                subjectivity = abs(polarity) * 0.8
-                
-                return {
-                    "polarity": polarity,
-                    "subjectivity": subjectivity,
-                    "sentiment": sentiment,
-                    "model": Config.OPENAI_MODEL
-                }
-            except json.JSONDecodeError:
-                logger.error(f"Erreur lors du décodage de la réponse JSON: {content}")
-                return None
-            
+            content = await self.openai_client.complete(prompt, max_tokens=100)
+            result = self._parse_openai_content(content)
+            OPENAI_REQUESTS.labels("success" if result is not None else "invalid").inc()
+            return result
+        
+        except OpenAIUnavailableError:
+            # Appel refusé par le contrôle d'admission : bascule immédiate vers le modèle local
+            OPENAI_REQUESTS.labels("rejected").inc()
+            return None
         except Exception as e:
-            logger.error(f"Erreur lors de l'analyse avec OpenAI: {e}")
+            OPENAI_REQUESTS.labels("error").inc()
+            logger.error(f"Erreur lors de l'analyse avec OpenAI: {e!r}")
             return None
-
+    
+    def analyze_sentiment_openai(self, text):
+        """Analyse le sentiment du texte en utilisant l'API OpenAI"""
+        if not Config.OPENAI_API_KEY:
+            logger.warning("Clé API OpenAI manquante")
+            return None
+        
+        with timed("analyze.openai"):
+            return self.openai_client.run(lambda: self.analyze_sentiment_openai_async(text))
+    
+    async def analyze_sentiment_openai_packed_async(self, texts, retries=None):
+        """
+        Analyse plusieurs textes en un seul appel OpenAI (mode groupé). Les textes dont
+        la réponse est absente ou invalide sont renvoyés à OpenAI, au plus `retries` fois.
+        """
+        if retries is None:
+            retries = Config.OPENAI_PACK_MAX_RETRIES
+        if len(texts) == 1:
+            return [await self.analyze_sentiment_openai_async(texts[0])]
+        
+        try:
+            content = await self.openai_client.complete(
+                build_packed_messages(texts), max_tokens=packed_max_tokens(len(texts))
+            )
+            items = parse_packed_content(content, len(texts))
+            # Réponse illisible ou incomplète : comptée comme invalide (les textes manquants sont renvoyés)
+            complete = items is not None and all(item is not None for item in items)
+            OPENAI_REQUESTS.labels("success" if complete else "invalid").inc()
+            if items is None:
+                items = [None] * len(texts)
+        except OpenAIUnavailableError:
+            # Inutile de renvoyer les textes : les nouvelles tentatives seraient refusées aussi
+            OPENAI_REQUESTS.labels("rejected").inc()
+            return [None] * len(texts)
+        except Exception as e:
+            OPENAI_REQUESTS.labels("error").inc()
+            logger.error(f"Erreur lors de l'analyse groupée avec OpenAI: {e!r}")
+            items = [None] * len(texts)
+        
+        results = []
+        for item in items:
+            try:
+                results.append(self._openai_result(item) if item is not None else None)
+            except (TypeError, ValueError):
+                results.append(None)
+        
+        failed = [i for i, result in enumerate(results) if result is None]
+        if failed and retries > 0:
+            retried = await self.analyze_sentiment_openai_packed_async(
+                [texts[i] for i in failed], retries=retries - 1
+            )
+            for i, result in zip(failed, retried):
+                results[i] = result
+        return results
+    
+    def analyze_sentiment_openai_many(self, texts, packed=None):
+        """
+        Analyse plusieurs textes avec OpenAI en parallèle (concurrence bornée par
+        OPENAI_MAX_CONCURRENCY). En mode groupé (OPENAI_PACKED), les textes sont
+        regroupés en lots bornés par OPENAI_PACK_TOKEN_BUDGET, un appel par lot.
+        Les résultats sont renvoyés dans l'ordre des textes, avec None pour les
+        textes dont l'analyse a échoué.
+        """
+        if not texts:
+            return []
+        if not Config.OPENAI_API_KEY:
+            logger.warning("Clé API OpenAI manquante")
+            return [None] * len(texts)
+        if packed is None:
+            packed = Config.OPENAI_PACKED
+        
+        client = self.openai_client
+        if not packed:
+            with timed("analyze.openai"):
+                results = client.run(
+                    lambda: client.gather([self.analyze_sentiment_openai_async(text) for text in texts])
+                )
+            return [result if isinstance(result, dict) else None for result in results]
+        
+        packs = pack_texts(texts, Config.OPENAI_PACK_TOKEN_BUDGET, Config.OPENAI_PACK_MAX_TEXTS)
+        with timed("analyze.openai"):
+            pack_results = client.run(lambda: client.gather([
+                self.analyze_sentiment_openai_packed_async([texts[i] for i in pack]) for pack in packs
+            ]))
+        results = [None] * len(texts)
+        for pack, pack_result in zip(packs, pack_results):
+            if isinstance(pack_result, list):
+                for i, result in zip(pack, pack_result):
+                    results[i] = result
+        return results
+    
     def analyze_sentiment(self, text, use_openai=None):
         """Analyse le sentiment du texte en combinant TextBlob et une approche basée sur les mots clés"""
         # Déterminer si on utilise OpenAI
         if use_openai is None:
             use_openai = Config.USE_OPENAI
         
+        cache = self.cache
+        if cache is not None and self._cache_openai_model != Config.OPENAI_MODEL:
+            # Le modèle OpenAI a changé : les anciens résultats ne sont plus valides
+            self.invalidate_cache()
+        
         # Si OpenAI est activé, tenter l'analyse avec OpenAI d'abord
         if use_openai:
+            if cache is not None:
+                with timed("analyze.cache"):
+                    cached = cache.get(text, Config.OPENAI_MODEL)
+                if cached is not None:
+                    return cached
             openai_result = self.analyze_sentiment_openai(text)
             if openai_result:
+                if cache is not None:
+                    with timed("analyze.cache"):
+                        cache.set(text, Config.OPENAI_MODEL, openai_result)
                 return openai_result
+            OPENAI_FALLBACKS.inc()
+        
+        if cache is None:
+            with timed("analyze.local"):
+                return self.analyze_sentiment_local(text)
+        
+        with timed("analyze.cache"):
+            result = cache.get(text, "local")
+        if result is None:
+            with timed("analyze.local"):
+                result = self.analyze_sentiment_local(text)
+            with timed("analyze.cache"):
+                cache.set(text, "local", result)
+        return result
+    
+    def analyze_sentiment_batch(self, texts, use_openai=None, checked_model=None):
+        """
+        Analyse un lot de textes. Les appels OpenAI sont effectués en parallèle et
+        les textes pour lesquels OpenAI échoue sont analysés avec le modèle local.
+        Les résultats sont renvoyés dans l'ordre des textes.
+        
+        `checked_model` : modèle dont l'appelant a déjà consulté le cache pour ces
+        textes (sans résultat) ; ce cache n'est pas consulté une seconde fois.
+        """
+        if use_openai is None:
+            use_openai = Config.USE_OPENAI
+        
+        cache = self.cache
+        if cache is not None and self._cache_openai_model != Config.OPENAI_MODEL:
+            self.invalidate_cache()
         
-        # Prétraitement du texte mais conserve le texte original pour l'analyse des négations
-        original_text = text.lower()
-        preprocessed_text = self.preprocess_text(text)
-        clean_text = self.remove_stopwords(preprocessed_text)
+        BATCH_SIZE.labels("analyze").observe(len(texts))
+        results = [None] * len(texts)
         
+        # Le cache est consulté et alimenté une fois par lot (une requête et une
+        # transaction pour le cache persistant), et non texte par texte
+        if use_openai:
+            if checked_model != Config.OPENAI_MODEL:
+                results = self._cached_batch(texts, Config.OPENAI_MODEL)
+            pending = [i for i, result in enumerate(results) if result is None]
+            
+            openai_results = self.analyze_sentiment_openai_many([texts[i] for i in pending])
+            analyzed = []
+            failed = 0
+            for i, openai_result in zip(pending, openai_results):
+                if openai_result:
+                    results[i] = openai_result
+                    analyzed.append((texts[i], openai_result))
+                else:
+                    failed += 1
+            if failed:
+                OPENAI_FALLBACKS.inc(failed)
+            self._cache_batch(analyzed, Config.OPENAI_MODEL)
+        
+        # Textes restants : cache local puis modèle local (en parallèle pour les grands lots)
+        remaining = [i for i, result in enumerate(results) if result is None]
+        if checked_model != "local":
+            for i, cached in zip(remaining, self._cached_batch([texts[i] for i in remaining], "local")):
+                results[i] = cached
+        pending = [i for i in remaining if results[i] is None]
+        
+        with timed("analyze.local"):
+            local_results = self.parallel_engine.analyze([texts[i] for i in pending], self.analyze_sentiment_local_batch)
+        for i, local_result in zip(pending, local_results):
+            results[i] = local_result
+        self._cache_batch([(texts[i], results[i]) for i in pending], "local")
+        
+        return results
+    
+    def _cached_batch(self, texts, model):
+        """Résultats en cache pour un lot de textes (None pour les absents, ou pour tous sans cache)"""
+        if self.cache is None or not texts:
+            return [None] * len(texts)
+        with timed("analyze.cache"):
+            return self.cache.get_many(texts, model)
+    
+    def _cache_batch(self, items, model):
+        """Met en cache des couples (texte, résultat) d'un lot"""
+        if self.cache is not None and items:
+            with timed("analyze.cache"):
+                self.cache.set_many(items, model)
+    
+    def analyze_sentiment_local(self, text):
+        """Analyse le sentiment du texte avec le modèle local (TextBlob et lexiques français)"""
+        with timed("local.preprocess"):
+            normalized = self.normalizer.normalize(text)
+        return self._score_normalized(normalized)
+    
+    def analyze_sentiment_local_batch(self, texts):
+        """
+        Analyse un lot de textes avec le modèle local. Le score français et les règles
+        de combinaison sont calculés pour tout le lot avec NumPy ; seul TextBlob reste
+        appelé texte par texte.
+        """
+        with timed("local.preprocess"):
+            normalized_texts = self.normalizer.normalize_batch(texts)
+        results = [None] * len(texts)
+        
+        # Les textes vides après prétraitement reçoivent des valeurs neutres
+        indices = []
+        for i, normalized in enumerate(normalized_texts):
+            if normalized.clean_tokens:
+                indices.append(i)
+            else:
+                results[i] = {"polarity": 0.0, "subjectivity": 0.0, "sentiment": "neutre", "model": "local"}
+        if not indices:
+            return results
+        
+        # Analyse anglaise (TextBlob ou lexique précompilé)
+        polarity_en = []
+        subjectivities = []
+        english_sentiment = self._english_sentiment
+        with timed("local.english"):
+            for i in indices:
+                polarity, subjectivity = english_sentiment(normalized_texts[i].clean_tokens)
+                polarity_en.append(polarity)
+                subjectivities.append(subjectivity)
+        
+        # Score français et négations pour tout le lot
+        with timed("local.french"):
+            polarity_fr, has_negation = self.lexicon_scorer.score_batch([normalized_texts[i].tokens for i in indices])
+            explicit_negative = [
+                "ne fonctionne pas" in normalized_texts[i].lowered or "pas correctement" in normalized_texts[i].lowered
+                for i in indices
+            ]
+            polarities, sentiments = combine_local_scores(polarity_en, polarity_fr, has_negation, explicit_negative)
+        
+        for i, polarity, subjectivity, sentiment in zip(indices, polarities.tolist(), subjectivities, sentiments.tolist()):
+            results[i] = {
+                "polarity": polarity,
+                "subjectivity": subjectivity,
+                "sentiment": sentiment,
+                "model": "local"
+            }
+        return results
+    
+    def _score_normalized(self, normalized):
+        """Calcule le résultat local à partir d'un texte normalisé une seule fois"""
+        # Les tokens nettoyés servent à l'analyse anglaise, les tokens bruts à l'analyse des négations
         # Si le texte est vide après prétraitement, retourner des valeurs neutres
-        if not clean_text:
+        if not normalized.clean_tokens:
             return {"polarity": 0.0, "subjectivity": 0.0, "sentiment": "neutre", "model": "local"}
         
-        # Analyse avec TextBlob (principalement pour l'anglais)
-        blob = TextBlob(clean_text)
-        polarity_en = blob.sentiment.polarity
-        subjectivity = blob.sentiment.subjectivity
+        # Analyse anglaise (TextBlob ou lexique précompilé)
+        with timed("local.english"):
+            polarity_en, subjectivity = self._english_sentiment(normalized.clean_tokens)
         
-        # Analyse avec notre approche pour le français
-        polarity_fr = self.analyze_sentiment_fr(original_text)
+        # Analyse avec notre approche pour le français (négations comprises)
+        with timed("local.french"):
+            counts = self.lexicon.count(normalized.tokens)
+            polarity_fr = self.lexicon.score_counts(counts)
         
         # Détection spécifique de négations
-        has_negation_words = any(neg in original_text.split() for neg in NEGATIONS_FR)
+        has_negation_words = counts.has_negation
         # Vérification explicite des expressions comme "ne fonctionne pas"
+        original_text = normalized.lowered
         explicit_negative = "ne fonctionne pas" in original_text or "pas correctement" in original_text
         
         # Pondération: donner plus d'importance à l'analyse française et aux négations détectées
@@ -246,80 +597,98 @@ class SentimentAnalyzer:
             "model": "local"
         }
     
-    def create_sentiment_visualization(self, texts, output_dir="app/static/images"):
-        """Crée des visualisations de l'analyse de sentiment"""
-        if not texts:
-            logger.warning("Aucun texte fourni pour la visualisation")
+    def create_sentiment_visualization(self, texts, results=None):
+        """
+        Crée des visualisations de l'analyse de sentiment et renvoie leurs URLs.
+        
+        Le rendu est effectué en arrière-plan par le pool de rendu des graphiques ;
+        des scores identiques réutilisent les images déjà produites.
+        
+        Si les résultats de l'analyse sont déjà connus, les passer via `results`
+        évite une seconde analyse des textes et garantit que les graphiques
+        correspondent au modèle réellement utilisé.
+        """
+        if results is None:
+            if not texts:
+                logger.warning("Aucun texte fourni pour la visualisation")
+                return None
+            
+            # Analyser tous les textes
+            results = [self.analyze_sentiment(text) for text in texts]
+        elif not results:
+            logger.warning("Aucun résultat fourni pour la visualisation")
             return None
         
-        # Analyser tous les textes
-        results = [self.analyze_sentiment(text) for text in texts]
-        
-        # Créer un DataFrame pour faciliter la manipulation des données
-        df = pd.DataFrame({
-            'polarity': [r['polarity'] for r in results],
-            'subjectivity': [r['subjectivity'] for r in results],
-            'sentiment': [r['sentiment'] for r in results]
-        })
-        
-        # S'assurer que le répertoire de sortie existe
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # 1. Distribution des polarités
-        plt.figure(figsize=(10, 6))
-        plt.hist(df['polarity'], bins=20, color='skyblue', edgecolor='black')
-        plt.title('Distribution des polarités')
-        plt.xlabel('Polarité')
-        plt.ylabel('Fréquence')
-        plt.grid(True, alpha=0.3)
-        plt.savefig(os.path.join(output_dir, 'polarity_distribution.png'))
-        
-        # 2. Distribution des subjectivités
-        plt.figure(figsize=(10, 6))
-        plt.hist(df['subjectivity'], bins=20, color='lightgreen', edgecolor='black')
-        plt.title('Distribution des subjectivités')
-        plt.xlabel('Subjectivité')
-        plt.ylabel('Fréquence')
-        plt.grid(True, alpha=0.3)
-        plt.savefig(os.path.join(output_dir, 'subjectivity_distribution.png'))
-        
-        # 3. Graphique de dispersion polarité vs subjectivité
-        plt.figure(figsize=(10, 6))
-        colors = {'positif': 'green', 'neutre': 'blue', 'négatif': 'red'}
-        for sentiment in df['sentiment'].unique():
-            subset = df[df['sentiment'] == sentiment]
-            plt.scatter(
-                subset['polarity'],
-                subset['subjectivity'],
-                c=colors.get(sentiment, 'gray'),
-                label=sentiment,
-                alpha=0.6
-            )
-        plt.title('Polarité vs Subjectivité')
-        plt.xlabel('Polarité')
-        plt.ylabel('Subjectivité')
-        plt.legend()
-        plt.grid(True, alpha=0.3)
-        plt.savefig(os.path.join(output_dir, 'polarity_vs_subjectivity.png'))
-        
-        # 4. Camembert des sentiments
-        sentiment_counts = df['sentiment'].value_counts()
-        plt.figure(figsize=(8, 8))
-        plt.pie(
-            sentiment_counts,
-            labels=sentiment_counts.index,
-            autopct='%1.1f%%',
-            colors=['green', 'blue', 'red'],
-            startangle=90
-        )
-        plt.title('Répartition des sentiments')
-        plt.savefig(os.path.join(output_dir, 'sentiment_pie.png'))
-        
-        plt.close('all')
-        
-        return {
-            'polarity_distribution': os.path.join(output_dir, 'polarity_distribution.png'),
-            'subjectivity_distribution': os.path.join(output_dir, 'subjectivity_distribution.png'),
-            'polarity_vs_subjectivity': os.path.join(output_dir, 'polarity_vs_subjectivity.png'),
-            'sentiment_pie': os.path.join(output_dir, 'sentiment_pie.png')
-        }
+        with timed("chart.submit"):
+            return chart_renderer.submit(results)
+
+
+# Analyseur propre à chaque processus de travail du moteur parallèle
+_worker_analyzer = None
+
+
+def _init_worker(engine=None):
+    """Charge une seule fois par processus les stopwords et les lexiques"""
+    global _worker_analyzer
+    _worker_analyzer = SentimentAnalyzer(use_cache=False, engine=engine)
+
+
+def _analyze_chunk(texts):
+    """Analyse un fragment de lot avec le modèle local (exécuté dans un processus de travail)"""
+    return _worker_analyzer.analyze_sentiment_local_batch(texts)
+
+
+class ParallelBatchEngine:
+    """
+    Répartit l'analyse locale des grands lots sur un pool de processus persistant.
+    
+    Les lots plus petits que `threshold` sont analysés en série dans le processus
+    courant : le coût de sérialisation vers les processus n'y serait pas amorti.
+    """
+    
+    def __init__(self, workers=None, threshold=None, chunk_size=None, engine=None):
+        self.workers = workers if workers is not None else Config.PARALLEL_WORKERS
+        self.threshold = threshold if threshold is not None else Config.PARALLEL_BATCH_THRESHOLD
+        self.chunk_size = chunk_size or Config.PARALLEL_CHUNK_SIZE
+        self.engine = engine
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self):
+        return self.workers > 1
+    
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # "spawn" : les processus ne doivent pas hériter des threads (client OpenAI, écriture différée)
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.engine,)
+                    )
+        return self._executor
+    
+    def analyze(self, texts, serial_analyze):
+        """
+        Analyse les textes et renvoie les résultats dans l'ordre. `serial_analyze`
+        (qui reçoit le lot entier) est utilisée pour les petits lots ou si le moteur
+        est désactivé.
+        """
+        if not self.enabled or len(texts) < self.threshold:
+            return serial_analyze(texts)
+        
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        results = []
+        for chunk_results in self._get_executor().map(_analyze_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+    
+    def shutdown(self):
+        """Arrête les processus de travail"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
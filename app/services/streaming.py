@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+from app.services.persistence import persist_results, analyze_with_stored_results, QueueFullError
+
+# Configurer le logger
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Types de contenu reconnus comme un corps NDJSON (un texte par ligne)
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines")
+
+
+def parse_ndjson_line(line):
+    """
+    Extrait le texte d'une ligne NDJSON : chaîne JSON ("texte") ou objet ({"text": "texte"}).
+    Lève ValueError si la ligne est invalide ou si le texte est vide.
+    """
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON invalide: {e.msg}")
+    if isinstance(item, dict):
+        item = item.get("text")
+    if not isinstance(item, str):
+        raise ValueError("Chaque ligne doit être une chaîne ou un objet {\"text\": ...}")
+    if not item:
+        raise ValueError("Le texte ne peut pas être vide")
+    return item
+
+
+async def spool_body(chunks, directory=None):
+    """
+    Copie un corps reçu par morceaux (octets) dans un fichier temporaire et renvoie
+    son chemin ; l'appelant le supprime après usage.
+    
+    Le corps d'une réponse en flux doit être lu avant le début de la réponse :
+    pendant son envoi, Starlette lit lui-même les messages de la requête pour
+    détecter la déconnexion du client, et une lecture concurrente du corps ne
+    recevrait jamais la fin du corps.
+    """
+    fd, path = tempfile.mkstemp(suffix=".ndjson", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            async for chunk in chunks:
+                spool.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+async def iter_file_chunks(path, size=64 * 1024):
+    """Lit un fichier par morceaux d'octets, sans bloquer la boucle d'événements"""
+    with open(path, "rb") as source:
+        while True:
+            chunk = await asyncio.to_thread(source.read, size)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def iter_ndjson_lines(chunks):
+    """
+    Découpe en lignes un corps reçu par morceaux (octets). Seule la ligne en cours
+    est conservée en mémoire ; les lignes vides sont ignorées.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield line.decode("utf-8")
+    buffer = buffer.strip()
+    if buffer:
+        yield buffer.decode("utf-8")
+
+
+async def iter_ndjson_texts(chunks):
+    """Renvoie (texte, erreur) pour chaque ligne d'un corps NDJSON, l'un des deux étant None"""
+    async for line in iter_ndjson_lines(chunks):
+        try:
+            yield parse_ndjson_line(line), None
+        except ValueError as e:
+            yield None, str(e)
+
+
+async def iter_list_texts(texts):
+    """Adapte une liste de textes déjà validée au format de iter_ndjson_texts"""
+    for text in texts:
+        yield text, None
+
+
+def _dump_line(payload):
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class StreamingAnalysis:
+    """
+    Analyse en flux : les textes sont lus au fur et à mesure, analysés et enregistrés
+    par fragments de `chunk_size`, et chaque résultat est émis sous forme d'une ligne
+    NDJSON dès que son fragment est terminé. La mémoire utilisée est bornée par la
+    taille d'un fragment, quelle que soit la taille de l'entrée.
+    """
+
+    def __init__(self, analyzer, session_factory, writer=None, chunk_size=50, use_openai=False, source=None):
+        self.analyzer = analyzer
+        self.session_factory = session_factory
+        self.writer = writer
+        self.chunk_size = max(1, chunk_size)
+        self.use_openai = use_openai
+        self.source = source
+        self.model_version = getattr(analyzer, "model_version", None)
+
+    def _persist(self, texts, results):
+        """Enregistre un fragment : file d'écriture différée si elle tourne, sinon une transaction"""
+        if self.writer is not None and self.writer.running:
+            for i, (text, result) in enumerate(zip(texts, results)):
+                try:
+                    self.writer.submit(text, result, source=self.source, model_version=self.model_version)
+                except QueueFullError:
+                    # File saturée : le reste du fragment est écrit directement (contre-pression)
+                    texts, results = texts[i:], results[i:]
+                    break
+            else:
+                return
+        db = self.session_factory()
+        try:
+            persist_results(db, texts, results, source=self.source, model_version=self.model_version)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _process_chunk(self, texts):
+        """Analyse et enregistre un fragment (exécuté hors de la boucle d'événements)"""
+        db = self.session_factory()
+        try:
+            results = analyze_with_stored_results(db, self.analyzer, texts, use_openai=self.use_openai)
+        finally:
+            db.close()
+        self._persist(texts, results)
+        return results
+
+    async def _flush(self, indices, texts):
+        results = await asyncio.to_thread(self._process_chunk, texts)
+        lines = []
+        for index, text, result in zip(indices, texts, results):
+            lines.append(_dump_line({
+                "index": index,
+                "text": text,
+                "polarity": result["polarity"],
+                "subjectivity": result["subjectivity"],
+                "sentiment": result["sentiment"],
+                "model": result.get("model", "local")
+            }))
+        return b"".join(lines)
+
+    async def run(self, items):
+        """
+        Consomme les couples (texte, erreur) de `items` et produit les lignes NDJSON.
+        Une entrée invalide donne une ligne {"index", "error"} sans interrompre le flux ;
+        une erreur d'analyse ou d'enregistrement termine le flux par une ligne {"error"}.
+        """
+        indices = []
+        texts = []
+        index = 0
+        try:
+            async for text, error in items:
+                if error is not None:
+                    yield _dump_line({"index": index, "error": error})
+                else:
+                    indices.append(index)
+                    texts.append(text)
+                    if len(texts) >= self.chunk_size:
+                        yield await self._flush(indices, texts)
+                        indices, texts = [], []
+                index += 1
+            if texts:
+                yield await self._flush(indices, texts)
+        except Exception as e:
+            logger.error(f"Erreur lors de l'analyse en flux (entrée {index}): {e!r}")
+            yield _dump_line({"error": "Erreur lors de l'analyse du flux"})
@@ -0,0 +1,65 @@
+from collections import namedtuple
+import re
+
+# URLs (toujours supprimées en premier : elles contiennent de la ponctuation)
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+
+# Mentions, hashtags, caractères non alphanumériques et chiffres, en une seule passe
+CLEAN_PATTERN = re.compile(r'@\w+|#\w+|[^\w\s]|\d+')
+
+
+class NormalizedText(namedtuple("NormalizedText", ["lowered", "tokens", "clean_tokens"])):
+    """
+    Résultat de la normalisation d'un texte :
+    - lowered : le texte en minuscules (détection des expressions négatives) ;
+    - tokens : les tokens bruts en minuscules (lexiques français et négations) ;
+    - clean_tokens : les tokens nettoyés, sans mots vides (TextBlob).
+    """
+    __slots__ = ()
+
+    @property
+    def clean_text(self):
+        return " ".join(self.clean_tokens)
+
+
+class TextNormalizer:
+    """
+    Tokeniseur unique partagé par toutes les étapes de l'analyse.
+
+    Le texte est mis en minuscules et découpé une seule fois. Les règles de
+    `preprocess_text` ne suppriment jamais d'espace : elles s'appliquent donc
+    token par token, et les tokens purement alphabétiques (la grande majorité)
+    n'ont besoin d'aucune expression régulière.
+    """
+
+    def __init__(self, stopwords=frozenset()):
+        self.stopwords = stopwords
+
+    @staticmethod
+    def clean_token(token):
+        """Nettoie un token en minuscules ; renvoie une chaîne vide s'il ne reste rien"""
+        if token.isalpha():
+            return token
+        return CLEAN_PATTERN.sub('', URL_PATTERN.sub('', token))
+
+    def clean_tokens(self, tokens, remove_stopwords=True):
+        """Nettoie des tokens bruts et retire les tokens vides (et les mots vides)"""
+        clean_token = self.clean_token
+        stopwords = self.stopwords if remove_stopwords else ()
+        cleaned = []
+        for token in tokens:
+            token = clean_token(token)
+            if token and token not in stopwords:
+                cleaned.append(token)
+        return cleaned
+
+    def normalize(self, text):
+        """Normalise un texte en une seule passe"""
+        lowered = text.lower() if text else ""
+        tokens = lowered.split()
+        return NormalizedText(lowered, tokens, self.clean_tokens(tokens))
+
+    def normalize_batch(self, texts):
+        """Normalise un lot de textes"""
+        normalize = self.normalize
+        return [normalize(text) for text in texts]
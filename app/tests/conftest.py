@@ -0,0 +1,5 @@
+import os
+
+# Les tests ne doivent pas écrire dans la base de données de l'application
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test_sentiment_analysis.db")
+os.environ.setdefault("CACHE_PERSISTENT", "false")
@@ -0,0 +1,117 @@
+"""Serveur HTTP local imitant l'API de complétion d'OpenAI, pour les tests"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def default_responder(messages):
+    """Répond positif si le texte contient 'content', négatif sinon"""
+    text = messages[-1]["content"]
+    if "content" in text:
+        return json.dumps({"sentiment": "positif", "polarity": 0.8})
+    return json.dumps({"sentiment": "négatif", "polarity": -0.6})
+
+
+# Durée pendant laquelle une requête en panne "timeout" reste sans réponse, en secondes
+TIMEOUT_FAULT_DELAY = 2.0
+
+
+class _StubServer(ThreadingHTTPServer):
+    # File d'attente plus longue que la valeur par défaut (5) pour les connexions simultanées
+    request_queue_size = 128
+    daemon_threads = True
+
+
+class OpenAIStub:
+    """
+    Démarre un serveur sur un port libre. `responder(messages)` renvoie le contenu
+    du message de l'assistant ; `delay` simule la latence de l'API.
+
+    Pannes injectées : `faults` donne, dans l'ordre, la panne de chacune des
+    premières requêtes (code HTTP d'erreur comme 429 ou 503, "timeout" pour une
+    réponse trop tardive, None pour une réponse normale) ; `outage`, modifiable en
+    cours de test, s'applique ensuite à toutes les requêtes.
+    """
+
+    def __init__(self, responder=default_responder, delay=0.0, faults=None):
+        self.responder = responder
+        self.delay = delay
+        self.faults = list(faults or [])
+        self.outage = None
+        self.requests = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = _StubServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub._lock:
+                    stub.requests.append(body)
+                    stub._in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub._in_flight)
+                    fault = stub.faults.pop(0) if stub.faults else stub.outage
+                try:
+                    if stub.delay:
+                        time.sleep(stub.delay)
+                    if fault == "timeout":
+                        time.sleep(TIMEOUT_FAULT_DELAY)
+                    if isinstance(fault, int):
+                        status, payload = fault, {"error": {"message": "Panne simulée", "type": "stub_error", "code": fault}}
+                    else:
+                        status, payload = stub.handle(body)
+                finally:
+                    with stub._lock:
+                        stub._in_flight -= 1
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Le client a abandonné la requête (délai dépassé)
+                    pass
+
+        return Handler
+
+    def handle(self, body):
+        """Construit la réponse (code HTTP, corps JSON) à une requête de complétion"""
+        content = self.responder(body["messages"])
+        return 200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        }
@@ -1,17 +1,26 @@
 import os
+import json
+import threading
 import pytest
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.models.database import Base, get_db
+from app.api import sentiment_analysis
+from app.models.database import Base, get_db, get_session_factory, get_async_db, get_async_session_factory
 from app.services.sentiment_analyzer import SentimentAnalyzer
 
 # Créer une base de données de test en mémoire
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_db.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Même base pour les routes asynchrones ; NullPool car TestClient peut changer de boucle d'événements
+async_engine = create_async_engine("sqlite+aiosqlite:///./test_db.db", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 # Remplacer la dépendance de base de données
@@ -24,6 +33,16 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_session_factory] = lambda: TestingSessionLocal
+
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_async_session_factory] = lambda: TestingAsyncSessionLocal
 
 client = TestClient(app)
 
@@ -69,6 +88,10 @@ def test_analyze_sentiment_batch(test_db):
     data = response.json()
     assert "results" in data
     assert len(data["results"]) == 3
+    # Les URLs des graphiques sont renvoyées avant la fin du rendu, qui est attendu au téléchargement
+    chart = client.get(data["visualization_urls"]["sentiment_pie"])
+    assert chart.status_code == 200
+    assert chart.headers["content-type"] == "image/png"
     for result in data["results"]:
         assert "sentiment" in result
         assert "polarity" in result
@@ -120,3 +143,196 @@ def test_sentiment_analyzer_class():
     
     result = analyzer.analyze_sentiment("Ceci est un test.")
     assert "polarity" in result
+
+
+def test_batch_analyzes_each_text_once(test_db):
+    """Le lot ne doit analyser chaque texte qu'une seule fois (visualisations comprises)"""
+    texts = ["Un texte unique pour le comptage", "Un autre texte unique pour le comptage"]
+    analyzer = sentiment_analysis.get_sentiment_analyzer()
+    with patch.object(analyzer, "analyze_sentiment_local_batch", wraps=analyzer.analyze_sentiment_local_batch) as analyze:
+        response = client.post("/api/analyze/batch", json={"texts": texts})
+    assert response.status_code == 200
+    assert sum(len(call.args[0]) for call in analyze.call_args_list) == len(texts)
+
+
+def test_stored_analysis_is_not_recomputed(test_db):
+    """Un texte déjà analysé (même modèle et même version) est repris de la base sans être analysé"""
+    text = "Un texte déjà enregistré pour la réutilisation"
+    first = client.post("/api/analyze", json={"text": text})
+    analyzer = sentiment_analysis.get_sentiment_analyzer()
+    with patch.object(analyzer, "analyze_sentiment_batch", wraps=analyzer.analyze_sentiment_batch) as analyze:
+        second = client.post("/api/analyze/batch?charts=none", json={"texts": [text, "Un texte encore inconnu"]})
+    assert second.status_code == 200
+    assert second.json()["results"][0] == first.json()
+    assert [call.args[0] for call in analyze.call_args_list] == [["Un texte encore inconnu"]]
+
+
+def test_analyze_stream_json_list(test_db):
+    """Le flux accepte une liste JSON et renvoie une ligne NDJSON par texte"""
+    texts = ["Je suis très content de cette application !", "Ce service ne fonctionne pas correctement."]
+    response = client.post("/api/analyze/stream?chunk_size=1", json=texts)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1]
+    assert [line["text"] for line in lines] == texts
+    for line in lines:
+        assert line["sentiment"] in ["positif", "négatif", "neutre"]
+
+
+def post_with_timeout(url, timeout=30, **kwargs):
+    """Envoie la requête dans un thread : un blocage fait échouer le test au lieu de le suspendre"""
+    outcome = {}
+    
+    def send():
+        try:
+            outcome["response"] = client.post(url, **kwargs)
+        except Exception as e:
+            outcome["error"] = e
+    
+    thread = threading.Thread(target=send, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), f"Aucune réponse de {url} après {timeout} s"
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["response"]
+
+
+def test_analyze_stream_ndjson_body(test_db):
+    """Le flux accepte un corps NDJSON et signale les lignes invalides sans s'interrompre"""
+    body = '"Je suis très content !"\n{"text": "Je suis très déçu !"}\nnot json\n'
+    response = post_with_timeout(
+        "/api/analyze/stream",
+        content=body.encode("utf-8"),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["index"] == 2 and "error" in lines[0]
+    assert [line["sentiment"] for line in lines[1:]] == ["positif", "négatif"]
+
+
+def test_analyze_stream_invalid_json(test_db):
+    """Un corps JSON invalide ou vide est rejeté avant le début du flux"""
+    assert client.post("/api/analyze/stream", json=[]).status_code == 422
+    response = client.post("/api/analyze/stream", content=b"{", headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+
+def test_analyze_file_csv(test_db):
+    """Un fichier CSV envoyé dans le corps est analysé et ses résultats téléchargeables"""
+    body = "text\nJe suis très content !\nJe suis très déçu !\n"
+    response = client.post(
+        "/api/analyze/file",
+        content=body.encode("utf-8"),
+        headers={"Content-Type": "text/csv"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rows"] == 2 and data["analyzed"] == 2
+    assert data["rows_per_second"] > 0
+    download = client.get(data["output_url"])
+    assert download.status_code == 200
+    assert download.text.splitlines()[0] == "text,polarity,subjectivity,sentiment,model"
+    os.remove(os.path.join(sentiment_analysis.OUTPUT_DIR, data["output_url"].rsplit("/", 1)[1]))
+
+
+def test_analyze_file_errors(test_db):
+    """Format inconnu, colonne absente et nom de fichier invalide sont rejetés"""
+    assert client.post("/api/analyze/file", content=b"a,b\n", headers={"Content-Type": "text/plain"}).status_code == 415
+    response = client.post("/api/analyze/file?format=csv", content=b"id,avis\n1,bon\n")
+    assert response.status_code == 400
+    assert client.get("/api/analyze/file/..%2Fconfig.py").status_code == 404
+
+
+def test_analyze_batch_chart_data(test_db):
+    """Le mode JSON renvoie les données des graphiques au lieu des URLs d'images"""
+    texts = ["Je suis très content !", "Je suis très déçu !", "Ceci est un test."]
+    response = client.post("/api/analyze/batch?charts=json", json={"texts": texts})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["visualization_urls"] is None
+    assert data["chart_data"]["total"] == 3
+    assert sum(data["chart_data"]["sentiment_counts"].values()) == 3
+    
+    response = client.post("/api/analyze/chart-data", json={"texts": texts})
+    assert response.status_code == 200
+    assert response.json()["sentiment_counts"] == data["chart_data"]["sentiment_counts"]
+
+
+def test_stats(test_db):
+    """Les statistiques agrégées couvrent les analyses enregistrées"""
+    client.post("/api/analyze", json={"text": "Je suis très content !"})
+    response = client.get("/api/stats?buckets=10")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] >= 1
+    assert len(data["histogram"]["counts"]) == 10
+    assert sum(data["histogram"]["counts"]) == data["total"]
+    assert client.get("/api/stats?buckets=0").status_code == 422
+
+
+def test_get_texts_cursor(test_db):
+    """La pagination par curseur parcourt les textes sans doublon"""
+    for i in range(3):
+        client.post("/api/analyze", json={"text": f"Texte paginé {i}"})
+    seen = []
+    response = client.get("/api/texts?limit=2")
+    while True:
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        response = client.get(f"/api/texts?limit=2&cursor={cursor}")
+    assert len(seen) == len(set(seen)) >= 3
+    assert seen == sorted(seen)
+    assert client.get("/api/texts?cursor=invalide").status_code == 400
+
+
+def test_get_texts_page(test_db):
+    """/texts/page renvoie le curseur de la page suivante dans le corps de la réponse"""
+    for i in range(3):
+        client.post("/api/analyze", json={"text": f"Texte paginé {i}"})
+    seen = []
+    response = client.get("/api/texts/page?limit=2")
+    while True:
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(item["id"] for item in page["texts"])
+        cursor = page["next_cursor"]
+        assert response.headers.get("X-Next-Cursor") == cursor
+        if cursor is None:
+            break
+        response = client.get(f"/api/texts/page?limit=2&cursor={cursor}")
+    assert seen == [item["id"] for item in client.get("/api/texts?limit=1000").json()]
+
+
+def test_export_texts(test_db):
+    """L'export renvoie tous les textes en NDJSON"""
+    response = client.get("/api/texts/export")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) >= 1
+    assert {"id", "text", "source", "created_at"} <= set(rows[0])
+
+
+def test_metrics(test_db):
+    """Les métriques sont exposées au format Prometheus, avec les durées des étapes"""
+    client.post("/api/analyze", json={"text": "Texte mesuré pour les métriques"})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'sentiment_stage_duration_seconds_count{stage="local.english"}' in response.text
+    assert 'sentiment_http_request_duration_seconds_count{method="POST",route="/api/analyze",status="200"}' in response.text
+    assert "sentiment_cache_hits_total" in response.text
+
+
+def test_profile_header(test_db):
+    """Une requête échantillonnée renvoie la répartition de sa durée par étape"""
+    with patch.object(sentiment_analysis.Config, "PROFILE_SAMPLE_RATE", 1.0):
+        response = client.post("/api/analyze", json={"text": "Texte profilé"})
+    assert response.status_code == 200
+    assert "persist;dur=" in response.headers["Server-Timing"]
+    assert "Server-Timing" not in client.post("/api/analyze", json={"text": "Texte non profilé"}).headers
@@ -0,0 +1,132 @@
+import datetime
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.config import Config
+from app.services import sentiment_analyzer as analyzer_module
+from app.services.cache import LRUCache, PersistentCache, SentimentCache
+from app.services.sentiment_analyzer import SentimentAnalyzer
+
+
+class TestLRUCache(unittest.TestCase):
+    """Tests du cache LRU en mémoire"""
+
+    def test_eviction_by_size(self):
+        cache = LRUCache(max_size=2, ttl=0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.evictions, 1)
+
+    def test_expiration(self):
+        cache = LRUCache(max_size=10, ttl=10)
+        with patch("app.services.cache.time.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("app.services.cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.evictions, 1)
+
+
+class TestPersistentCache(unittest.TestCase):
+    """Tests du cache persistant en base de données"""
+
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        self.session_factory = sessionmaker(bind=engine)
+
+    def test_survives_new_instance(self):
+        first = SentimentCache("v1", persistent=PersistentCache(self.session_factory))
+        first.set("Très bon produit", "local", {"polarity": 0.5, "sentiment": "positif"})
+
+        second = SentimentCache("v1", persistent=PersistentCache(self.session_factory))
+        self.assertEqual(second.get("Très bon produit", "local")["polarity"], 0.5)
+        self.assertEqual(second.stats()["persistent_hits"], 1)
+
+    def test_batch_uses_one_query(self):
+        engine = create_engine("sqlite://")
+        cache = SentimentCache("v1", persistent=PersistentCache(sessionmaker(bind=engine)))
+        cache.set("a", "local", {"polarity": 0.1})
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+        texts = [f"texte {i}" for i in range(50)]
+        cache.set_many([(text, {"polarity": 0.2}) for text in texts], "local")
+        self.assertEqual(sum(s.startswith("INSERT") for s in statements), 1)
+
+        cache.memory.clear()
+        statements.clear()
+        results = cache.get_many(texts + ["a", "absent"], "local")
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(results[0]["polarity"], 0.2)
+        self.assertEqual(results[-2]["polarity"], 0.1)
+        self.assertIsNone(results[-1])
+        self.assertEqual(cache.stats()["persistent_hits"], 51)
+
+    def test_expiration_and_size_bound(self):
+        persistent = PersistentCache(self.session_factory, ttl=60, max_size=3, prune_interval=0)
+        cache = SentimentCache("v1", persistent=persistent)
+        cache.set_many([(f"ancien {i}", {"polarity": 0.0}) for i in range(2)], "local")
+        later = datetime.datetime.utcnow() + datetime.timedelta(seconds=120)
+        with patch("app.services.cache.datetime.datetime") as fake_datetime:
+            fake_datetime.utcnow.return_value = later
+            cache.memory.clear()
+            self.assertEqual(cache.get_many(["ancien 0"], "local"), [None])
+            cache.set_many([(f"récent {i}", {"polarity": 0.0}) for i in range(5)], "local")
+            # Les entrées expirées puis les plus anciennes au-delà de max_size sont supprimées
+            self.assertEqual(persistent.evictions, 4)
+            cache.memory.clear()
+            found = cache.get_many([f"récent {i}" for i in range(5)], "local")
+        self.assertEqual(sum(result is not None for result in found), 3)
+
+    def test_invalidate_keeps_current_version(self):
+        cache = SentimentCache("v1", persistent=PersistentCache(self.session_factory))
+        cache.set("texte", "local", {"polarity": 0.0})
+        self.assertEqual(cache.invalidate(version="v2"), 1)
+        self.assertIsNone(cache.get("texte", "local"))
+
+
+class TestAnalyzerCache(unittest.TestCase):
+    """Tests de l'utilisation du cache par SentimentAnalyzer"""
+
+    def setUp(self):
+        self.analyzer = SentimentAnalyzer(use_cache=True)
+
+    def test_repeated_text_is_served_from_cache(self):
+        with patch.object(self.analyzer, "analyze_sentiment_local",
+                          wraps=self.analyzer.analyze_sentiment_local) as local:
+            first = self.analyzer.analyze_sentiment("Je suis très content !", use_openai=False)
+            second = self.analyzer.analyze_sentiment("Je suis très content !", use_openai=False)
+        self.assertEqual(first, second)
+        self.assertEqual(local.call_count, 1)
+        stats = self.analyzer.cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_lexicon_change_requires_invalidation(self):
+        version = self.analyzer.cache.version
+        with patch.object(analyzer_module, "POSITIFS_FR", analyzer_module.POSITIFS_FR | {"formidable"}):
+            self.analyzer.invalidate_cache()
+            self.assertNotEqual(self.analyzer.cache.version, version)
+        self.assertEqual(self.analyzer.cache_stats()["size"], 0)
+
+    def test_local_engine_changes_version(self):
+        lexicon_analyzer = SentimentAnalyzer(use_cache=True, engine="lexicon")
+        textblob_analyzer = SentimentAnalyzer(use_cache=True, engine="textblob")
+        self.assertNotEqual(lexicon_analyzer.model_version, textblob_analyzer.model_version)
+        self.assertNotEqual(lexicon_analyzer.cache.version, textblob_analyzer.cache.version)
+
+    def test_openai_model_change_invalidates(self):
+        self.analyzer.analyze_sentiment("Un texte", use_openai=False)
+        with patch.object(Config, "OPENAI_MODEL", "autre-modele"):
+            self.analyzer.analyze_sentiment("Un texte", use_openai=False)
+        self.assertEqual(self.analyzer.cache_stats()["misses"], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import subprocess
+import sys
+import unittest
+
+from app.services.chart_data import compute_chart_data
+
+
+def make_results(n):
+    sentiments = ["positif", "négatif", "neutre"]
+    return [
+        {"polarity": ((i % 21) - 10) / 10, "subjectivity": (i % 11) / 10, "sentiment": sentiments[i % 3]}
+        for i in range(n)
+    ]
+
+
+class TestChartData(unittest.TestCase):
+    """Tests des données de graphiques calculées avec NumPy"""
+
+    def test_histograms_and_counts(self):
+        results = make_results(300)
+        data = compute_chart_data(results, bins=20)
+        self.assertEqual(data["total"], 300)
+        self.assertEqual(len(data["polarity"]["edges"]), 21)
+        self.assertEqual(data["polarity"]["edges"][0], -1.0)
+        self.assertEqual(data["polarity"]["edges"][-1], 1.0)
+        self.assertEqual(sum(data["polarity"]["counts"]), 300)
+        self.assertEqual(sum(data["subjectivity"]["counts"]), 300)
+        self.assertEqual(data["sentiment_counts"], {"positif": 100, "neutre": 100, "négatif": 100})
+        self.assertEqual(len(data["scatter"]["points"]), 300)
+        self.assertFalse(data["scatter"]["sampled"])
+        p, s, k = data["scatter"]["points"][1]
+        self.assertEqual((p, s), (results[1]["polarity"], results[1]["subjectivity"]))
+        self.assertEqual(data["scatter"]["sentiments"][k], "négatif")
+
+    def test_scatter_downsampling(self):
+        data = compute_chart_data(make_results(5000), max_points=100)
+        self.assertEqual(len(data["scatter"]["points"]), 100)
+        self.assertTrue(data["scatter"]["sampled"])
+        self.assertEqual(sum(data["polarity"]["counts"]), 5000)
+
+    def test_out_of_range_and_unknown_sentiment(self):
+        data = compute_chart_data([
+            {"polarity": 1.5, "subjectivity": -0.2, "sentiment": "mitigé"},
+            {"polarity": -1.0, "subjectivity": 1.0, "sentiment": "positif"},
+        ])
+        self.assertEqual(data["polarity"]["counts"][-1], 1)
+        self.assertEqual(data["polarity"]["counts"][0], 1)
+        self.assertEqual(data["subjectivity"]["counts"][0], 1)
+        self.assertEqual(data["sentiment_counts"]["mitigé"], 1)
+        self.assertEqual(data["scatter"]["sentiments"][data["scatter"]["points"][0][2]], "mitigé")
+
+    def test_no_plotting_imports(self):
+        code = (
+            "import sys\n"
+            "from app.services.chart_data import compute_chart_data\n"
+            "compute_chart_data([{'polarity': 0.1, 'subjectivity': 0.2, 'sentiment': 'positif'}])\n"
+            "assert 'matplotlib' not in sys.modules and 'pandas' not in sys.modules\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app.services import charts
+from app.services.charts import ChartRenderer, CHART_NAMES, chart_key
+
+
+def make_results(n, shift=0.0):
+    sentiments = ["positif", "négatif", "neutre"]
+    return [
+        {"polarity": ((i % 21) - 10) / 10 + shift, "subjectivity": (i % 11) / 10, "sentiment": sentiments[i % 3]}
+        for i in range(n)
+    ]
+
+
+class TestChartRenderer(unittest.TestCase):
+    """Tests du rendu des graphiques hors de la requête"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.renderer = ChartRenderer(self.tmp_dir.name, "/api/charts", workers=2)
+
+    def tearDown(self):
+        self.renderer.shutdown()
+        self.tmp_dir.cleanup()
+
+    def files(self):
+        return sorted(os.listdir(self.tmp_dir.name))
+
+    def test_render_and_reuse(self):
+        results = make_results(50)
+        urls = self.renderer.submit(results)
+        key = chart_key(results)
+        self.assertEqual(set(urls), set(CHART_NAMES))
+        self.assertEqual(urls["sentiment_pie"], f"/api/charts/{key}_sentiment_pie.png")
+        for url in urls.values():
+            path = self.renderer.get_path(url.rsplit("/", 1)[1])
+            self.assertIsNotNone(path)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(8), b"\x89PNG\r\n\x1a\n")
+
+        # Scores identiques : mêmes URLs, aucun nouveau rendu
+        self.assertEqual(self.renderer.submit([dict(r) for r in results]), urls)
+        self.assertEqual(self.renderer.stats()["rendered"], 1)
+        self.assertEqual(self.renderer.stats()["reused"], 1)
+
+        # Scores différents : autres images
+        self.assertNotEqual(self.renderer.submit(make_results(50, shift=0.01)), urls)
+
+    def test_urls_returned_before_rendering(self):
+        started = threading.Event()
+        release = threading.Event()
+        render = charts.render_charts
+
+        def slow_render(*args):
+            started.set()
+            release.wait(5)
+            render(*args)
+
+        with patch.object(charts, "render_charts", slow_render):
+            urls = self.renderer.submit(make_results(10))
+            self.assertTrue(started.wait(5))
+            self.assertEqual(self.files(), [])
+            self.assertEqual(self.renderer.stats()["pending"], 1)
+            release.set()
+            # get_path attend la fin du rendu en cours
+            self.assertIsNotNone(self.renderer.get_path(urls["polarity_distribution"].rsplit("/", 1)[1]))
+
+    def test_eviction(self):
+        renderer = ChartRenderer(self.tmp_dir.name, "/api/charts", max_files=8, ttl=3600)
+        try:
+            for shift in (0.0, 0.1, 0.2):
+                urls = renderer.submit(make_results(5, shift=shift))
+                renderer.get_path(urls["sentiment_pie"].rsplit("/", 1)[1])
+                time.sleep(0.02)
+            renderer.evict()
+            self.assertEqual(len(self.files()), 8)
+            # Une image inutilisée depuis plus que le TTL est supprimée
+            os.utime(os.path.join(self.tmp_dir.name, self.files()[0]), (0, 0))
+            renderer.evict()
+            self.assertEqual(len(self.files()), 7)
+        finally:
+            renderer.shutdown()
+
+    def test_invalid_filename(self):
+        self.assertIsNone(self.renderer.get_path("../config.py"))
+        self.assertIsNone(self.renderer.get_path(f"{'0' * 32}_sentiment_pie.png"))
+
+
+if __name__ == '__main__':
+    unittest.main()
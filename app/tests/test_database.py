@@ -0,0 +1,97 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import active_config
+from app.models.database import Base, TextData, create_db_engine, resolve_profile, to_async_url
+from app.services.persistence import persist_results
+
+RESULT = {"polarity": 0.5, "subjectivity": 0.4, "sentiment": "positif", "model": "local"}
+
+
+class TestEngineProfiles(unittest.TestCase):
+    """Tests des profils de moteur de base de données"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engines = []
+
+    def tearDown(self):
+        for engine in self.engines:
+            engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def engine(self, profile, name="test.db"):
+        engine = create_db_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, name)}", profile)
+        self.engines.append(engine)
+        return engine
+
+    def pragma(self, engine, name):
+        with engine.connect() as conn:
+            return conn.execute(text(f"PRAGMA {name}")).scalar()
+
+    def test_resolve_profile(self):
+        self.assertEqual(resolve_profile("sqlite:///./app.db"), "sqlite")
+        self.assertEqual(resolve_profile("postgresql+psycopg://localhost/app"), "server")
+        self.assertEqual(resolve_profile("sqlite:///./app.db", "basic"), "basic")
+        with self.assertRaises(ValueError):
+            resolve_profile("sqlite:///./app.db", "inconnu")
+
+    def test_async_url(self):
+        self.assertEqual(to_async_url("sqlite:///./app.db"), "sqlite+aiosqlite:///./app.db")
+        self.assertEqual(to_async_url("postgresql://localhost/app"), "postgresql+asyncpg://localhost/app")
+        self.assertEqual(to_async_url("postgresql+psycopg://localhost/app"), "postgresql+psycopg://localhost/app")
+
+    def test_sqlite_profile_pragmas(self):
+        engine = self.engine("sqlite")
+        self.assertEqual(self.pragma(engine, "journal_mode"), "wal")
+        self.assertEqual(self.pragma(engine, "synchronous"), 1)  # NORMAL
+        self.assertGreater(self.pragma(engine, "busy_timeout"), 0)
+
+    def test_basic_profile(self):
+        engine = self.engine("basic")
+        self.assertEqual(self.pragma(engine, "journal_mode"), "delete")
+
+    def test_server_profile_pool(self):
+        engine = self.engine("server")
+        self.assertEqual(engine.pool.size(), active_config.DB_POOL_SIZE)
+        with self.assertRaises(ValueError):
+            create_db_engine("postgresql://localhost/app", "sqlite")
+
+    def test_concurrent_writers(self):
+        engine = self.engine("sqlite")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        errors = []
+
+        def write(worker):
+            for i in range(20):
+                db = session_factory()
+                try:
+                    persist_results(db, [f"texte {worker}-{i}"] * 5, [RESULT] * 5)
+                except Exception as e:
+                    errors.append(e)
+                finally:
+                    db.close()
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        db = session_factory()
+        try:
+            # Chaque texte envoyé 5 fois n'est stocké qu'une fois
+            self.assertEqual(db.query(TextData).count(), 8 * 20)
+            self.assertEqual(db.query(func.sum(TextData.occurrences)).scalar(), 8 * 20 * 5)
+        finally:
+            db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
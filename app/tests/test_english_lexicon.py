@@ -0,0 +1,82 @@
+import random
+import unittest
+
+from textblob import TextBlob
+
+from app.services.english_lexicon import EnglishLexiconScorer, TOLERANCE
+from app.services.sentiment_analyzer import SentimentAnalyzer
+from app.tests.test_text_processing import noisy_corpus
+
+
+def english_corpus(seed=7, size=1500):
+    """Textes anglais aléatoires déjà nettoyés : mots du lexique, modificateurs, négations et soulignés"""
+    rng = random.Random(seed)
+    scorer = EnglishLexiconScorer()
+    # Tokens tels que produits par TextNormalizer : ni ponctuation ni chiffres
+    lexicon_words = sorted(word for word in scorer.table if word.isalpha())
+    extra = ["not", "never", "very", "really", "a", "the", "product", "is", "was", "_good", "bad_", "__"]
+    texts = []
+    for _ in range(size):
+        words = [rng.choice(lexicon_words) if rng.random() < 0.5 else rng.choice(extra)
+                 for _ in range(rng.randint(0, 20))]
+        texts.append(" ".join(words))
+    return texts
+
+
+class TestEnglishLexiconScorer(unittest.TestCase):
+    """Le lexique précompilé doit reproduire les scores de TextBlob à TOLERANCE près"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.scorer = EnglishLexiconScorer()
+        cls.analyzer = SentimentAnalyzer(use_cache=False)
+
+    def assert_matches_textblob(self, clean_tokens):
+        expected = TextBlob(" ".join(clean_tokens)).sentiment
+        polarity, subjectivity = self.scorer.score(clean_tokens)
+        self.assertAlmostEqual(polarity, expected.polarity, delta=TOLERANCE, msg=clean_tokens)
+        self.assertAlmostEqual(subjectivity, expected.subjectivity, delta=TOLERANCE, msg=clean_tokens)
+
+    def test_known_sentences(self):
+        sentences = [
+            "this is good", "this is very good", "this is not good", "not a good product",
+            "really not good", "not very bad", "great great awful", "_good_ day",
+        ]
+        for sentence in sentences:
+            with self.subTest(sentence=sentence):
+                self.assert_matches_textblob(sentence.split())
+
+    def test_random_english_corpus(self):
+        for text in english_corpus():
+            self.assert_matches_textblob(text.split())
+
+    def test_normalized_corpus(self):
+        for text in noisy_corpus():
+            self.assert_matches_textblob(self.analyzer.normalizer.normalize(text).clean_tokens)
+
+
+class TestLexiconEngine(unittest.TestCase):
+    """Le moteur "lexicon" de SentimentAnalyzer doit donner les mêmes résultats que "textblob" """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.textblob = SentimentAnalyzer(use_cache=False, engine="textblob")
+        cls.lexicon = SentimentAnalyzer(use_cache=False, engine="lexicon")
+
+    def test_same_results(self):
+        texts = english_corpus(seed=1, size=300) + noisy_corpus()[:300]
+        expected = self.textblob.analyze_sentiment_local_batch(texts)
+        results = self.lexicon.analyze_sentiment_local_batch(texts)
+        for text, result, reference in zip(texts, results, expected):
+            self.assertEqual(result["sentiment"], reference["sentiment"], text)
+            self.assertAlmostEqual(result["polarity"], reference["polarity"], delta=TOLERANCE)
+            self.assertAlmostEqual(result["subjectivity"], reference["subjectivity"], delta=TOLERANCE)
+        self.assertEqual(self.lexicon.analyze_sentiment_local(texts[0]), results[0])
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            SentimentAnalyzer(use_cache=False, engine="inconnu")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base, TextData, SentimentAnalysis
+from app.services.ingestion import FileIngestor, detect_format, iter_csv_texts
+from app.services.sentiment_analyzer import SentimentAnalyzer
+
+
+class CountingAnalyzer:
+    """Analyseur factice qui enregistre la taille de chaque lot reçu"""
+
+    def __init__(self):
+        self.batches = []
+
+    def analyze_sentiment_batch(self, texts, use_openai=None, checked_model=None):
+        self.batches.append(len(texts))
+        return [{"polarity": 0.0, "subjectivity": 0.0, "sentiment": "neutre", "model": "local"} for _ in texts]
+
+
+class TestFileIngestor(unittest.TestCase):
+    """Tests de l'analyse de fichiers CSV et JSONL par fragments"""
+
+    def setUp(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def count(self, model):
+        db = self.session_factory()
+        try:
+            return db.query(model).count()
+        finally:
+            db.close()
+
+    def path(self, name):
+        return os.path.join(self.tmp_dir.name, name)
+
+    def test_csv_file(self):
+        input_path = self.path("avis.csv")
+        with open(input_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "avis"])
+            writer.writerow([1, "Je suis très content !"])
+            writer.writerow([2, "Je suis très déçu\net vraiment mécontent."])
+            writer.writerow([3, ""])
+        ingestor = FileIngestor(SentimentAnalyzer(use_cache=False), self.session_factory, text_field="avis")
+        stats = ingestor.run_file(input_path, self.path("resultats.csv"))
+        self.assertEqual((stats["rows"], stats["analyzed"], stats["skipped"]), (3, 2, 1))
+        self.assertGreater(stats["rows_per_second"], 0)
+        with open(self.path("resultats.csv"), encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row["sentiment"] for row in rows], ["positif", "négatif"])
+        self.assertEqual(rows[1]["text"], "Je suis très déçu\net vraiment mécontent.")
+        self.assertEqual(self.count(TextData), 2)
+        self.assertEqual(self.count(SentimentAnalysis), 2)
+
+    def test_jsonl_in_fixed_chunks(self):
+        analyzer = CountingAnalyzer()
+        lines = [json.dumps({"text": f"texte {i}"}) for i in range(25)] + ["{invalide", json.dumps("texte brut")]
+        output = io.StringIO()
+        stats = FileIngestor(analyzer, self.session_factory, chunk_size=10).run(
+            io.StringIO("\n".join(lines)), output, "jsonl"
+        )
+        self.assertEqual(analyzer.batches, [10, 10, 6])
+        self.assertEqual((stats["rows"], stats["analyzed"], stats["skipped"]), (27, 26, 1))
+        results = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(results[-1]["text"], "texte brut")
+        self.assertEqual(self.count(TextData), 26)
+
+    def test_missing_column(self):
+        with self.assertRaises(ValueError):
+            list(iter_csv_texts(io.StringIO("id,avis\n1,bon\n")))
+
+    def test_detect_format(self):
+        self.assertEqual(detect_format("export.CSV"), "csv")
+        self.assertEqual(detect_format("export.ndjson"), "jsonl")
+        with self.assertRaises(ValueError):
+            detect_format("export.xlsx")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy.orm import sessionmaker
+
+from app.config import Config
+from app.models.database import Base, SentimentAnalysis, AnalysisJobItem, create_db_engine
+from app.models.schemas import TextDataCreate
+from app.services import jobs as jobs_module
+from app.services.jobs import JobManager, JobRepository, job_summary, COMPLETED, CANCELLED, PENDING
+from app.services.openai_client import OpenAIClient
+from app.services.repositories import TextDataRepository
+from app.services.sentiment_analyzer import SentimentAnalyzer
+from app.tests.openai_stub import OpenAIStub
+
+TEXTS = ["Je suis très content !", "Je suis très déçu !", "Ceci est un test."] * 4
+
+
+class TestJobs(unittest.TestCase):
+    """Tests des tâches d'analyse asynchrones"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = SentimentAnalyzer(use_cache=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.analyzer.close()
+
+    def setUp(self):
+        # Base sur fichier avec le moteur de l'application : chaque thread de travail a sa connexion
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.engine = create_db_engine(f"sqlite:///{os.path.join(self.tmp_dir.name, 'jobs.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.session_factory = sessionmaker(bind=self.engine)
+        self.db = self.session_factory()
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        self.tmp_dir.cleanup()
+
+    def manager(self, chunk_size=5, workers=0):
+        return JobManager(self.session_factory, workers=workers, chunk_size=chunk_size,
+                          poll_interval=0.05, analyzer=self.analyzer)
+
+    def summary(self, job_id):
+        self.db.expire_all()
+        return job_summary(JobRepository.get_by_id(self.db, job_id))
+
+    def all_results(self, job_id, limit=5):
+        results, after = [], None
+        while True:
+            page = JobRepository.get_results(self.db, job_id, after=after, limit=limit)
+            results.extend(page)
+            if len(page) < limit:
+                return results
+            after = page[-1].position
+
+    def test_local_job(self):
+        job = JobRepository.create(self.db, texts=TEXTS, source="import")
+        self.manager().process(job.id)
+        summary = self.summary(job.id)
+        self.assertEqual(summary["status"], COMPLETED)
+        self.assertEqual(summary["processed"], len(TEXTS))
+        self.assertEqual(summary["progress"], 1.0)
+        self.assertEqual(summary["counts"]["positif"], 4)
+        self.assertEqual(summary["counts"]["négatif"], 4)
+        self.assertEqual(summary["counts"]["local"], len(TEXTS))
+        self.assertGreater(summary["throughput"], 0)
+        results = self.all_results(job.id)
+        self.assertEqual([row.position for row in results], list(range(len(TEXTS))))
+        self.assertEqual([row.text for row in results], TEXTS)
+
+    def test_create_in_slices(self):
+        with patch.object(jobs_module, "SUBMIT_SLICE", 5):
+            job = JobRepository.create(self.db, texts=TEXTS)
+        self.assertEqual(job.status, PENDING)
+        self.assertEqual(job.total, len(TEXTS))
+        positions = [row.position for row in self.db.query(AnalysisJobItem.position).order_by(AnalysisJobItem.position)]
+        self.assertEqual(positions, list(range(len(TEXTS))))
+
+    def test_stored_texts(self):
+        TextDataRepository.create_many(self.db, [TextDataCreate(text=text, source="a") for text in TEXTS])
+        TextDataRepository.create_many(self.db, [TextDataCreate(text="Autre texte", source="b")])
+        # Les textes stockés sont dédupliqués : une ligne par texte distinct
+        unique_texts = list(dict.fromkeys(TEXTS))
+        job = JobRepository.create(self.db, source="a")
+        self.assertEqual(job.total, len(unique_texts))
+        self.manager().process(job.id)
+        self.assertEqual(self.summary(job.id)["processed"], len(unique_texts))
+        self.assertEqual([row.text for row in self.all_results(job.id)], unique_texts)
+
+    def test_resume_after_interruption(self):
+        job = JobRepository.create(self.db, texts=TEXTS)
+        job_id = job.id
+        # Arrêt brutal après le premier fragment validé
+        self.manager(chunk_size=5)._process_chunk(self.db, job)
+        self.assertEqual(self.summary(job_id)["processed"], 5)
+
+        self.manager(chunk_size=5).process(job_id)
+        self.assertEqual(self.summary(job_id)["status"], COMPLETED)
+        self.assertEqual(self.summary(job_id)["processed"], len(TEXTS))
+        self.assertEqual(self.db.query(SentimentAnalysis).count(), len(TEXTS))
+
+    def test_cancel(self):
+        job = JobRepository.create(self.db, texts=TEXTS)
+        self.assertTrue(JobRepository.cancel(self.db, job.id))
+        self.manager().process(job.id)
+        summary = self.summary(job.id)
+        self.assertEqual(summary["status"], CANCELLED)
+        self.assertEqual(summary["processed"], 0)
+        self.assertFalse(JobRepository.cancel(self.db, job.id))
+
+    def test_background_workers(self):
+        manager = self.manager(chunk_size=3, workers=2)
+        manager.start(self.analyzer)
+        try:
+            job_ids = [JobRepository.create(self.db, texts=TEXTS).id for _ in range(3)]
+            manager.notify()
+            deadline = time.monotonic() + 30
+            while time.monotonic() < deadline:
+                if all(self.summary(job_id)["status"] == COMPLETED for job_id in job_ids):
+                    break
+                time.sleep(0.05)
+        finally:
+            manager.stop()
+        for job_id in job_ids:
+            self.assertEqual(self.summary(job_id)["status"], COMPLETED)
+        self.assertEqual(self.db.query(SentimentAnalysis).count(), 3 * len(TEXTS))
+
+    @patch.object(Config, 'OPENAI_API_KEY', 'test-key')
+    def test_openai_job(self):
+        texts = [f"texte {i} {'content' if i % 2 else 'déçu'}" for i in range(6)]
+        analyzer = SentimentAnalyzer(use_cache=False)
+        try:
+            with OpenAIStub() as stub:
+                analyzer._openai_client = OpenAIClient(base_url=stub.base_url)
+                job = JobRepository.create(self.db, texts=texts, use_openai=True)
+                JobManager(self.session_factory, workers=0, chunk_size=4, analyzer=analyzer).process(job.id)
+        finally:
+            analyzer.close()
+        summary = self.summary(job.id)
+        self.assertEqual(summary["status"], COMPLETED)
+        self.assertEqual(summary["counts"]["openai"], len(texts))
+        self.assertEqual(summary["counts"]["positif"], 3)
+        self.assertEqual(len(stub.requests), len(texts))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import random
+import unittest
+
+from app.services.lexicon import LexiconMatcher, VectorizedLexiconScorer
+from app.services.sentiment_analyzer import SentimentAnalyzer, POSITIFS_FR, NEGATIFS_FR, NEGATIONS_FR
+
+
+def reference_sentiment_fr(text):
+    """Implémentation d'origine de analyze_sentiment_fr, conservée comme référence"""
+    if not text:
+        return 0
+
+    words = text.lower().split()
+
+    phrases = []
+    for i in range(len(words)):
+        for j in range(2, min(5, len(words) - i + 1)):
+            phrases.append(" ".join(words[i:i+j]))
+
+    positifs = sum(1 for word in words if word in POSITIFS_FR)
+    negatifs = sum(1 for word in words if word in NEGATIFS_FR)
+
+    for phrase in phrases:
+        if phrase in NEGATIFS_FR:
+            negatifs += 1
+
+    has_negation = any(neg in words for neg in NEGATIONS_FR)
+    if has_negation:
+        negated_positives = sum(1 for word in words if word in POSITIFS_FR)
+        if negated_positives > 0:
+            positifs -= negated_positives
+            negatifs += negated_positives
+
+    if positifs > 0 or negatifs > 0:
+        return (positifs - negatifs) / (positifs + negatifs)
+    return 0
+
+
+def random_corpus(seed=42, size=2000):
+    """Textes aléatoires mêlant mots du lexique, fragments de phrases et mots neutres"""
+    rng = random.Random(seed)
+    lexicon_words = sorted({token for entry in POSITIFS_FR | NEGATIFS_FR | NEGATIONS_FR for token in entry.split()})
+    phrases = sorted(entry for entry in NEGATIFS_FR if " " in entry)
+    neutral = ["le", "la", "produit", "service", "client", "très", "vraiment", "Ce", "NE", "Pas", "!", "colère,"]
+    texts = []
+    for _ in range(size):
+        parts = []
+        for _ in range(rng.randint(0, 25)):
+            choice = rng.random()
+            if choice < 0.4:
+                parts.append(rng.choice(lexicon_words))
+            elif choice < 0.55:
+                parts.append(rng.choice(phrases))
+            else:
+                parts.append(rng.choice(neutral))
+        texts.append(rng.choice([" ", "  ", "\n"]).join(parts))
+    return texts
+
+
+class TestLexiconParity(unittest.TestCase):
+    """Le matcher compilé doit donner exactement les mêmes scores que l'implémentation d'origine"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = SentimentAnalyzer(use_cache=False)
+
+    def test_known_sentences(self):
+        sentences = [
+            "",
+            "Ce service ne fonctionne pas correctement.",
+            "Je suis très content de cette application !",
+            "Ce n'est pas bon du tout",
+            "pas bon pas bien pas fiable",
+            "il est en colère et déçu",
+            "ne marche pas ne fonctionne pas",
+            "non fonctionnel mais rapide",
+            "Excellent produit, livraison rapide",
+        ]
+        for sentence in sentences:
+            with self.subTest(sentence=sentence):
+                self.assertEqual(self.analyzer.analyze_sentiment_fr(sentence), reference_sentiment_fr(sentence))
+
+    def test_random_corpus(self):
+        for text in random_corpus():
+            self.assertEqual(self.analyzer.analyze_sentiment_fr(text), reference_sentiment_fr(text), text)
+
+    def test_overlapping_phrases(self):
+        matcher = LexiconMatcher({"bon"}, {"pas", "pas bon", "ne pas bon"}, {"ne"})
+        self.assertEqual(matcher.count("ne pas bon".split()), (1, 3, True))
+
+    def test_phrase_longer_than_limit_is_ignored(self):
+        matcher = LexiconMatcher(set(), {"a b c d e"}, set())
+        self.assertEqual(matcher.count("a b c d e".split()).negatives, 0)
+
+
+class TestVectorizedLexiconScorer(unittest.TestCase):
+    """Le score par lot NumPy doit être identique au score texte par texte"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = SentimentAnalyzer(use_cache=False)
+
+    def test_scores_match_matcher(self):
+        texts = random_corpus(seed=3, size=1000) + ["", "ne", "en colère", "pas bon"]
+        token_lists = [text.lower().split() for text in texts]
+        scores, has_negation = self.analyzer.lexicon_scorer.score_batch(token_lists)
+        for tokens, score, negation in zip(token_lists, scores.tolist(), has_negation.tolist()):
+            counts = self.analyzer.lexicon.count(tokens)
+            self.assertEqual(score, self.analyzer.lexicon.score_counts(counts), tokens)
+            self.assertEqual(negation, counts.has_negation)
+
+    def test_phrase_does_not_span_documents(self):
+        scorer = VectorizedLexiconScorer(set(), {"en colère"}, set())
+        positives, negatives, _ = scorer.count_batch([["en"], ["colère"], ["en", "colère"]])
+        self.assertEqual(negatives.tolist(), [0, 0, 1])
+
+    def test_empty_batch(self):
+        scores, has_negation = self.analyzer.lexicon_scorer.score_batch([])
+        self.assertEqual(len(scores), 0)
+
+    def test_local_batch_matches_single(self):
+        texts = random_corpus(seed=11, size=300) + ["", "!!!", "Ce service ne fonctionne pas correctement."]
+        expected = [self.analyzer.analyze_sentiment_local(text) for text in texts]
+        self.assertEqual(self.analyzer.analyze_sentiment_local_batch(texts), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
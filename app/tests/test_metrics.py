@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from app.config import Config
+from app.services import metrics
+from app.services.metrics import MetricsRegistry, stats_collector, timed, start_profile, finish_profile
+from app.services.sentiment_analyzer import SentimentAnalyzer
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Tests du registre des métriques et du format texte de Prometheus"""
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("duree_seconds", "Durée", ("stage",), buckets=(0.5, 1))
+        histogram.labels("a").observe(0.25)
+        histogram.labels("a").observe(0.5)
+        histogram.labels("a").observe(4)
+        lines = registry.render().splitlines()
+        self.assertIn('duree_seconds_bucket{stage="a",le="0.5"} 2', lines)
+        self.assertIn('duree_seconds_bucket{stage="a",le="1.0"} 2', lines)
+        self.assertIn('duree_seconds_bucket{stage="a",le="+Inf"} 3', lines)
+        self.assertIn('duree_seconds_count{stage="a"} 3', lines)
+        self.assertIn('duree_seconds_sum{stage="a"} 4.75', lines)
+        self.assertIn("# TYPE duree_seconds histogram", lines)
+
+    def test_counter_labels(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("appels_total", "Appels", ("outcome",))
+        counter.labels("error").inc()
+        counter.labels('sans "guillemets"').inc(2)
+        text = registry.render()
+        self.assertIn('appels_total{outcome="error"} 1', text)
+        self.assertIn('appels_total{outcome="sans \\"guillemets\\""} 2', text)
+        with self.assertRaises(ValueError):
+            counter.labels()
+        registry.reset()
+        self.assertNotIn('outcome="error"', registry.render())
+
+    def test_stats_collector(self):
+        registry = MetricsRegistry()
+        stats = {"hits": 3, "size": 7}
+        registry.register_collector(stats_collector("cache", lambda: stats, {
+            "hits": ("counter", "Succès"),
+            "size": ("gauge", "Taille")
+        }))
+        registry.register_collector(stats_collector("inactif", lambda: None, {"size": ("gauge", "Taille")}))
+        lines = registry.render().splitlines()
+        self.assertIn("cache_hits_total 3", lines)
+        self.assertIn("# TYPE cache_size gauge", lines)
+        self.assertIn("cache_size 7", lines)
+        self.assertFalse(any(line.startswith("inactif") for line in lines))
+
+
+class TestStageProfile(unittest.TestCase):
+    """Tests de la mesure des étapes et du profilage échantillonné"""
+
+    def test_timed_records_stage(self):
+        with timed("test.etape"):
+            pass
+        self.assertIn('sentiment_stage_duration_seconds_count{stage="test.etape"}', metrics.registry.render())
+
+    def test_profile_breakdown(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log_path = os.path.join(tmp, "profils.jsonl")
+            with patch.object(Config, "PROFILE_LOG", log_path):
+                profile, token = start_profile(sample_rate=1.0)
+                with timed("test.a"):
+                    pass
+                with timed("test.a"):
+                    pass
+                record = finish_profile(profile, token, route="/test")
+                # Hors de la requête profilée, les étapes ne sont plus attribuées au profil
+                with timed("test.b"):
+                    pass
+            with open(log_path, encoding="utf-8") as log:
+                logged = json.loads(log.readline())
+        self.assertEqual(record["stages"]["test.a"]["calls"], 2)
+        self.assertNotIn("test.b", profile.stages)
+        self.assertEqual(logged["route"], "/test")
+        self.assertIn("test.a;dur=", profile.server_timing())
+
+    def test_profile_sampling(self):
+        self.assertEqual(start_profile(sample_rate=0), (None, None))
+
+    def test_metrics_disabled(self):
+        with patch.object(Config, "METRICS_ENABLED", False):
+            with timed("test.desactive"):
+                pass
+        self.assertNotIn('stage="test.desactive"', metrics.registry.render())
+
+    def test_analyzer_stages_and_fallback(self):
+        analyzer = SentimentAnalyzer(use_cache=False)
+        with patch.object(Config, "OPENAI_API_KEY", ""):
+            profile, token = start_profile(sample_rate=1.0)
+            analyzer.analyze_sentiment("Ce produit est excellent", use_openai=True)
+            analyzer.analyze_sentiment_batch(["Très bon", "Mauvais"], use_openai=True)
+            finish_profile(profile, token)
+        self.assertLessEqual({"local.preprocess", "local.english", "local.french", "analyze.local"}, set(profile.stages))
+        text = metrics.registry.render()
+        self.assertTrue(any(line.startswith("sentiment_openai_fallbacks_total ") for line in text.splitlines()))
+        self.assertIn('sentiment_batch_size_count{operation="analyze"}', text)
+        analyzer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
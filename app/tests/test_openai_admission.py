@@ -0,0 +1,165 @@
+import asyncio
+import unittest
+
+from app.services.openai_admission import (
+    AdmissionController, CircuitBreaker, CircuitOpenError, RateLimitedError, RetryBudget, TokenBucket
+)
+
+
+class FakeClock:
+    """Horloge manuelle pour les tests"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests du seau à jetons"""
+
+    def test_refill(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, 2, clock)
+        self.assertEqual(bucket.wait_time(1), 0)
+        bucket.take(1)
+        bucket.take(1)
+        self.assertAlmostEqual(bucket.wait_time(1), 0.5)
+        clock.now += 0.5
+        self.assertEqual(bucket.wait_time(1), 0)
+        # Une demande plus grande que la réserve attend seulement la réserve pleine
+        self.assertAlmostEqual(bucket.wait_time(10), 0.5)
+
+    def test_disabled(self):
+        bucket = TokenBucket(0, 0)
+        bucket.take(1000)
+        self.assertEqual(bucket.wait_time(1000), 0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Tests du disjoncteur"""
+
+    def test_open_probe_and_close(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=10, clock=clock)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+
+        # Après le délai : une seule requête de test, dont l'échec rouvre le disjoncteur
+        clock.now += 10
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertEqual(breaker.opened, 2)
+
+        clock.now += 10
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+    def test_retry_budget(self):
+        budget = RetryBudget(ratio=0.5, reserve=1)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+
+class TestAdmissionController(unittest.TestCase):
+    """Tests du contrôle d'admission (tentatives, disjoncteur, limite de débit)"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def controller(self, **kwargs):
+        options = dict(rps=0, tpm=0, max_retries=2, backoff=0, retry_budget_ratio=0.2,
+                       failure_threshold=5, cooldown=30, clock=self.clock)
+        options.update(kwargs)
+        return AdmissionController(**options)
+
+    def call(self, controller, outcomes, cost=10, deadline=10):
+        """Appelle le contrôleur avec une tentative qui produit successivement `outcomes`"""
+        outcomes = list(outcomes)
+        calls = []
+
+        async def attempt(timeout):
+            calls.append(timeout)
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+
+        result = asyncio.run(controller.call(attempt, cost, self.clock() + deadline, timeout=5))
+        return result, calls
+
+    def test_retry_then_success(self):
+        controller = self.controller()
+        result, calls = self.call(controller, [asyncio.TimeoutError(), "ok"])
+        self.assertEqual(result, "ok")
+        self.assertEqual(calls, [5, 5])
+        self.assertEqual(controller.stats()["retries"], 1)
+        self.assertEqual(controller.breaker.failures, 0)
+
+    def test_non_retryable_error(self):
+        controller = self.controller()
+        with self.assertRaises(ValueError):
+            self.call(controller, [ValueError("requête invalide"), "ok"])
+        self.assertEqual(controller.stats()["retries"], 0)
+
+    def test_attempt_timeout_bounded_by_deadline(self):
+        controller = self.controller()
+        _, calls = self.call(controller, ["ok"], deadline=2)
+        self.assertEqual(calls, [2])
+
+    def test_circuit_rejects_without_calling(self):
+        controller = self.controller(failure_threshold=1, max_retries=0)
+        with self.assertRaises(asyncio.TimeoutError):
+            self.call(controller, [asyncio.TimeoutError()])
+        with self.assertRaises(CircuitOpenError):
+            self.call(controller, [])
+        stats = controller.stats()
+        self.assertEqual(stats["circuit_state"], 1)
+        self.assertEqual(stats["rejected_circuit"], 1)
+
+    def test_cancelled_probe_is_released(self):
+        controller = self.controller(failure_threshold=1, max_retries=0)
+        with self.assertRaises(asyncio.TimeoutError):
+            self.call(controller, [asyncio.TimeoutError()])
+        self.clock.now += 31
+        # La requête de test est annulée pendant l'appel : le disjoncteur reste semi-ouvert
+        with self.assertRaises(asyncio.CancelledError):
+            self.call(controller, [asyncio.CancelledError()])
+        self.assertEqual(controller.stats()["circuit_state"], 2)
+        # Une nouvelle requête de test peut partir et referme le disjoncteur
+        self.assertEqual(self.call(controller, ["ok"])[0], "ok")
+        self.assertEqual(controller.stats()["circuit_state"], 0)
+
+    def test_retry_budget_exhausted(self):
+        controller = self.controller(retry_budget_ratio=0)
+        controller.retry_budget.balance = 0
+        with self.assertRaises(asyncio.TimeoutError):
+            self.call(controller, [asyncio.TimeoutError(), "ok"])
+        self.assertEqual(controller.stats()["retry_budget_exhausted"], 1)
+
+    def test_rate_limit_beyond_deadline(self):
+        controller = self.controller(rps=1)
+        self.assertEqual(self.call(controller, ["ok"], deadline=0.5)[0], "ok")
+        with self.assertRaises(RateLimitedError):
+            self.call(controller, ["ok"], deadline=0.5)
+        # Limite en tokens par minute : 600 tokens par minute, soit 10 par seconde
+        controller = self.controller(tpm=600)
+        self.call(controller, ["ok"], cost=600)
+        with self.assertRaises(RateLimitedError):
+            self.call(controller, ["ok"], cost=50, deadline=1)
+        self.assertEqual(controller.stats()["rejected_rate"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
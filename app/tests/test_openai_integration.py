@@ -1,7 +1,11 @@
+import time
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from app.services.sentiment_analyzer import SentimentAnalyzer
 from app.config import Config
+from app.services.openai_client import OpenAIClient
+from app.services.openai_admission import AdmissionController
+from app.tests.openai_stub import OpenAIStub
 
 class TestOpenAIIntegration(unittest.TestCase):
     """Tests pour l'intégration OpenAI"""
@@ -10,6 +14,9 @@ class TestOpenAIIntegration(unittest.TestCase):
         self.analyzer = SentimentAnalyzer()
         self.test_text = "Je suis très content de cette application!"
     
+    def tearDown(self):
+        self.analyzer.close()
+    
     def test_local_sentiment_analysis(self):
         """Test de l'analyse de sentiment locale"""
         result = self.analyzer.analyze_sentiment(self.test_text, use_openai=False)
@@ -23,7 +30,8 @@ class TestOpenAIIntegration(unittest.TestCase):
         # Vérifier que le sentiment est correctement détecté
         self.assertEqual(result['sentiment'], 'positif')
         
-    @patch('app.services.sentiment_analyzer.OpenAI')
+    @patch.object(Config, 'OPENAI_API_KEY', 'test-key')
+    @patch('openai.AsyncOpenAI')
     def test_openai_sentiment_analysis(self, mock_openai):
         """Test de l'analyse de sentiment via OpenAI avec mock"""
         # Configuration du mock
@@ -38,7 +46,7 @@ class TestOpenAIIntegration(unittest.TestCase):
                 )
             )
         ]
-        mock_client.chat.completions.create.return_value = mock_response
+        mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
         
         # Test avec OpenAI activé
         result = self.analyzer.analyze_sentiment(self.test_text, use_openai=True)
@@ -61,6 +69,133 @@ class TestOpenAIIntegration(unittest.TestCase):
             # Vérifier que l'analyse a été effectuée localement
             self.assertIsNotNone(result)
             self.assertEqual(result['model'], 'local')
-            
+
+
+
+class TestOpenAIStubServer(unittest.TestCase):
+    """Tests du client OpenAI partagé contre un serveur local imitant l'API"""
+    
+    def setUp(self):
+        self.analyzer = SentimentAnalyzer(use_cache=False)
+        self.key_patch = patch.object(Config, 'OPENAI_API_KEY', 'test-key')
+        self.key_patch.start()
+    
+    def tearDown(self):
+        self.analyzer.close()
+        self.key_patch.stop()
+    
+    def test_batch_fan_out_preserves_order(self):
+        """Les appels d'un lot sont concurrents et les résultats restent dans l'ordre"""
+        texts = [f"texte {i} {'content' if i % 2 else 'déçu'}" for i in range(8)]
+        with OpenAIStub(delay=0.2) as stub:
+            self.analyzer._openai_client = OpenAIClient(base_url=stub.base_url, max_concurrency=8)
+            start = time.perf_counter()
+            results = self.analyzer.analyze_sentiment_batch(texts, use_openai=True)
+            elapsed = time.perf_counter() - start
+        
+        self.assertEqual(len(stub.requests), 8)
+        self.assertGreater(stub.max_in_flight, 1)
+        self.assertLess(elapsed, 8 * 0.2)
+        for i, result in enumerate(results):
+            self.assertEqual(result['sentiment'], 'positif' if i % 2 else 'négatif')
+            self.assertEqual(result['model'], Config.OPENAI_MODEL)
+    
+    def test_concurrency_limit(self):
+        """La concurrence des appels est bornée par max_concurrency"""
+        with OpenAIStub(delay=0.05) as stub:
+            self.analyzer._openai_client = OpenAIClient(base_url=stub.base_url, max_concurrency=2)
+            self.analyzer.analyze_sentiment_batch([f"texte {i}" for i in range(6)], use_openai=True)
+        self.assertLessEqual(stub.max_in_flight, 2)
+    
+    def test_timeout_falls_back_to_local(self):
+        """Un appel qui dépasse le délai bascule vers le modèle local"""
+        with OpenAIStub(delay=0.5) as stub:
+            self.analyzer._openai_client = OpenAIClient(base_url=stub.base_url, timeout=0.1)
+            results = self.analyzer.analyze_sentiment_batch(["Je suis très content !"], use_openai=True)
+        self.assertEqual(results[0]['model'], 'local')
+    
+    def test_client_is_reused(self):
+        """Le même client (et son pool de connexions) sert pour tous les appels"""
+        with OpenAIStub() as stub:
+            self.analyzer._openai_client = OpenAIClient(base_url=stub.base_url)
+            client = self.analyzer.openai_client
+            self.analyzer.analyze_sentiment("Je suis content", use_openai=True)
+            self.analyzer.analyze_sentiment("Je suis déçu", use_openai=True)
+            self.assertIs(self.analyzer.openai_client, client)
+        self.assertEqual(len(stub.requests), 2)
+
+
+class TestOpenAIAdmission(unittest.TestCase):
+    """Tests du contrôle d'admission contre un serveur local injectant des pannes"""
+    
+    def setUp(self):
+        self.analyzer = SentimentAnalyzer(use_cache=False)
+        self.key_patch = patch.object(Config, 'OPENAI_API_KEY', 'test-key')
+        self.key_patch.start()
+    
+    def tearDown(self):
+        self.analyzer.close()
+        self.key_patch.stop()
+    
+    def use_stub(self, stub, timeout=None, deadline=None, **admission):
+        options = dict(backoff=0.01, failure_threshold=5, cooldown=30)
+        options.update(admission)
+        self.analyzer._openai_client = OpenAIClient(
+            base_url=stub.base_url, timeout=timeout, deadline=deadline, admission=AdmissionController(**options)
+        )
+    
+    def test_transient_errors_are_retried(self):
+        """Les erreurs 503 et 429 passagères sont retentées avant de basculer vers le modèle local"""
+        with OpenAIStub(faults=[503, 429]) as stub:
+            self.use_stub(stub)
+            result = self.analyzer.analyze_sentiment("Je suis déçu", use_openai=True)
+        self.assertEqual(result['model'], Config.OPENAI_MODEL)
+        self.assertEqual(len(stub.requests), 3)
+        self.assertEqual(self.analyzer.openai_stats()['retries'], 2)
+    
+    def test_slow_response_is_retried(self):
+        """Une tentative trop lente est abandonnée puis retentée dans la limite du délai de la requête"""
+        with OpenAIStub(faults=["timeout"]) as stub:
+            self.use_stub(stub, timeout=0.2, deadline=1.5)
+            result = self.analyzer.analyze_sentiment("Je suis déçu", use_openai=True)
+        self.assertEqual(result['model'], Config.OPENAI_MODEL)
+        self.assertEqual(len(stub.requests), 2)
+    
+    def test_client_error_is_not_retried(self):
+        """Une erreur définitive (400) n'est pas retentée et ne compte pas comme une panne"""
+        with OpenAIStub(faults=[400]) as stub:
+            self.use_stub(stub)
+            result = self.analyzer.analyze_sentiment("Je suis déçu", use_openai=True)
+        self.assertEqual(result['model'], 'local')
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual(self.analyzer.openai_stats()['consecutive_failures'], 0)
+    
+    def test_circuit_breaker(self):
+        """Pendant une panne, le disjoncteur s'ouvre puis se referme après une requête de test réussie"""
+        with OpenAIStub() as stub:
+            stub.outage = 503
+            self.use_stub(stub, max_retries=0, failure_threshold=2, cooldown=0.5)
+            for _ in range(2):
+                self.assertEqual(self.analyzer.analyze_sentiment("Je suis déçu", use_openai=True)['model'], 'local')
+            self.assertEqual(self.analyzer.openai_stats()['circuit_state'], 1)
+    
+            # Disjoncteur ouvert : bascule immédiate vers le modèle local, sans appel
+            start = time.perf_counter()
+            results = self.analyzer.analyze_sentiment_batch(["Je suis content", "Je suis déçu"], use_openai=True)
+            self.assertLess(time.perf_counter() - start, 0.5)
+            self.assertEqual([r['model'] for r in results], ['local', 'local'])
+            self.assertEqual(len(stub.requests), 2)
+    
+            # Après le délai, la requête de test réussit et referme le disjoncteur
+            stub.outage = None
+            time.sleep(0.55)
+            result = self.analyzer.analyze_sentiment("Je suis déçu", use_openai=True)
+            self.assertEqual(result['model'], Config.OPENAI_MODEL)
+        stats = self.analyzer.openai_stats()
+        self.assertEqual(stats['circuit_state'], 0)
+        self.assertEqual(stats['circuit_opened'], 1)
+        self.assertEqual(stats['rejected_circuit'], 2)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,126 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from app.config import Config
+from app.services.metrics import OPENAI_REQUESTS
+from app.services.openai_client import OpenAIClient
+from app.services.openai_packing import pack_texts, parse_packed_content
+from app.services.sentiment_analyzer import SentimentAnalyzer
+from app.tests.openai_stub import OpenAIStub, default_responder
+
+
+def packed_responder(messages):
+    """Répond à un lot : positif si le texte contient 'content', négatif sinon"""
+    items = json.loads(messages[-1]["content"])
+    return json.dumps([
+        {"id": item["id"], "sentiment": "positif", "polarity": 0.8} if "content" in item["text"]
+        else {"id": item["id"], "sentiment": "négatif", "polarity": -0.6}
+        for item in items
+    ])
+
+
+class TestPacking(unittest.TestCase):
+    """Tests du regroupement des textes en lots"""
+
+    def test_respects_max_texts(self):
+        packs = pack_texts(["court"] * 7, token_budget=10000, max_texts=3)
+        self.assertEqual(packs, [[0, 1, 2], [3, 4, 5], [6]])
+
+    def test_respects_token_budget(self):
+        texts = ["x" * 400, "x" * 400, "x" * 400]
+        packs = pack_texts(texts, token_budget=350, max_texts=10)
+        self.assertEqual(packs, [[0, 1], [2]])
+
+    def test_oversized_text_gets_its_own_pack(self):
+        packs = pack_texts(["x" * 10000, "court"], token_budget=100, max_texts=10)
+        self.assertEqual(packs, [[0], [1]])
+
+    def test_parse_matches_by_id(self):
+        # Le deuxième texte est omis : les autres réponses restent associées à leur texte
+        items = parse_packed_content(
+            '[{"id": 2, "sentiment": "négatif", "polarity": -0.5}, {"id": 0, "sentiment": "positif", "polarity": 0.5}]', 3
+        )
+        self.assertEqual(items[0]["polarity"], 0.5)
+        self.assertIsNone(items[1])
+        self.assertEqual(items[2]["polarity"], -0.5)
+
+    def test_parse_rejects_unnumbered_and_duplicate_items(self):
+        items = parse_packed_content(
+            '[{"sentiment": "positif", "polarity": 0.5}, {"id": 1, "polarity": 0.1}, '
+            '{"id": 1, "polarity": 0.2}, {"id": 7, "polarity": 0.3}, {"id": true, "polarity": 0.4}]', 3
+        )
+        self.assertEqual(items, [None, None, None])
+
+    def test_parse_malformed(self):
+        self.assertIsNone(parse_packed_content("pas du JSON", 2))
+        self.assertIsNone(parse_packed_content('{"resultat": "positif"}', 2))
+        self.assertEqual(parse_packed_content('[{}, {}, {}]', 2), [None, None])
+
+
+class TestPackedOpenAI(unittest.TestCase):
+    """Tests du mode groupé contre un serveur local imitant l'API"""
+
+    def setUp(self):
+        self.analyzer = SentimentAnalyzer(use_cache=False)
+        self.patches = [
+            patch.object(Config, 'OPENAI_API_KEY', 'test-key'),
+            patch.object(Config, 'OPENAI_PACKED', True),
+            patch.object(Config, 'OPENAI_PACK_MAX_TEXTS', 4),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        self.analyzer.close()
+        for p in self.patches:
+            p.stop()
+
+    def test_packed_batch(self):
+        texts = [f"texte {i} {'content' if i % 2 else 'déçu'}" for i in range(10)]
+        with OpenAIStub(responder=packed_responder) as stub:
+            self.analyzer._openai_client = OpenAIClient(base_url=stub.base_url)
+            results = self.analyzer.analyze_sentiment_batch(texts, use_openai=True)
+
+        self.assertEqual(len(stub.requests), 3)
+        for i, result in enumerate(results):
+            self.assertEqual(result['sentiment'], 'positif' if i % 2 else 'négatif')
+            self.assertEqual(result['model'], Config.OPENAI_MODEL)
+
+    def test_skipped_item_retries_missing_subset(self):
+        calls = []
+
+        def skipping_responder(messages):
+            calls.append(messages[-1]["content"])
+            if len(calls) > 1:
+                return default_responder(messages)
+            # Le premier appel omet un élément au milieu du tableau
+            items = json.loads(packed_responder(messages))
+            return json.dumps(items[:1] + items[2:])
+
+        texts = ["a content", "b déçu", "c content", "d déçu"]
+        before = OPENAI_REQUESTS.labels("invalid").value
+        with OpenAIStub(responder=skipping_responder) as stub:
+            self.analyzer._openai_client = OpenAIClient(base_url=stub.base_url)
+            results = self.analyzer.analyze_sentiment_batch(texts, use_openai=True)
+
+        # Seul le texte manquant est renvoyé à OpenAI, les autres gardent leur propre résultat
+        self.assertEqual(len(stub.requests), 2)
+        self.assertIn("b déçu", calls[1])
+        self.assertNotIn("a content", calls[1])
+        self.assertTrue(all(result['model'] == Config.OPENAI_MODEL for result in results))
+        self.assertEqual([result['sentiment'] for result in results], ['positif', 'négatif', 'positif', 'négatif'])
+        self.assertEqual(OPENAI_REQUESTS.labels("invalid").value - before, 1)
+
+    def test_malformed_response_falls_back_to_local(self):
+        with OpenAIStub(responder=lambda messages: "pas du JSON") as stub:
+            self.analyzer._openai_client = OpenAIClient(base_url=stub.base_url)
+            results = self.analyzer.analyze_sentiment_batch(["Je suis content", "Je suis déçu"], use_openai=True)
+
+        # Un appel initial puis OPENAI_PACK_MAX_RETRIES nouvelles tentatives
+        self.assertEqual(len(stub.requests), 1 + Config.OPENAI_PACK_MAX_RETRIES)
+        self.assertTrue(all(result['model'] == 'local' for result in results))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from app.services.sentiment_analyzer import SentimentAnalyzer, ParallelBatchEngine
+
+TEXTS = [
+    "Je suis très content de cette application !",
+    "Ce service ne fonctionne pas correctement.",
+    "Je ne sais pas quoi penser de ce produit.",
+    "Le support est rapide et efficace.",
+    "Livraison trop lente, produit cassé, très déçu.",
+    "Ceci est un test.",
+    "This product is great and I love it",
+]
+
+
+class TestParallelBatchEngine(unittest.TestCase):
+    """Tests du moteur parallèle d'analyse locale"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.analyzer = SentimentAnalyzer(use_cache=False)
+        cls.analyzer.parallel_engine = ParallelBatchEngine(workers=2, threshold=5, chunk_size=3)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.analyzer.close()
+
+    def test_parallel_matches_serial(self):
+        texts = TEXTS * 3
+        expected = [self.analyzer.analyze_sentiment_local(text) for text in texts]
+        results = self.analyzer.analyze_sentiment_batch(texts, use_openai=False)
+        self.assertEqual(results, expected)
+        self.assertIsNotNone(self.analyzer.parallel_engine._executor)
+
+    def test_small_batch_runs_serially(self):
+        engine = ParallelBatchEngine(workers=2, threshold=100)
+        results = engine.analyze(TEXTS, self.analyzer.analyze_sentiment_local_batch)
+        self.assertEqual(len(results), len(TEXTS))
+        self.assertIsNone(engine._executor)
+
+
+if __name__ == '__main__':
+    unittest.main()
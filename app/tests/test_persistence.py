@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base, TextData, SentimentAnalysis
+from app.services.persistence import WriteBehindWriter, QueueFullError
+
+RESULT = {"polarity": 0.5, "subjectivity": 0.4, "sentiment": "positif", "model": "local"}
+
+
+class TestWriteBehindWriter(unittest.TestCase):
+    """Tests de la file d'écriture différée"""
+
+    def setUp(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+
+    def count(self, model):
+        db = self.session_factory()
+        try:
+            return db.query(model).count()
+        finally:
+            db.close()
+
+    def test_drain_on_stop(self):
+        writer = WriteBehindWriter(self.session_factory, batch_size=3, flush_interval=0.05)
+        writer.start()
+        for i in range(10):
+            writer.submit(f"texte {i}", RESULT)
+        writer.stop()
+        self.assertEqual(self.count(TextData), 10)
+        self.assertEqual(self.count(SentimentAnalysis), 10)
+        stats = writer.stats()
+        self.assertEqual(stats["written"], 10)
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreaterEqual(stats["flushes"], 4)
+
+    def test_backpressure_when_full(self):
+        writer = WriteBehindWriter(self.session_factory, max_queue=2, put_timeout=0.01)
+        writer.submit("a", RESULT)
+        writer.submit("b", RESULT)
+        with self.assertRaises(QueueFullError):
+            writer.submit("c", RESULT)
+        self.assertEqual(writer.stats()["rejected"], 1)
+        writer.start()
+        writer.stop()
+        self.assertEqual(self.count(TextData), 2)
+
+    def failing_sessions(self, failures):
+        """Fabrique de sessions dont les `failures` premières validations échouent (base verrouillée)"""
+        remaining = [failures]
+
+        def factory():
+            db = self.session_factory()
+            commit = db.commit
+
+            def failing_commit():
+                if remaining[0] > 0:
+                    remaining[0] -= 1
+                    raise OperationalError("COMMIT", {}, Exception("database is locked"))
+                commit()
+            db.commit = failing_commit
+            return db
+        return factory
+
+    def test_transient_error_is_retried(self):
+        writer = WriteBehindWriter(self.failing_sessions(2), flush_interval=0.01, retry_backoff=0.01)
+        writer.start()
+        for i in range(5):
+            writer.submit(f"texte {i}", RESULT)
+        writer.stop()
+        self.assertEqual(self.count(TextData), 5)
+        stats = writer.stats()
+        self.assertEqual(stats["written"], 5)
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["failed"], 0)
+
+    def test_spill_after_retries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            spill_path = os.path.join(directory, "failed.jsonl")
+            writer = WriteBehindWriter(self.failing_sessions(10), flush_interval=0.01, max_retries=1,
+                                       retry_backoff=0.01, spill_path=spill_path)
+            writer.start()
+            writer.submit("texte perdu", RESULT, source="test")
+            writer.stop()
+            with open(spill_path, encoding="utf-8") as spill:
+                lines = [json.loads(line) for line in spill]
+        self.assertEqual(lines, [{"text": "texte perdu", "result": RESULT, "source": "test", "model_version": None}])
+        stats = writer.stats()
+        self.assertEqual((stats["failed"], stats["spilled"], stats["retries"]), (1, 1, 1))
+        self.assertEqual(self.count(TextData), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
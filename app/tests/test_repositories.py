@@ -0,0 +1,344 @@
+import asyncio
+import datetime
+import threading
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base, TextData, SentimentAnalysis, compute_content_hash, upgrade_db
+from app.models.schemas import TextDataCreate, SentimentAnalysisCreate
+from app.services import repositories as repositories_module
+from app.services.persistence import persist_results, persist_results_async, analyze_with_stored_results
+from app.services.repositories import (
+    TextDataRepository, SentimentAnalysisRepository, AsyncTextDataRepository, AsyncSentimentAnalysisRepository,
+    encode_cursor, decode_cursor
+)
+
+RESULT = {"polarity": 0.5, "subjectivity": 0.4, "sentiment": "positif", "model": "local"}
+
+
+class TestBulkRepositories(unittest.TestCase):
+    """Tests des insertions par lot des repositories"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_create_many_returns_ids_in_order(self):
+        texts = [TextDataCreate(text=f"texte {i}", source="test") for i in range(5)]
+        ids = TextDataRepository.create_many(self.db, texts)
+        self.assertEqual(len(ids), 5)
+        for text_id, expected in zip(ids, texts):
+            self.assertEqual(self.db.get(TextData, text_id).text, expected.text)
+
+    def test_create_many_analyses_in_one_transaction(self):
+        text_ids = TextDataRepository.create_many(
+            self.db, [TextDataCreate(text="bon"), TextDataCreate(text="mauvais")], commit=False
+        )
+        SentimentAnalysisRepository.create_many(self.db, [
+            SentimentAnalysisCreate(text_id=text_ids[0], polarity=0.5, subjectivity=0.4, sentiment="positif", model="local"),
+            SentimentAnalysisCreate(text_id=text_ids[1], polarity=-0.5, subjectivity=0.4, sentiment="négatif", model="local"),
+        ], commit=False)
+        self.db.rollback()
+        self.assertEqual(self.db.query(TextData).count(), 0)
+        self.assertEqual(self.db.query(SentimentAnalysis).count(), 0)
+
+    def test_create_many_empty(self):
+        self.assertEqual(TextDataRepository.create_many(self.db, []), [])
+        self.assertEqual(SentimentAnalysisRepository.create_many(self.db, []), [])
+
+
+class TestTextDeduplication(unittest.TestCase):
+    """Tests de la déduplication des textes et de la réutilisation des analyses"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_upsert_returns_existing_ids(self):
+        ids = TextDataRepository.upsert_many(self.db, [TextDataCreate(text=t) for t in ("a", "b", "a")])
+        self.assertEqual(ids[0], ids[2])
+        again = TextDataRepository.upsert_many(self.db, [TextDataCreate(text="a"), TextDataCreate(text="c")])
+        self.assertEqual(again[0], ids[0])
+        self.assertEqual(self.db.query(TextData).count(), 3)
+        stored = TextDataRepository.get_by_hash(self.db, compute_content_hash("a"))
+        self.assertEqual((stored.id, stored.occurrences), (ids[0], 3))
+        # Empreinte du texte exact : la casse et les espaces distinguent les textes
+        self.assertNotEqual(TextDataRepository.create(self.db, TextDataCreate(text="A ")).id, ids[0])
+
+    def test_portable_upsert_for_other_dialects(self):
+        TextDataRepository.upsert_many(self.db, [TextDataCreate(text="a")])
+        with patch.object(repositories_module, "_dialect_insert", return_value=None):
+            ids = TextDataRepository.upsert_many(self.db, [TextDataCreate(text=t) for t in ("b", "a", "b")])
+        self.assertEqual(ids[0], ids[2])
+        self.assertEqual(self.db.query(TextData).count(), 2)
+        self.assertEqual(self.db.get(TextData, ids[1]).occurrences, 2)
+        self.assertEqual(self.db.get(TextData, ids[0]).occurrences, 2)
+
+    def test_create_many_shares_rows_of_same_text(self):
+        ids = TextDataRepository.create_many(self.db, [TextDataCreate(text=t) for t in ("a", "b", "a")])
+        self.assertEqual(len(ids), 3)
+        self.assertEqual(ids[0], ids[2])
+        self.assertEqual(self.db.query(TextData).count(), 2)
+        self.assertEqual(self.db.get(TextData, ids[0]).occurrences, 2)
+
+    def test_stored_results_skip_analysis(self):
+        class CountingAnalyzer:
+            model_version = "v1"
+            analyzed = []
+
+            def analyze_sentiment_batch(self, texts, use_openai=None, checked_model=None):
+                self.analyzed.extend(texts)
+                return [dict(RESULT) for _ in texts]
+
+        analyzer = CountingAnalyzer()
+        persist_results(self.db, ["x"], [dict(RESULT, polarity=0.9)], model_version="v1")
+        persist_results(self.db, ["y"], [RESULT], model_version="v0")
+        results = analyze_with_stored_results(self.db, analyzer, ["x", "y", "x"], use_openai=False)
+        # "x" est repris de la base ; "y" n'a qu'une analyse d'une autre version
+        self.assertEqual(analyzer.analyzed, ["y"])
+        self.assertEqual([r["polarity"] for r in results], [0.9, 0.5, 0.9])
+        self.assertIsNot(results[0], results[2])
+
+    def test_cache_is_checked_before_database(self):
+        from app.services.sentiment_analyzer import SentimentAnalyzer
+        analyzer = SentimentAnalyzer(use_cache=True)
+        try:
+            analyzer.cache.set_many([("en cache", RESULT)], "local", persist=False)
+            persist_results(self.db, ["en base"], [dict(RESULT, polarity=0.9)], model_version=analyzer.model_version)
+            with patch.object(SentimentAnalysisRepository, "find_stored_results",
+                              wraps=SentimentAnalysisRepository.find_stored_results) as lookup, \
+                    patch.object(analyzer, "analyze_sentiment_batch") as analyze:
+                first = analyze_with_stored_results(self.db, analyzer, ["en cache", "en base"], use_openai=False)
+                second = analyze_with_stored_results(self.db, analyzer, ["en base"], use_openai=False)
+        finally:
+            analyzer.close()
+        # Une seule requête, pour le seul texte absent du cache ; il est ensuite servi par le cache
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual(len(lookup.call_args.args[1]), 1)
+        analyze.assert_not_called()
+        self.assertEqual([r["polarity"] for r in first + second], [0.5, 0.9, 0.9])
+
+    def test_reuse_analysis_for_same_version(self):
+        persist_results(self.db, ["x", "x", "y"], [RESULT] * 3, model_version="v1")
+        persist_results(self.db, ["x"], [RESULT], model_version="v1")
+        self.assertEqual(self.db.query(SentimentAnalysis).count(), 2)
+        persist_results(self.db, ["x"], [RESULT], model_version="v2")
+        persist_results(self.db, ["x"], [dict(RESULT, model="gpt-3.5-turbo")], model_version="v2")
+        self.assertEqual(self.db.query(SentimentAnalysis).count(), 4)
+        # Sans version, chaque analyse est enregistrée
+        persist_results(self.db, ["x"], [RESULT])
+        self.assertEqual(self.db.query(SentimentAnalysis).count(), 5)
+
+
+class TestAsyncRepositories(unittest.TestCase):
+    """Tests des repositories asynchrones (AsyncSession, aiosqlite)"""
+
+    def test_round_trip(self):
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+        async def scenario():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, expire_on_commit=False)
+            hashing_threads = set()
+
+            def recording_hash(value):
+                hashing_threads.add(threading.get_ident())
+                return compute_content_hash(value)
+
+            try:
+                async with session_factory() as db:
+                    with patch.object(repositories_module, "compute_content_hash", recording_hash):
+                        ids = await persist_results_async(
+                            db, [f"texte {i}" for i in range(5)] + ["texte 0"], [RESULT] * 6
+                        )
+                    page, cursor = await AsyncTextDataRepository.get_page(db, limit=3)
+                    exported = [row["id"] async for row in AsyncTextDataRepository.iter_all(db, batch_size=2)]
+                    stats = await AsyncSentimentAnalysisRepository.get_stats(db)
+                return ids, page, cursor, exported, stats, hashing_threads, threading.get_ident()
+            finally:
+                await engine.dispose()
+
+        ids, page, cursor, exported, stats, hashing_threads, loop_thread = asyncio.run(scenario())
+        # Empreintes calculées dans le pool de threads, pas dans la boucle d'événements
+        self.assertTrue(hashing_threads)
+        self.assertNotIn(loop_thread, hashing_threads)
+        self.assertEqual(ids[0], ids[5])
+        self.assertEqual([row.id for row in page], ids[:3])
+        self.assertEqual(decode_cursor(cursor), ids[2])
+        self.assertEqual(exported, ids[:5])
+        self.assertEqual(stats["total"], 6)
+
+
+class TestKeysetPagination(unittest.TestCase):
+    """Tests de la pagination par clé et de l'export des tables"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        self.ids = TextDataRepository.create_many(self.db, [TextDataCreate(text=f"texte {i}") for i in range(25)])
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_pages_cover_table_once(self):
+        seen, cursor = [], None
+        while True:
+            rows, cursor = TextDataRepository.get_page(self.db, cursor=cursor, limit=10)
+            seen.extend(row.id for row in rows)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.ids)
+
+    def test_after_id_matches_offset(self):
+        by_offset = TextDataRepository.get_all(self.db, skip=10, limit=5)
+        by_key = TextDataRepository.get_all(self.db, limit=5, after_id=self.ids[9])
+        self.assertEqual([row.id for row in by_key], [row.id for row in by_offset])
+
+    def test_cursor_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(12345)), 12345)
+        for cursor in ("", "%%%", encode_cursor(1)[:-1] + "x", "aWQ6YWJj", "aWQ6MDE"):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_iter_all_without_identity_map(self):
+        self.db.expunge_all()
+        rows = list(TextDataRepository.iter_all(self.db, batch_size=7))
+        self.assertEqual([row["id"] for row in rows], self.ids)
+        self.assertEqual(rows[0]["text"], "texte 0")
+        self.assertEqual(len(self.db.identity_map), 0)
+
+
+class TestSentimentStats(unittest.TestCase):
+    """Tests des statistiques agrégées calculées en SQL"""
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(bind=self.engine)()
+        # 201 polarités régulièrement réparties de -1 à 1, deux sources, deux dates
+        polarities = [round(-1.0 + i / 100, 2) for i in range(201)]
+        text_ids = TextDataRepository.create_many(self.db, [
+            TextDataCreate(text=f"texte {i}", source="a" if i % 2 else "b") for i in range(len(polarities))
+        ])
+        SentimentAnalysisRepository.create_many(self.db, [
+            SentimentAnalysisCreate(
+                text_id=text_id, polarity=polarity, subjectivity=0.5, model="local",
+                sentiment="positif" if polarity > 0.1 else "négatif" if polarity < -0.1 else "neutre"
+            )
+            for text_id, polarity in zip(text_ids, polarities)
+        ])
+        self.db.query(SentimentAnalysis).filter(SentimentAnalysis.polarity < 0).update(
+            {"analyzed_at": datetime.datetime(2024, 1, 1)}
+        )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_global_stats(self):
+        stats = SentimentAnalysisRepository.get_stats(self.db, buckets=4)
+        self.assertEqual(stats["total"], 201)
+        self.assertEqual(stats["sentiment_counts"], {"positif": 90, "négatif": 90, "neutre": 21})
+        self.assertEqual(stats["histogram"]["edges"], [-1.0, -0.5, 0.0, 0.5, 1.0])
+        self.assertEqual(stats["histogram"]["counts"], [50, 50, 50, 51])
+        self.assertAlmostEqual(stats["polarity"]["mean"], 0.0, places=9)
+        self.assertEqual((stats["polarity"]["min"], stats["polarity"]["max"]), (-1.0, 1.0))
+        self.assertAlmostEqual(stats["subjectivity_mean"], 0.5)
+        for name, expected in (("p5", -0.9), ("p25", -0.5), ("p50", 0.0), ("p75", 0.5), ("p95", 0.9)):
+            self.assertAlmostEqual(stats["polarity"]["percentiles"][name], expected, delta=0.015)
+
+    def test_filters(self):
+        recent = SentimentAnalysisRepository.get_stats(self.db, start=datetime.datetime(2024, 6, 1))
+        self.assertEqual(recent["total"], 101)
+        self.assertGreaterEqual(recent["polarity"]["min"], 0.0)
+        old = SentimentAnalysisRepository.get_stats(self.db, end=datetime.datetime(2024, 6, 1), source="a")
+        self.assertEqual(old["total"], 50)
+        self.assertEqual(set(old["sentiment_counts"]), {"négatif", "neutre"})
+
+    def test_filters_with_timezone_offset(self):
+        # 2024-01-01 01:00+02:00 correspond à 2023-12-31 23:00 UTC, avant les analyses anciennes
+        offset = datetime.timezone(datetime.timedelta(hours=2))
+        start = datetime.datetime(2024, 1, 1, 1, 0, tzinfo=offset)
+        stats = SentimentAnalysisRepository.get_stats(self.db, start=start)
+        self.assertEqual(stats["total"], 201)
+        end = SentimentAnalysisRepository.get_stats(self.db, end=start)
+        self.assertEqual(end["total"], 0)
+
+    def test_empty(self):
+        stats = SentimentAnalysisRepository.get_stats(self.db, source="inconnue")
+        self.assertEqual(stats["total"], 0)
+        self.assertIsNone(stats["polarity"]["percentiles"])
+        self.assertEqual(sum(stats["histogram"]["counts"]), 0)
+
+
+class TestUpgradeDb(unittest.TestCase):
+    """Tests de l'ajout des colonnes manquantes aux tables existantes"""
+
+    def test_adds_missing_columns(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE sentiment_analysis (id INTEGER PRIMARY KEY, text_id INTEGER NOT NULL, "
+                "polarity FLOAT NOT NULL, subjectivity FLOAT NOT NULL, analyzed_at DATETIME)"
+            ))
+        upgrade_db(engine)
+        with engine.connect() as conn:
+            columns = {row[1] for row in conn.execute(text("PRAGMA table_info(sentiment_analysis)"))}
+        self.assertIn("sentiment", columns)
+        self.assertIn("model", columns)
+        with engine.connect() as conn:
+            indexes = {row[1] for row in conn.execute(text("PRAGMA index_list(sentiment_analysis)"))}
+        self.assertIn("ix_sentiment_analysis_analyzed_at", indexes)
+        self.assertIn("ix_sentiment_analysis_text_id", indexes)
+
+    def test_deduplicates_existing_texts(self):
+        engine = create_engine("sqlite://")
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE text_data (id INTEGER PRIMARY KEY, text TEXT NOT NULL, "
+                "source VARCHAR(255), created_at DATETIME)"
+            ))
+            conn.execute(text(
+                "CREATE TABLE sentiment_analysis (id INTEGER PRIMARY KEY, text_id INTEGER NOT NULL, "
+                "polarity FLOAT NOT NULL, subjectivity FLOAT NOT NULL, analyzed_at DATETIME)"
+            ))
+            for i, value in enumerate(["a", "b", "a", "a", "b", "c"], start=1):
+                conn.execute(
+                    text("INSERT INTO text_data (id, text, created_at) VALUES (:id, :text, :created_at)"),
+                    {"id": i, "text": value, "created_at": datetime.datetime(2024, 1, i)}
+                )
+                conn.execute(
+                    text("INSERT INTO sentiment_analysis (text_id, polarity, subjectivity) VALUES (:id, 0, 0)"),
+                    {"id": i}
+                )
+        upgrade_db(engine)
+        db = sessionmaker(bind=engine)()
+        try:
+            rows = db.query(TextData).order_by(TextData.id).all()
+            self.assertEqual([(row.id, row.text, row.occurrences) for row in rows], [(1, "a", 3), (2, "b", 2), (6, "c", 1)])
+            self.assertEqual(rows[0].last_seen_at, datetime.datetime(2024, 1, 4))
+            self.assertEqual(sorted(a.text_id for a in db.query(SentimentAnalysis)), [1, 1, 1, 2, 2, 6])
+            self.assertEqual(TextDataRepository.create_many(db, [TextDataCreate(text="b")]), [2])
+        finally:
+            db.close()
+        with engine.connect() as conn:
+            indexes = {row[1]: row[2] for row in conn.execute(text("PRAGMA index_list(text_data)"))}
+        self.assertEqual(indexes["ux_text_data_content_hash"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
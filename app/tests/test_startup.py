@@ -0,0 +1,45 @@
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+
+from app.services import sentiment_analyzer as analyzer_module
+from app.services.sentiment_analyzer import NLTKResourceError, ensure_nltk_resources
+
+MISSING = {"absente": "corpora/ressource_absente_pour_les_tests"}
+
+
+class TestStartup(unittest.TestCase):
+    """Tests du démarrage : imports différés et vérification des ressources NLTK"""
+
+    def test_lazy_imports(self):
+        code = (
+            "import sys\n"
+            "import app.main\n"
+            "heavy = [m for m in ('matplotlib', 'pandas', 'openai', 'textblob', 'nltk') if m in sys.modules]\n"
+            "assert not heavy, heavy\n"
+        )
+        subprocess.run([sys.executable, "-c", code], check=True)
+
+    def test_offline_mode_degrades_without_network(self):
+        with patch.object(analyzer_module, "_nltk_status", None), \
+                patch.object(analyzer_module, "NLTK_RESOURCES", MISSING), \
+                patch("nltk.download", side_effect=AssertionError("accès au réseau")):
+            self.assertEqual(ensure_nltk_resources("offline"), {"absente": False})
+            # Vérification faite une seule fois par processus
+            self.assertIs(ensure_nltk_resources("strict"), ensure_nltk_resources("offline"))
+
+    def test_strict_mode_fails_fast(self):
+        with patch.object(analyzer_module, "_nltk_status", None), \
+                patch.object(analyzer_module, "NLTK_RESOURCES", MISSING):
+            with self.assertRaises(NLTKResourceError):
+                ensure_nltk_resources("strict")
+            with self.assertRaises(ValueError):
+                ensure_nltk_resources("inconnu")
+
+    def test_stopwords_resource_path(self):
+        self.assertEqual(analyzer_module.NLTK_RESOURCES["stopwords"], "corpora/stopwords")
+
+
+if __name__ == '__main__':
+    unittest.main()
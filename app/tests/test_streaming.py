@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import Base, TextData, SentimentAnalysis
+from app.services.persistence import WriteBehindWriter
+from app.services.sentiment_analyzer import SentimentAnalyzer
+from app.services.streaming import (
+    StreamingAnalysis, iter_ndjson_texts, iter_list_texts, spool_body, iter_file_chunks
+)
+
+
+async def as_chunks(data, size):
+    """Simule un corps de requête reçu par morceaux de `size` octets"""
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def collect(agen):
+    async def run():
+        return [item async for item in agen]
+    return asyncio.run(run())
+
+
+class CountingAnalyzer:
+    """Analyseur factice qui enregistre la taille de chaque lot reçu"""
+
+    def __init__(self):
+        self.batches = []
+
+    def analyze_sentiment_batch(self, texts, use_openai=None, checked_model=None):
+        self.batches.append(len(texts))
+        return [{"polarity": 0.0, "subjectivity": 0.0, "sentiment": "neutre", "model": "local"} for _ in texts]
+
+
+class TestNdjsonParsing(unittest.TestCase):
+    """Tests du découpage d'un corps NDJSON reçu par morceaux"""
+
+    def test_lines_split_across_chunks(self):
+        body = '"premier"\n{"text": "deuxième"}\n\n"troisième"'.encode("utf-8")
+        for size in (1, 3, 7, len(body)):
+            with self.subTest(size=size):
+                items = collect(iter_ndjson_texts(as_chunks(body, size)))
+                self.assertEqual(items, [("premier", None), ("deuxième", None), ("troisième", None)])
+
+    def test_spooled_body(self):
+        body = '"premier"\n{"text": "deuxième"}\n'.encode("utf-8")
+        path = asyncio.run(spool_body(as_chunks(body, 5)))
+        try:
+            items = collect(iter_ndjson_texts(iter_file_chunks(path, size=4)))
+        finally:
+            os.remove(path)
+        self.assertEqual(items, [("premier", None), ("deuxième", None)])
+
+    def test_invalid_lines(self):
+        body = b'"ok"\n{bad\n42\n""\n{"text": "fin"}\n'
+        items = collect(iter_ndjson_texts(as_chunks(body, 4)))
+        self.assertEqual([text for text, _ in items], ["ok", None, None, None, "fin"])
+        self.assertTrue(all(error for _, error in items[1:4]))
+
+
+class TestStreamingAnalysis(unittest.TestCase):
+    """Tests de l'analyse en flux par fragments"""
+
+    def setUp(self):
+        engine = create_engine(
+            "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+        Base.metadata.create_all(bind=engine)
+        self.session_factory = sessionmaker(bind=engine)
+
+    def count(self, model):
+        db = self.session_factory()
+        try:
+            return db.query(model).count()
+        finally:
+            db.close()
+
+    def run_stream(self, stream, items):
+        chunks = collect(stream.run(items))
+        return chunks, [json.loads(line) for chunk in chunks for line in chunk.decode("utf-8").splitlines()]
+
+    def test_results_in_order_and_persisted(self):
+        texts = ["Je suis très content !", "Je suis très déçu !", "Ceci est un test."] * 3
+        stream = StreamingAnalysis(SentimentAnalyzer(use_cache=False), self.session_factory, chunk_size=4)
+        chunks, lines = self.run_stream(stream, iter_list_texts(texts))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual([line["index"] for line in lines], list(range(len(texts))))
+        self.assertEqual([line["text"] for line in lines], texts)
+        self.assertEqual(lines[0]["sentiment"], "positif")
+        self.assertEqual(lines[1]["sentiment"], "négatif")
+        # Textes répétés : stockés une fois, analyses réutilisées (même version)
+        self.assertEqual(self.count(TextData), 3)
+        self.assertEqual(self.count(SentimentAnalysis), 3)
+
+    def test_bounded_chunks_and_errors(self):
+        analyzer = CountingAnalyzer()
+        body = b"".join(b'"texte %d"\n' % i for i in range(25)) + b"{bad\n"
+        stream = StreamingAnalysis(analyzer, self.session_factory, chunk_size=10)
+        _, lines = self.run_stream(stream, iter_ndjson_texts(as_chunks(body, 16)))
+        self.assertEqual(analyzer.batches, [10, 10, 5])
+        errors = [line for line in lines if "error" in line]
+        self.assertEqual([line["index"] for line in errors], [25])
+        self.assertEqual(len(lines), 26)
+        self.assertEqual(self.count(TextData), 25)
+
+    def test_write_behind(self):
+        writer = WriteBehindWriter(self.session_factory, batch_size=5, flush_interval=0.05)
+        writer.start()
+        stream = StreamingAnalysis(CountingAnalyzer(), self.session_factory, writer=writer, chunk_size=4)
+        self.run_stream(stream, iter_list_texts([f"texte {i}" for i in range(10)]))
+        writer.stop()
+        self.assertEqual(writer.stats()["written"], 10)
+        self.assertEqual(self.count(TextData), 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import random
+import re
+import unittest
+
+from textblob import TextBlob
+
+from app.services.sentiment_analyzer import SentimentAnalyzer, NEGATIONS_FR
+from app.services.text_processing import TextNormalizer
+from app.tests.test_lexicon import reference_sentiment_fr
+
+STOPWORDS = {"le", "la", "de", "est", "the", "is", "a"}
+
+
+def reference_preprocess(text):
+    """Implémentation d'origine de preprocess_text (cinq passes), conservée comme référence"""
+    if not text:
+        return ""
+    text = text.lower()
+    text = re.sub(r'https?://\S+|www\.\S+', '', text)
+    text = re.sub(r'@\w+|#\w+', '', text)
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def reference_analyze_local(analyzer, text):
+    """Implémentation d'origine de l'analyse locale, conservée comme référence"""
+    original_text = text.lower()
+    clean_text = " ".join(w for w in reference_preprocess(text).split() if w not in analyzer.stopwords)
+    if not clean_text:
+        return {"polarity": 0.0, "subjectivity": 0.0, "sentiment": "neutre", "model": "local"}
+    blob = TextBlob(clean_text)
+    polarity_en = blob.sentiment.polarity
+    subjectivity = blob.sentiment.subjectivity
+    polarity_fr = reference_sentiment_fr(original_text)
+    has_negation_words = any(neg in original_text.split() for neg in NEGATIONS_FR)
+    explicit_negative = "ne fonctionne pas" in original_text or "pas correctement" in original_text
+    if explicit_negative or (has_negation_words and polarity_fr <= 0):
+        polarity = -0.5
+    else:
+        polarity = (polarity_en + 3 * polarity_fr) / 4
+    if polarity > 0.05:
+        sentiment = "positif"
+    elif polarity < -0.03:
+        sentiment = "négatif"
+    else:
+        sentiment = "neutre"
+    return {"polarity": polarity, "subjectivity": subjectivity, "sentiment": sentiment, "model": "local"}
+
+
+def noisy_corpus(seed=7, size=1500):
+    """Textes aléatoires avec URLs, mentions, hashtags, chiffres et ponctuation"""
+    rng = random.Random(seed)
+    pieces = [
+        "Très", "bon", "produit", "ne", "fonctionne", "pas", "correctement", "déçu", "GREAT", "bad",
+        "https://example.com/a?b=1", "www.site.fr", "@user", "#promo", "l'application", "c'est",
+        "123", "4,5/5", "!!!", "...", "a@b.c", "@http://x", "w@www.x", "#1", "_", "é-é", "le", "the",
+        "super!", "nul,", "İstanbul", "½", "x²", "🙂", "ne\tfonctionne", "pas\ncorrectement",
+    ]
+    return [
+        rng.choice([" ", "  ", "\n", "\t"]).join(rng.choice(pieces) for _ in range(rng.randint(0, 15)))
+        for _ in range(size)
+    ]
+
+
+class TestTextNormalizer(unittest.TestCase):
+    """Le tokeniseur fusionné doit reproduire exactement les cinq passes d'origine"""
+
+    def test_clean_tokens_match_reference(self):
+        normalizer = TextNormalizer(STOPWORDS)
+        for text in noisy_corpus():
+            expected = [w for w in reference_preprocess(text).split() if w not in STOPWORDS]
+            normalized = normalizer.normalize(text)
+            self.assertEqual(normalized.clean_tokens, expected, text)
+            self.assertEqual(normalized.tokens, text.lower().split())
+
+    def test_batch(self):
+        normalizer = TextNormalizer()
+        texts = noisy_corpus(size=20)
+        self.assertEqual(normalizer.normalize_batch(texts), [normalizer.normalize(t) for t in texts])
+
+    def test_full_analysis_matches_reference(self):
+        analyzer = SentimentAnalyzer(use_cache=False)
+        analyzer.stopwords.update(STOPWORDS)
+        for text in noisy_corpus(size=400):
+            self.assertEqual(analyzer.analyze_sentiment_local(text), reference_analyze_local(analyzer, text), text)
+        self.assertEqual(analyzer.preprocess_text("Visitez https://x.fr, @moi #top 42 fois !"), "visitez fois")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1 @@
+# Module de benchmarks de performance
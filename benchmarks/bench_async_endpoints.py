@@ -0,0 +1,126 @@
+"""
+Test de charge de /analyze : route synchrone d'origine contre route asynchrone.
+
+La route synchrone (reproduite ici) occupe un thread du pool de Starlette pendant
+toute la requête, analyse et accès à la base compris ; la route asynchrone n'occupe
+un thread que pendant l'analyse, les accès à la base passant par la session
+asynchrone. Pour chaque niveau de concurrence, on mesure le débit et les latences
+(p50, p95) avec un pool de `--threads` threads, afin de situer la saturation.
+
+Utilisation :
+    python -m benchmarks.bench_async_endpoints --concurrency 10,50,200 --requests 1000 --threads 40
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import anyio.to_thread
+import httpx
+from fastapi import FastAPI, Depends
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.api import sentiment_analysis
+from app.main import app as async_app
+from app.models.database import (
+    Base, create_db_engine, create_async_db_engine, get_async_db, get_async_session_factory
+)
+from app.models.schemas import SentimentRequest
+from app.services.persistence import persist_results
+
+TEXTS = [
+    "Je suis très content de ce produit, il fonctionne parfaitement !",
+    "Livraison en retard et service client décevant.",
+    "Le colis est arrivé mardi.",
+    "Excellent rapport qualité-prix, je recommande.",
+]
+
+
+def build_sync_app(session_factory):
+    """Application de référence : /analyze tel qu'il était avant la couche asynchrone"""
+    app = FastAPI()
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.post("/api/analyze")
+    def analyze_sentiment(request: SentimentRequest, use_openai: bool = False, db=Depends(get_db)):
+        analyzer = sentiment_analysis.get_sentiment_analyzer()
+        result = analyzer.analyze_sentiment(request.text, use_openai=use_openai)
+        persist_results(db, [request.text], [result], model_version=analyzer.model_version)
+        return result
+
+    return app
+
+
+async def run_load(app, concurrency, requests):
+    """Renvoie (requêtes par seconde, latence p50, latence p95) en secondes"""
+    latencies = []
+    counter = iter(range(requests))
+
+    async def worker(client):
+        for i in counter:
+            start = time.perf_counter()
+            # Textes distincts : chaque requête insère une ligne
+            response = await client.post("/api/analyze", json={"text": f"{TEXTS[i % len(TEXTS)]} #{i}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return requests / elapsed, statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="10,50,200")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=40, help="taille du pool de threads de Starlette")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_db_engine(url)
+        Base.metadata.create_all(bind=engine)
+        sync_app = build_sync_app(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+        async def bench():
+            anyio.to_thread.current_default_thread_limiter().total_tokens = args.threads
+            async_engine = create_async_db_engine(url)
+            session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+            async def get_bench_db():
+                async with session_factory() as db:
+                    yield db
+
+            async_app.dependency_overrides[get_async_db] = get_bench_db
+            async_app.dependency_overrides[get_async_session_factory] = lambda: session_factory
+
+            print(f"{args.requests} requêtes par mesure, pool de {args.threads} threads")
+            print(f"{'concurrence':>11s}  {'route':6s}  {'req/s':>8s}  {'p50 (ms)':>9s}  {'p95 (ms)':>9s}")
+            try:
+                for concurrency in (int(c) for c in args.concurrency.split(",")):
+                    for name, app in (("sync", sync_app), ("async", async_app)):
+                        rate, p50, p95 = await run_load(app, concurrency, args.requests)
+                        print(f"{concurrency:11d}  {name:6s}  {rate:8.0f}  {p50 * 1000:9.1f}  {p95 * 1000:9.1f}")
+            finally:
+                await async_engine.dispose()
+
+        asyncio.run(bench())
+        engine.dispose()
+    sentiment_analysis.close_sentiment_analyzer()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark du démarrage à froid de l'application.
+
+Chaque mesure est faite dans un nouveau processus Python : durée de l'import de
+app.main, durée du démarrage (événements startup : base, ressources NLTK, service
+d'analyse) et délai jusqu'à la réponse à la première requête /api/analyze. Les
+modules lourds chargés à chaque étape sont indiqués.
+
+Utilisation :
+    python -m benchmarks.bench_cold_start --runs 5
+    NLTK_MODE=strict python -m benchmarks.bench_cold_start --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HEAVY_MODULES = ("matplotlib", "pandas", "openai", "textblob", "nltk", "numpy")
+
+# Script exécuté dans chaque processus mesuré
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+heavy_after_import = [m for m in {heavy!r} if m in sys.modules]
+from fastapi.testclient import TestClient
+with TestClient(app) as client:
+    started = time.perf_counter()
+    response = client.post("/api/analyze", json={{"text": "Je suis très content de ce produit !"}})
+    response.raise_for_status()
+    first_request = time.perf_counter()
+print(json.dumps({{
+    "import": imported - start,
+    "startup": started - imported,
+    "first_request": first_request - start,
+    "heavy_after_import": heavy_after_import,
+    "heavy_after_request": [m for m in {heavy!r} if m in sys.modules]
+}}))
+"""
+
+
+def run_once(env):
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env.setdefault("NLTK_MODE", "offline")
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'cold_start.db')}"
+        env["CACHE_PERSISTENT"] = "false"
+        env["JOB_WORKERS"] = "0"
+        runs = [run_once(env) for _ in range(args.runs)]
+
+    print(f"{args.runs} démarrages à froid (NLTK_MODE={env['NLTK_MODE']}), médianes :")
+    for name in ("import", "startup", "first_request"):
+        print(f"  {name:14s} : {statistics.median(run[name] for run in runs) * 1000:8.0f} ms")
+    print(f"  modules lourds après l'import       : {', '.join(runs[-1]['heavy_after_import']) or 'aucun'}")
+    print(f"  modules lourds après la 1re requête : {', '.join(runs[-1]['heavy_after_request']) or 'aucun'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Comparaison du score anglais : TextBlob (PatternAnalyzer, construit à chaque texte)
+contre le lexique précompilé EnglishLexiconScorer.
+
+Précision : écarts maximal et moyen de polarité et de subjectivité, part des textes
+identiques. Débit : textes par seconde pour chaque moteur.
+
+Utilisation :
+    python -m benchmarks.bench_english_lexicon --texts 20000
+"""
+import argparse
+import random
+import time
+
+from textblob import TextBlob
+
+from app.services.english_lexicon import EnglishLexiconScorer, TOLERANCE
+from app.services.text_processing import TextNormalizer
+
+WORDS = [
+    "the", "product", "is", "was", "not", "never", "very", "really", "quite", "a", "good", "great", "bad",
+    "terrible", "happy", "disappointed", "slow", "fast", "amazing", "awful", "delivery", "support",
+    "le", "produit", "est", "vraiment", "excellent", "déçu", "rapide", "!!!", "5/5", "@support", "#promo",
+]
+
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 40))) for _ in range(count)]
+
+
+def textblob_score(tokens):
+    blob_sentiment = TextBlob(" ".join(tokens)).sentiment
+    return blob_sentiment.polarity, blob_sentiment.subjectivity
+
+
+def timed(fn, token_lists):
+    start = time.perf_counter()
+    results = [fn(tokens) for tokens in token_lists]
+    return results, len(token_lists) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=20000)
+    args = parser.parse_args()
+
+    normalizer = TextNormalizer()
+    token_lists = [normalized.clean_tokens for normalized in normalizer.normalize_batch(make_corpus(args.texts))]
+    scorer = EnglishLexiconScorer()
+
+    expected, textblob_rate = timed(textblob_score, token_lists)
+    results, lexicon_rate = timed(scorer.score, token_lists)
+
+    diffs = [
+        max(abs(p - ep), abs(s - es))
+        for (p, s), (ep, es) in zip(results, expected)
+    ]
+    exact = sum(1 for diff in diffs if diff == 0)
+
+    print(f"Écart maximal      : {max(diffs):.2e} (tolérance documentée : {TOLERANCE:.0e})")
+    print(f"Écart moyen        : {sum(diffs) / len(diffs):.2e}")
+    print(f"Textes identiques  : {exact / len(diffs):.2%}")
+    print(f"TextBlob           : {textblob_rate:10.0f} textes/s")
+    print(f"Lexique précompilé : {lexicon_rate:10.0f} textes/s")
+    print(f"Accélération       : x{lexicon_rate / textblob_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark des insertions : TextDataRepository.create (une transaction par ligne)
+contre TextDataRepository.create_many (une seule transaction par lot).
+
+Utilisation :
+    python -m benchmarks.bench_repositories --rows 2000 --batch-size 500
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models.database import Base
+from app.models.schemas import TextDataCreate
+from app.services.repositories import TextDataRepository
+
+
+def _session_factory(path):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def bench_single(session_factory, texts):
+    """Insère les textes un par un et renvoie le débit en lignes/s"""
+    db = session_factory()
+    try:
+        start = time.perf_counter()
+        for text in texts:
+            TextDataRepository.create(db, text)
+        return len(texts) / (time.perf_counter() - start)
+    finally:
+        db.close()
+
+
+def bench_bulk(session_factory, texts, batch_size):
+    """Insère les textes par lots et renvoie le débit en lignes/s"""
+    db = session_factory()
+    try:
+        start = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            TextDataRepository.create_many(db, texts[i:i + batch_size])
+        return len(texts) / (time.perf_counter() - start)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    texts = [TextDataCreate(text=f"Texte de test numéro {i}, plutôt satisfaisant.") for i in range(args.rows)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, session_factory = _session_factory(os.path.join(tmp, "single.db"))
+        single = bench_single(session_factory, texts)
+        engine.dispose()
+
+        engine, session_factory = _session_factory(os.path.join(tmp, "bulk.db"))
+        bulk = bench_bulk(session_factory, texts, args.batch_size)
+        engine.dispose()
+
+    print(f"Insertions unitaires : {single:10.0f} lignes/s")
+    print(f"Insertions par lot   : {bulk:10.0f} lignes/s (lots de {args.batch_size})")
+    print(f"Accélération         : x{bulk / single:.1f}")
+
+
+if __name__ == "__main__":
+    main()
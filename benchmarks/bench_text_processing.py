@@ -0,0 +1,68 @@
+"""
+Microbenchmark du prétraitement : cinq passes re.sub + découpages multiples
+(implémentation d'origine) contre le tokeniseur fusionné TextNormalizer.
+
+Utilisation :
+    python -m benchmarks.bench_text_processing --texts 20000
+"""
+import argparse
+import random
+import re
+import time
+
+from app.services.text_processing import TextNormalizer
+
+STOPWORDS = {"le", "la", "les", "de", "des", "un", "une", "et", "est", "ce", "je", "the", "is", "a", "and"}
+
+WORDS = [
+    "le", "produit", "est", "vraiment", "excellent", "mais", "la", "livraison", "ne", "fonctionne", "pas",
+    "correctement", "service", "client", "déçu", "rapide", "l'application", "c'est", "très", "bien",
+    "the", "product", "is", "great", "5/5", "!!!", "@support", "#promo", "https://example.com/avis",
+]
+
+
+def legacy_normalize(text):
+    """Chemin d'origine : lower, cinq re.sub, split/join des mots vides, deux split pour les négations"""
+    original_text = text.lower()
+    cleaned = original_text
+    cleaned = re.sub(r'https?://\S+|www\.\S+', '', cleaned)
+    cleaned = re.sub(r'@\w+|#\w+', '', cleaned)
+    cleaned = re.sub(r'[^\w\s]', '', cleaned)
+    cleaned = re.sub(r'\d+', '', cleaned)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    clean_text = ' '.join(word for word in cleaned.split() if word not in STOPWORDS)
+    tokens = original_text.lower().split()
+    negation_tokens = original_text.split()
+    return clean_text, tokens, negation_tokens
+
+
+def make_corpus(count, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 60))) for _ in range(count)]
+
+
+def timed(fn, texts):
+    start = time.perf_counter()
+    for text in texts:
+        fn(text)
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=20000)
+    args = parser.parse_args()
+
+    texts = make_corpus(args.texts)
+    normalizer = TextNormalizer(STOPWORDS)
+
+    legacy = timed(legacy_normalize, texts)
+    fused = timed(normalizer.normalize, texts)
+
+    print(f"Cinq passes (origine) : {legacy:8.2f} µs/texte")
+    print(f"Tokeniseur fusionné   : {fused:8.2f} µs/texte")
+    print(f"Accélération          : x{legacy / fused:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Générateur reproductible d'avis clients synthétiques, en français et en anglais.
+
+Chaque avis reçoit une tonalité (positive, négative, mitigée ou neutre) qui oriente
+le choix de ses phrases : mots des lexiques, négations ("n'est pas", "ne fonctionne
+pas", "jamais"), phrases neutres et éléments de bruit (URLs, mentions, notes,
+ponctuation répétée). La longueur suit une loi exponentielle : beaucoup d'avis
+courts, quelques avis très longs. Une même graine donne toujours le même corpus.
+
+Utilisation :
+    python -m benchmarks.corpus --texts 5 --seed 42
+"""
+import argparse
+import random
+import statistics
+
+SUBJECTS_FR = [
+    "le produit", "la livraison", "le service client", "l'application", "la batterie", "l'emballage",
+    "le vendeur", "la qualité", "le prix", "l'écran", "la notice", "le remboursement"
+]
+POSITIVE_FR = [
+    "excellent", "parfait", "génial", "efficace", "rapide", "fiable", "pratique", "agréable", "solide",
+    "magnifique", "impressionnant", "confortable", "stable", "utile"
+]
+NEGATIVE_FR = [
+    "mauvais", "horrible", "médiocre", "défectueux", "inutile", "pénible", "compliqué", "instable",
+    "cher", "catastrophique", "nul", "insuffisant"
+]
+NEUTRAL_FR = [
+    "colis arrivé mardi", "article conforme à la description", "livré dans un carton",
+    "existe en trois couleurs", "utilisé depuis deux semaines", "fabriqué en Europe", "vendu avec un câble",
+    "commandé pour un cadeau"
+]
+INTENSIFIERS_FR = ["", "", "très ", "vraiment ", "plutôt ", "assez ", "franchement "]
+
+SUBJECTS_EN = ["product", "delivery", "support team", "app", "battery", "packaging", "seller", "screen", "price"]
+POSITIVE_EN = ["good", "great", "amazing", "excellent", "fast", "reliable", "useful", "beautiful", "perfect"]
+NEGATIVE_EN = ["bad", "terrible", "awful", "slow", "broken", "useless", "disappointing", "poor", "expensive"]
+NEUTRAL_EN = ["it arrived on Tuesday", "shipped in a box", "available in three colours", "made in Europe"]
+INTENSIFIERS_EN = ["", "", "very ", "really ", "quite ", "pretty "]
+
+NOISE = ["!!!", "5/5", "1/5", "@support", "#promo", "https://example.com/avis", "10/10", ":)", "???", "2024"]
+
+# Poids des types de phrases (positive, négative, négation, neutre) selon la tonalité de l'avis
+TONES = {
+    "positive": (6, 1, 1, 2),
+    "negative": (1, 5, 3, 1),
+    "mixed": (3, 3, 2, 2),
+    "neutral": (1, 1, 0, 8),
+}
+SENTENCE_KINDS = ("positive", "negative", "negation", "neutral")
+
+
+def _sentence_fr(rng, kind):
+    subject = rng.choice(SUBJECTS_FR)
+    intensifier = rng.choice(INTENSIFIERS_FR)
+    if kind == "positive":
+        sentence = f"{subject} est {intensifier}{rng.choice(POSITIVE_FR)}"
+    elif kind == "negative":
+        sentence = f"{subject} est {intensifier}{rng.choice(NEGATIVE_FR)}"
+    elif kind == "negation":
+        sentence = rng.choice([
+            f"{subject} n'est pas {rng.choice(POSITIVE_FR)}",
+            f"{subject} ne fonctionne pas correctement",
+            "je ne suis jamais satisfait de cet achat",
+            f"{subject} ne marche plus depuis une semaine",
+            f"aucun problème avec {subject}, pas {rng.choice(NEGATIVE_FR)} du tout",
+        ])
+    else:
+        sentence = rng.choice(NEUTRAL_FR)
+    return sentence[0].upper() + sentence[1:] + rng.choice([".", ".", "!", " !"])
+
+
+def _sentence_en(rng, kind):
+    subject = rng.choice(SUBJECTS_EN)
+    intensifier = rng.choice(INTENSIFIERS_EN)
+    if kind == "positive":
+        sentence = f"The {subject} is {intensifier}{rng.choice(POSITIVE_EN)}"
+    elif kind == "negative":
+        sentence = f"The {subject} is {intensifier}{rng.choice(NEGATIVE_EN)}"
+    elif kind == "negation":
+        sentence = rng.choice([
+            f"The {subject} is not {rng.choice(POSITIVE_EN)}",
+            f"I would never buy this {subject} again",
+            f"The {subject} does not work at all",
+        ])
+    else:
+        sentence = rng.choice(NEUTRAL_EN)
+        sentence = sentence[0].upper() + sentence[1:]
+    return sentence + rng.choice([".", ".", "!"])
+
+
+def generate_review(rng, english_ratio=0.2, mean_sentences=3.0, max_sentences=40, noise_ratio=0.15):
+    """Génère un avis à partir du générateur aléatoire `rng`"""
+    english = rng.random() < english_ratio
+    weights = TONES[rng.choice(list(TONES))]
+    count = min(max_sentences, 1 + int(rng.expovariate(1.0 / max(mean_sentences - 1, 0.1))))
+    sentence = _sentence_en if english else _sentence_fr
+    parts = []
+    for kind in rng.choices(SENTENCE_KINDS, weights=weights, k=count):
+        parts.append(sentence(rng, kind))
+        if rng.random() < noise_ratio:
+            parts.append(rng.choice(NOISE))
+    return " ".join(parts)
+
+
+def generate_reviews(count, seed=0, english_ratio=0.2, mean_sentences=3.0, max_sentences=40, noise_ratio=0.15):
+    """
+    Renvoie `count` avis synthétiques. La graine `seed` fixe entièrement le corpus ;
+    `english_ratio` est la part d'avis en anglais, `mean_sentences` le nombre moyen
+    de phrases par avis (au plus `max_sentences`), `noise_ratio` la probabilité
+    d'ajouter un élément de bruit après chaque phrase.
+    """
+    rng = random.Random(seed)
+    return [
+        generate_review(rng, english_ratio, mean_sentences, max_sentences, noise_ratio)
+        for _ in range(count)
+    ]
+
+
+def describe_corpus(texts):
+    """Caractéristiques du corpus, enregistrées avec les résultats des benchmarks"""
+    lengths = [len(text.split()) for text in texts]
+    negations = sum(1 for text in texts if any(word in text for word in (" pas ", " jamais ", " not ", " never ")))
+    return {
+        "texts": len(texts),
+        "mean_words": statistics.fmean(lengths) if lengths else 0.0,
+        "median_words": statistics.median(lengths) if lengths else 0,
+        "max_words": max(lengths, default=0),
+        "with_negation": negations / len(texts) if texts else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--english-ratio", type=float, default=0.2)
+    args = parser.parse_args()
+
+    texts = generate_reviews(args.texts, seed=args.seed, english_ratio=args.english_ratio)
+    for text in texts:
+        print(text)
+    print(describe_corpus(texts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Suite de benchmarks reproductible : analyseur, repositories et route /analyze/batch,
+mesurés sur un corpus synthétique d'avis (benchmarks.corpus, graine fixe).
+
+Chaque cas est exécuté une fois pour la chauffe puis `--repeat` fois ; la médiane et
+le minimum du temps par texte (en microsecondes) sont écrits dans un fichier JSON
+(`--output`), avec la description de la machine et du corpus. Le cache des résultats
+est désactivé : chaque tour analyse réellement les textes.
+
+Avec `--baseline`, la médiane de chaque cas est comparée à celle de la référence :
+la commande échoue (code de sortie 1) si un cas est plus lent de plus de
+`--threshold` (0.2 : 20 %). `--save-baseline` enregistre les résultats comme
+nouvelle référence. Les durées dépendent de la machine : la référence doit être
+produite sur la machine (ou le runner de CI) qui exécute la comparaison.
+
+Utilisation :
+    python -m benchmarks.suite --texts 2000 --output bench_results.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --save-baseline
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.15
+    python -m benchmarks.suite --cases analyzer.preprocess,analyzer.fr --repeat 10
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app.api import sentiment_analysis
+from app.config import Config
+from app.main import app
+from app.models.database import (
+    Base, create_db_engine, create_async_db_engine, get_async_db, get_async_session_factory
+)
+from app.services.persistence import persist_results
+from app.services.repositories import SentimentAnalysisRepository
+from app.services.sentiment_analyzer import SentimentAnalyzer, ensure_nltk_resources
+from benchmarks.corpus import generate_reviews, describe_corpus
+
+BENCHMARK_CASES = (
+    "analyzer.preprocess", "analyzer.fr", "analyzer.analyze",
+    "repositories.persist", "repositories.page", "endpoint.batch"
+)
+MODEL_VERSION = "benchmark"
+
+
+def measure(run, repeat, setup=None, teardown=None):
+    """
+    Exécute `run` une fois pour la chauffe puis `repeat` fois et renvoie les durées
+    en secondes. `setup` (non mesuré) prépare l'état passé à `run` avant chaque tour,
+    `teardown` le libère après.
+    """
+    durations = []
+    for round_index in range(repeat + 1):
+        state = setup() if setup is not None else None
+        try:
+            start = time.perf_counter()
+            run(state)
+            elapsed = time.perf_counter() - start
+        finally:
+            if teardown is not None:
+                teardown(state)
+        if round_index:
+            durations.append(elapsed)
+    return durations
+
+
+def summarize(durations, count):
+    """Temps par élément en microsecondes : médiane, minimum et détail des tours"""
+    per_item = [duration / count * 1e6 for duration in durations]
+    return {"unit": "us_per_text", "median": statistics.median(per_item), "min": min(per_item), "runs": per_item}
+
+
+def _sqlite_session_factory(path):
+    engine = create_db_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def analyzer_runs(analyzer, texts):
+    """Prétraitement, score français et analyse locale complète, texte par texte"""
+    cases = {
+        "analyzer.preprocess": analyzer.preprocess_text,
+        "analyzer.fr": analyzer.analyze_sentiment_fr,
+        "analyzer.analyze": lambda text: analyzer.analyze_sentiment(text, use_openai=False),
+    }
+    return {
+        name: (lambda _, fn=fn: [fn(text) for text in texts])
+        for name, fn in cases.items()
+    }
+
+
+def bench_persist(texts, results, repeat, batch_size, tmp):
+    """Enregistrement par lots (persist_results) dans une base SQLite neuve à chaque tour"""
+    counter = iter(range(repeat + 1))
+
+    def setup():
+        return _sqlite_session_factory(os.path.join(tmp, f"persist_{next(counter)}.db"))
+
+    def run(state):
+        db = state[1]()
+        try:
+            for i in range(0, len(texts), batch_size):
+                persist_results(db, texts[i:i + batch_size], results[i:i + batch_size], model_version=MODEL_VERSION)
+        finally:
+            db.close()
+
+    def teardown(state):
+        state[0].dispose()
+
+    return measure(run, repeat, setup, teardown)
+
+
+def bench_page(texts, results, repeat, batch_size, tmp):
+    """Parcours de toutes les analyses par pagination par curseur"""
+    engine, session_factory = _sqlite_session_factory(os.path.join(tmp, "page.db"))
+    db = session_factory()
+    try:
+        persist_results(db, texts, results, model_version=MODEL_VERSION)
+
+        def run(_):
+            cursor = None
+            while True:
+                _, cursor = SentimentAnalysisRepository.get_page(db, cursor=cursor, limit=batch_size)
+                db.expunge_all()
+                if cursor is None:
+                    return
+
+        return measure(run, repeat)
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def bench_endpoint(texts, repeat, batch_size, tmp):
+    """POST /api/analyze/batch?charts=none par l'application ASGI, base SQLite neuve à chaque tour"""
+    async def run_rounds():
+        durations = []
+        for round_index in range(repeat + 1):
+            engine = create_async_db_engine(f"sqlite:///{os.path.join(tmp, f'endpoint_{round_index}.db')}")
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+            async def get_bench_db():
+                async with session_factory() as db:
+                    yield db
+
+            app.dependency_overrides[get_async_db] = get_bench_db
+            app.dependency_overrides[get_async_session_factory] = lambda: session_factory
+            try:
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                    start = time.perf_counter()
+                    for i in range(0, len(texts), batch_size):
+                        response = await client.post(
+                            "/api/analyze/batch?charts=none", json={"texts": texts[i:i + batch_size]}
+                        )
+                        response.raise_for_status()
+                    elapsed = time.perf_counter() - start
+            finally:
+                app.dependency_overrides.pop(get_async_db, None)
+                app.dependency_overrides.pop(get_async_session_factory, None)
+                await engine.dispose()
+            if round_index:
+                durations.append(elapsed)
+        return durations
+
+    return asyncio.run(run_rounds())
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(cases, texts_count=2000, seed=42, repeat=5, batch_size=100):
+    """Exécute les cas demandés et renvoie les résultats (dictionnaire sérialisable en JSON)"""
+    # Sans cache ni processus de travail : chaque tour mesure le calcul complet, dans ce processus
+    Config.CACHE_ENABLED = False
+    Config.PARALLEL_WORKERS = 1
+    ensure_nltk_resources()
+
+    texts = generate_reviews(texts_count, seed=seed)
+    analyzer = SentimentAnalyzer(use_cache=False)
+    results = {}
+    try:
+        runs = analyzer_runs(analyzer, texts)
+        for name in cases:
+            if name in runs:
+                results[name] = summarize(measure(runs[name], repeat), len(texts))
+
+        needs_results = {"repositories.persist", "repositories.page"} & set(cases)
+        analysis_results = analyzer.analyze_sentiment_batch(texts, use_openai=False) if needs_results else None
+        with tempfile.TemporaryDirectory() as tmp:
+            if "repositories.persist" in cases:
+                durations = bench_persist(texts, analysis_results, repeat, batch_size, tmp)
+                results["repositories.persist"] = summarize(durations, len(texts))
+            if "repositories.page" in cases:
+                durations = bench_page(texts, analysis_results, repeat, batch_size, tmp)
+                results["repositories.page"] = summarize(durations, len(texts))
+            if "endpoint.batch" in cases:
+                results["endpoint.batch"] = summarize(bench_endpoint(texts, repeat, batch_size, tmp), len(texts))
+    finally:
+        analyzer.close()
+        if "endpoint.batch" in cases:
+            sentiment_analysis.close_sentiment_analyzer()
+
+    return {
+        "meta": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "local_engine": Config.LOCAL_ENGINE,
+            "seed": seed,
+            "repeat": repeat,
+            "batch_size": batch_size
+        },
+        "corpus": describe_corpus(texts),
+        "results": results
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare les médianes aux médianes de référence. Renvoie les lignes du rapport et
+    la liste des cas plus lents de plus de `threshold` (part de la médiane de référence).
+    """
+    lines = []
+    regressions = []
+    reference_results = baseline.get("results", {})
+    for name, result in report["results"].items():
+        reference = reference_results.get(name)
+        if reference is None:
+            lines.append(f"{name:22s} {result['median']:12.2f} µs/texte   (absent de la référence)")
+            continue
+        ratio = result["median"] / reference["median"]
+        regressed = ratio > 1 + threshold
+        if regressed:
+            regressions.append(name)
+        lines.append(
+            f"{name:22s} {result['median']:12.2f} µs/texte   référence {reference['median']:12.2f}   "
+            f"x{ratio:5.2f}{'   RÉGRESSION' if regressed else ''}"
+        )
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(BENCHMARK_CASES))
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=100, help="textes par lot enregistré ou par requête")
+    parser.add_argument("--output", help="fichier JSON des résultats")
+    parser.add_argument("--baseline", help="fichier JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2, help="ralentissement toléré (0.2 : 20 %%)")
+    parser.add_argument("--save-baseline", action="store_true", help="enregistre les résultats comme référence")
+    args = parser.parse_args()
+
+    cases = [name for name in args.cases.split(",") if name]
+    unknown = set(cases) - set(BENCHMARK_CASES)
+    if unknown:
+        parser.error(f"cas inconnus : {', '.join(sorted(unknown))} (disponibles : {', '.join(BENCHMARK_CASES)})")
+
+    report = run_suite(cases, texts_count=args.texts, seed=args.seed, repeat=args.repeat, batch_size=args.batch_size)
+    corpus = report["corpus"]
+    print(
+        f"{corpus['texts']} textes (graine {args.seed}, {corpus['mean_words']:.1f} mots en moyenne, "
+        f"{corpus['max_words']} au plus), {args.repeat} tours par cas"
+    )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        if not args.baseline:
+            parser.error("--save-baseline nécessite --baseline")
+        with open(args.baseline, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+        print(f"Référence enregistrée dans {args.baseline}")
+
+    if not args.baseline or args.save_baseline or not os.path.exists(args.baseline):
+        if args.baseline and not args.save_baseline:
+            print(f"Référence {args.baseline} absente : aucune comparaison (utiliser --save-baseline)")
+        for name, result in report["results"].items():
+            print(f"{name:22s} {result['median']:12.2f} µs/texte   (min {result['min']:.2f})")
+        return
+
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        baseline = json.load(baseline_file)
+    reference_meta = dict(baseline.get("meta", {}), texts=baseline.get("corpus", {}).get("texts"))
+    current_meta = dict(report["meta"], texts=corpus["texts"])
+    changed = [key for key in ("texts", "seed", "batch_size") if reference_meta.get(key) != current_meta[key]]
+    if changed:
+        print(f"Attention : la référence a été produite avec d'autres paramètres ({', '.join(changed)})")
+    lines, regressions = compare(report, baseline, args.threshold)
+    for line in lines:
+        print(line)
+    if regressions:
+        print(f"{len(regressions)} cas au-delà du seuil de {args.threshold:.0%} : {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
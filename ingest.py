@@ -0,0 +1,53 @@
+"""
+Analyse un fichier CSV ou JSONL ligne par ligne, sans le charger en mémoire.
+
+Les textes sont analysés et enregistrés en base par fragments, et les résultats
+écrits au fur et à mesure dans le fichier de sortie (même format que l'entrée).
+
+Utilisation :
+    python ingest.py avis.csv resultats.csv --text-field commentaire
+    python ingest.py avis.jsonl resultats.jsonl --openai --source export-2024
+"""
+import argparse
+
+from app.config import Config
+from app.models.database import SessionLocal, init_db
+from app.services.ingestion import FileIngestor, detect_format
+from app.services.sentiment_analyzer import SentimentAnalyzer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Fichier d'entrée (.csv, .jsonl)")
+    parser.add_argument("output", help="Fichier de résultats")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Format de l'entrée (défaut : d'après l'extension)")
+    parser.add_argument("--text-field", default="text", help="Colonne CSV ou clé JSON contenant le texte")
+    parser.add_argument("--chunk-size", type=int, default=Config.INGEST_CHUNK_SIZE)
+    parser.add_argument("--source", help="Source enregistrée avec les textes")
+    parser.add_argument("--openai", action="store_true", help="Utiliser l'API OpenAI pour l'analyse")
+    args = parser.parse_args()
+
+    init_db()
+    analyzer = SentimentAnalyzer()
+    try:
+        ingestor = FileIngestor(
+            analyzer,
+            SessionLocal,
+            chunk_size=args.chunk_size,
+            use_openai=args.openai,
+            source=args.source,
+            text_field=args.text_field
+        )
+        stats = ingestor.run_file(args.input, args.output, args.format or detect_format(args.input))
+    finally:
+        analyzer.close()
+
+    print(f"Lignes lues        : {stats['rows']}")
+    print(f"Lignes analysées   : {stats['analyzed']}")
+    print(f"Lignes ignorées    : {stats['skipped']}")
+    print(f"Durée              : {stats['seconds']:.1f} s")
+    print(f"Débit              : {stats['rows_per_second']:.0f} lignes/s")
+
+
+if __name__ == "__main__":
+    main()